@@ -2,10 +2,16 @@ import math
 
 from typing import Union
 
+import redis
+
 import minqlx  # type: ignore
 from minqlx import AbstractChannel, Player, Plugin
 
 WEAPON_STATS_KEY = "minqlx:{}:weaponstats"
+LEGACY_WEAPON_STATS_PATTERN = "minqlx:*:weaponstats:*"
+WEAPON_STATS_MIGRATED_KEY = "minqlx:weaponstats:migrated"
+WEAPON_STATS_FIELDS = {"D": "deaths", "DG": "damage_dealt", "DR": "damage_received", "H": "hits", "K": "kills",
+                       "P": "pickups", "S": "shots", "T": "time"}
 _name_key = "minqlx:players:{}:last_used_name"
 
 SteamId = int
@@ -32,17 +38,18 @@ class asdf(Plugin):
         self.add_hook("player_spawn", self.handle_player_spawn)
 
         self.add_hook("game_countdown", self.handle_game_countdown)
-        self.add_hook("round_start", self.handle_round_start)
         self.add_hook("round_end", self.handle_round_end)
 
         self.add_command("weaponstats", self.cmd_weaponstats, usage="[player or id]")
 
-        self.stats_snapshot = {}
+        self.pending_weapon_stats: dict[SteamId, dict[str, int]] = {}
         self.red_overall_damage: int = 0
         self.blue_overall_damage: int = 0
 
         self.min_ammo_rate: float = self.get_cvar("qlx_asdf_minammo_rate", float)
 
+        self.migrate_legacy_weapon_stats()
+
     def handle_player_spawn(self, player: Player):
         if not self.game or self.game.state != "in_progress":
             return
@@ -113,6 +120,10 @@ class asdf(Plugin):
             f"{player.name}, your team is dominating right now. Some of your ammo was reduced:{ammo_info}")
 
     def handle_stats(self, stats: dict):
+        if stats["TYPE"] == "MATCH_REPORT":
+            self.flush_weapon_stats()
+            return
+
         if stats["TYPE"] != "PLAYER_STATS":
             return
 
@@ -125,38 +136,38 @@ class asdf(Plugin):
         if "WEAPONS" not in stats["DATA"]:
             return
 
-        self.store_weapon_stats(stats)
+        self.collect_weapon_stats(stats)
+
+    def collect_weapon_stats(self, stats: dict):
+        steam_id = int(stats["DATA"]["STEAM_ID"])
+        player_weapon_stats = self.pending_weapon_stats.setdefault(steam_id, {})
+        for weapon, weapon_stats in stats["DATA"]["WEAPONS"].items():
+            for stats_key, field in WEAPON_STATS_FIELDS.items():
+                hash_field = f"{weapon}:{field}"
+                player_weapon_stats[hash_field] = player_weapon_stats.get(hash_field, 0) + weapon_stats[stats_key]
+
+    def flush_weapon_stats(self):
+        if len(self.pending_weapon_stats) == 0:
+            return
+
+        pending_weapon_stats = self.pending_weapon_stats
+        self.pending_weapon_stats = {}
+        self.store_weapon_stats(pending_weapon_stats)
 
     @minqlx.thread
-    def store_weapon_stats(self, stats: dict):
-        steam_id = stats["DATA"]["STEAM_ID"]
-        for weapon in stats["DATA"]["WEAPONS"]:
-            self.db.hincrby(WEAPON_STATS_KEY.format(steam_id) + f":{weapon}", "deaths",
-                            stats["DATA"]["WEAPONS"][weapon]["D"])
-            self.db.hincrby(WEAPON_STATS_KEY.format(steam_id) + f":{weapon}", "damage_dealt",
-                            stats["DATA"]["WEAPONS"][weapon]["DG"])
-            self.db.hincrby(WEAPON_STATS_KEY.format(steam_id) + f":{weapon}", "damage_received",
-                            stats["DATA"]["WEAPONS"][weapon]["DR"])
-            self.db.hincrby(WEAPON_STATS_KEY.format(steam_id) + f":{weapon}", "hits",
-                            stats["DATA"]["WEAPONS"][weapon]["H"])
-            self.db.hincrby(WEAPON_STATS_KEY.format(steam_id) + f":{weapon}", "kills",
-                            stats["DATA"]["WEAPONS"][weapon]["K"])
-            self.db.hincrby(WEAPON_STATS_KEY.format(steam_id) + f":{weapon}", "pickups",
-                            stats["DATA"]["WEAPONS"][weapon]["P"])
-            self.db.hincrby(WEAPON_STATS_KEY.format(steam_id) + f":{weapon}", "shots",
-                            stats["DATA"]["WEAPONS"][weapon]["S"])
-            self.db.hincrby(WEAPON_STATS_KEY.format(steam_id) + f":{weapon}", "time",
-                            stats["DATA"]["WEAPONS"][weapon]["T"])
+    def store_weapon_stats(self, weapon_stats: dict[SteamId, dict[str, int]]):
+        pipe = self.db.pipeline(transaction=False)
+        for steam_id, player_weapon_stats in weapon_stats.items():
+            for hash_field, value in player_weapon_stats.items():
+                if value == 0:
+                    continue
+                pipe.hincrby(WEAPON_STATS_KEY.format(steam_id), hash_field, value)
+        pipe.execute()
 
     def handle_game_countdown(self):
-        self.stats_snapshot = {}
         self.red_overall_damage = 0
         self.blue_overall_damage = 0
 
-    def handle_round_start(self, _round_number: int):
-        teams = self.teams()
-        self.stats_snapshot = {player.steam_id: player.stats.damage_dealt for player in teams["red"] + teams["blue"]}
-
     def handle_round_end(self, _data: dict):
         if self.game is None:
             return
@@ -167,31 +178,18 @@ class asdf(Plugin):
         self.calculate_team_round_damages()
 
     def calculate_team_round_damages(self):
-        deltas = self.calculate_damage_deltas()
-
-        teams = self.teams()
+        round_stats = minqlx.ROUND_STATS.current_round()
+        if round_stats is None or not round_stats.ended:
+            return
 
-        red_diff = sum([deltas[player.steam_id] for player in teams["red"] if player.steam_id in deltas])
+        red_diff = round_stats.team_damage["red"]
         self.red_overall_damage += red_diff
 
-        blue_diff = sum([deltas[player.steam_id] for player in teams["blue"] if player.steam_id in deltas])
+        blue_diff = round_stats.team_damage["blue"]
         self.blue_overall_damage += blue_diff
 
         self.logger.debug(f"red_diff: {red_diff} blue_diff: {blue_diff}")
 
-    def calculate_damage_deltas(self):
-        returned = {}
-
-        for steam_id in self.stats_snapshot:
-            minqlx_player = self.player(steam_id)
-
-            if minqlx_player is None:
-                continue
-
-            returned[steam_id] = minqlx_player.stats.damage_dealt - self.stats_snapshot[steam_id]
-
-        return returned
-
     def cmd_weaponstats(self, player: Player, msg: str, channel: AbstractChannel):
         if len(msg) == 1:
             player_name, player_identifier = self.identify_target(player, player)
@@ -218,19 +216,56 @@ class asdf(Plugin):
         reply_channel.reply(f"Weapon statistics for player {player_name}^7: {stats_string}")
 
     def weapon_stats_for(self, steam_id: SteamId):
+        packed_weapon_stats = self.db.hgetall(WEAPON_STATS_KEY.format(steam_id))
+
+        unpacked_weapon_stats: dict[str, dict[str, int]] = {}
+        for hash_field, value in packed_weapon_stats.items():
+            weapon, field = hash_field.split(":", 1)
+            unpacked_weapon_stats.setdefault(weapon, {})[field] = int(value)
+
         returned = {}
-        for key in self.db.keys(WEAPON_STATS_KEY.format(steam_id) + ":*"):
-            weapon_stats = self.db.hgetall(key)
-            weapon = key.split(":")[-1]
-            if int(weapon_stats["shots"]) != 0 and int(weapon_stats["hits"]) != 0:
-                returned[weapon] = WeaponStatsEntry(Weapon(weapon), int(weapon_stats["kills"]),
-                                                    int(weapon_stats["deaths"]), int(weapon_stats["damage_dealt"]),
-                                                    int(weapon_stats["damage_received"]), int(weapon_stats["shots"]),
-                                                    int(weapon_stats["hits"]), int(weapon_stats["pickups"]),
-                                                    int(weapon_stats["time"]))
+        for weapon, weapon_stats in unpacked_weapon_stats.items():
+            if weapon_stats.get("shots", 0) != 0 and weapon_stats.get("hits", 0) != 0:
+                returned[weapon] = WeaponStatsEntry(Weapon(weapon), *[weapon_stats.get(field, 0) for field in
+                                                                      ["kills", "deaths", "damage_dealt",
+                                                                       "damage_received", "shots", "hits",
+                                                                       "pickups", "time"]])
 
         return returned
 
+    @minqlx.thread
+    def migrate_legacy_weapon_stats(self):
+        # Weapon stats used to be stored in one hash per player and weapon. Fold them into the packed per-player
+        # hashes once, and remember that in the database so that later loads skip scanning the keyspace.
+        if self.db.exists(WEAPON_STATS_MIGRATED_KEY):
+            return
+
+        for legacy_key in self.db.scan_iter(LEGACY_WEAPON_STATS_PATTERN):
+            self.migrate_legacy_weapon_stats_key(legacy_key)
+
+        self.db.set(WEAPON_STATS_MIGRATED_KEY, 1)
+
+    def migrate_legacy_weapon_stats_key(self, legacy_key: str):
+        key_parts = legacy_key.split(":")
+        if len(key_parts) != 4 or not key_parts[1].isdigit():
+            return
+
+        steam_id, weapon = key_parts[1], key_parts[3]
+        with self.db.pipeline() as pipe:
+            while True:
+                try:
+                    # another server migrating the same key concurrently makes the transaction fail and re-read
+                    pipe.watch(legacy_key)
+                    legacy_weapon_stats = pipe.hgetall(legacy_key)
+                    pipe.multi()
+                    for field, value in legacy_weapon_stats.items():
+                        pipe.hincrby(WEAPON_STATS_KEY.format(steam_id), f"{weapon}:{field}", int(value))
+                    pipe.delete(legacy_key)
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
+
     def identify_target(self, player: Player, target: Union[SteamId, str, Player]):
         if isinstance(target, Player):
             return target.name, target.steam_id
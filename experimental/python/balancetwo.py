@@ -11,6 +11,7 @@ import os
 import math
 import random
 import itertools
+import struct
 import threading
 import time
 import asyncio
@@ -102,7 +103,7 @@ def report_ratings_for_team(channel: AbstractChannel, team: list[Player], gamety
     if team is None or len(team) <= 0:
         return
 
-    primary_filtered = [player for player in team if player.steam_id in primary_rating_provider.rated_steam_ids()]
+    primary_filtered = [player for player in team if player.steam_id in primary_rating_provider]
     primary_filtered = [player for player in primary_filtered
                         if gametype in primary_rating_provider.rated_gametypes_for(player.steam_id)]
     primary_filtered = [player for player in primary_filtered
@@ -116,7 +117,7 @@ def report_ratings_for_team(channel: AbstractChannel, team: list[Player], gamety
         for player in primary_sorted:
             primary_rating = primary_rating_provider.rating_for(player.steam_id, gametype)
             secondary_rating = secondary_rating_provider.rating_for(player.steam_id, gametype)
-            if player.steam_id in secondary_rating_provider.rated_steam_ids() and \
+            if player.steam_id in secondary_rating_provider and \
                     gametype in secondary_rating_provider.rated_gametypes_for(player.steam_id) and \
                     secondary_rating_provider.games_for(player.steam_id, gametype) > 0:
                 primary_rating = primary_rating_provider.rating_for(player.steam_id, gametype)
@@ -133,7 +134,7 @@ def report_ratings_for_team(channel: AbstractChannel, team: list[Player], gamety
 
     if len(primary_unranked) > 0:
         secondary_filtered = [player for player in primary_unranked
-                              if player.steam_id in secondary_rating_provider.rated_steam_ids()]
+                              if player.steam_id in secondary_rating_provider]
         secondary_filtered = [player for player in secondary_filtered
                               if gametype in secondary_rating_provider.rated_gametypes_for(player.steam_id)]
         secondary_filtered = [player for player in secondary_filtered
@@ -205,6 +206,10 @@ class balancetwo(Plugin):
         List of allowed privacy settings on this server. Take out any value from the default expansive list.
     * qlx_qlstatsPrivacyJoinAttempts (default: "5") amount of join attempts before the player gets kicked,
         if privacyKick is disabled. Set to -1 to disable kicking of players for their join attempts.
+    * qlx_balancetwo_recordMatchHistory (default: "0") record map, scores, and the players' ratings of every finished
+        team game into binary match history files in fs_homepath/matchhistory for later analysis.
+    * qlx_balancetwo_matchHistorySegmentSize (default: "4194304") size in bytes after which a new match history file
+        is started.
 
     Commands supported:
     * !elocheck <player or steam_id> (aliases: !getrating, !getelo", !elo) (permission level based on
@@ -263,6 +268,9 @@ class balancetwo(Plugin):
         self.set_cvar_once("qlx_qlstatsPrivacyWhitelist", "public, private, untracked")
         self.set_cvar_once("qlx_qlstatsPrivacyJoinAttempts", "5")
 
+        self.set_cvar_once("qlx_balancetwo_recordMatchHistory", "0")
+        self.set_cvar_once("qlx_balancetwo_matchHistorySegmentSize", "4194304")
+
         self.rating_system: str = self.get_cvar("qlx_balancetwo_ratingSystem")
 
         self.ratingLimit_kick: bool = self.get_cvar("qlx_balancetwo_ratingLimit_kick", bool)
@@ -291,6 +299,12 @@ class balancetwo(Plugin):
         self.allowed_privacy: list[str] = self.get_cvar("qlx_qlstatsPrivacyWhitelist", list)
         self.max_num_join_attempts: int = self.get_cvar("qlx_qlstatsPrivacyJoinAttempts", int)
 
+        self.match_history: Optional[MatchHistoryWriter] = None
+        if self.get_cvar("qlx_balancetwo_recordMatchHistory", bool):
+            self.match_history = MatchHistoryWriter(
+                os.path.join(self.get_cvar("fs_homepath"), "matchhistory"),
+                max_segment_size=self.get_cvar("qlx_balancetwo_matchHistorySegmentSize", int))
+
         self.connectthreads: dict[str, ConnectThread] = {}
         self.kickthreads: dict[SteamId, KickThread] = {}
         self.exceptions: set[SteamId] = set()
@@ -304,7 +318,7 @@ class balancetwo(Plugin):
         self.previous_ratings: dict[str, RatingProvider] = {}
 
         self.ratings: dict[str, RatingProvider] = {}
-        self.rating_diffs: dict[str, dict[SteamId, Any]] = {}
+        self.rating_changes: dict[SteamId, list[str]] = {}
 
         self.informed_players: list[SteamId] = []
 
@@ -416,8 +430,8 @@ class balancetwo(Plugin):
         for rating_provider in [TRUSKILLS, A_ELO, B_ELO]:
             missing_steam_ids = steam_ids
             if rating_provider in self.ratings:
-                rated_steam_ids = self.ratings[rating_provider.name].rated_steam_ids()
-                missing_steam_ids = [steam_id for steam_id in steam_ids if steam_id not in rated_steam_ids]
+                rated_players = self.ratings[rating_provider.name]
+                missing_steam_ids = [steam_id for steam_id in steam_ids if steam_id not in rated_players]
 
             async_requests.append(rating_provider.fetch_elos(missing_steam_ids))
 
@@ -446,8 +460,8 @@ class balancetwo(Plugin):
         rating_provider_name = f"{mapname} {TRUSKILLS.name}"
         missing_steam_ids = steam_ids
         if rating_provider_name in self.ratings:
-            rated_steam_ids = self.ratings[rating_provider_name].rated_steam_ids()
-            missing_steam_ids = [steam_id for steam_id in steam_ids if steam_id not in rated_steam_ids]
+            rated_players = self.ratings[rating_provider_name]
+            missing_steam_ids = [steam_id for steam_id in steam_ids if steam_id not in rated_players]
 
         if len(missing_steam_ids) == 0:
             return None, None
@@ -967,7 +981,7 @@ class balancetwo(Plugin):
 
         configured_rating_provider = self.ratings[configured_rating_provider_name]
         rated_steam_ids = [steam_id for steam_id in steam_ids
-                           if steam_id in configured_rating_provider.rated_steam_ids()]
+                           if steam_id in configured_rating_provider]
         rated_steam_ids = [steam_id for steam_id in rated_steam_ids if
                            gametype in configured_rating_provider.rated_gametypes_for(steam_id)]
         rated_steam_ids = [steam_id for steam_id in rated_steam_ids if
@@ -1107,7 +1121,7 @@ class balancetwo(Plugin):
             configured_rating_provider = self.ratings[configured_rating_provider_name]
 
         for steam_id in steam_ids:
-            if steam_id not in configured_rating_provider.rated_steam_ids():
+            if steam_id not in configured_rating_provider:
                 return 0
 
         return sum(
@@ -1127,7 +1141,7 @@ class balancetwo(Plugin):
             configured_rating_provider = self.ratings[configured_rating_provider_name]
 
         for steam_id in steam_ids:
-            if steam_id not in configured_rating_provider.rated_steam_ids():
+            if steam_id not in configured_rating_provider:
                 return 0
 
         team_elos = [pow(configured_rating_provider.rating_for(steam_id, gametype) - mu, 2) for steam_id in steam_ids]
@@ -1579,6 +1593,7 @@ class balancetwo(Plugin):
         self.informed_players = []
         self.previous_ratings = self.ratings
         self.ratings = {}
+        self.rating_changes = {}
         self.fetch_and_diff_ratings(mapname)
         self.clean_up_kickthreads()
 
@@ -1612,12 +1627,14 @@ class balancetwo(Plugin):
                                              headers={"X-QuakeLive-Map": self.previous_map}))
 
             results = await asyncio.gather(*async_requests, return_exceptions=True)
+            fetched_ratings: dict[str, RatingProvider] = {}
             for rating_provider_name, rating_results in zip(rating_providers_fetched, results):
                 if isinstance(rating_results, BaseException):
                     continue
                 self.append_ratings(rating_provider_name, rating_results)
-                self.rating_diffs[rating_provider_name] = \
-                    RatingProvider.from_json(rating_results) - self.previous_ratings[rating_provider_name]
+                fetched_ratings[rating_provider_name] = RatingProvider.from_json(rating_results)
+
+            self.rating_changes = self.collect_rating_changes(fetched_ratings)
 
         async def fetch_ratings_from_newmap(_mapname) -> None:
             steam_ids = [player.steam_id for player in self.players()]
@@ -2103,31 +2120,40 @@ class balancetwo(Plugin):
         if not self.wants_to_be_informed(player.steam_id):
             return
 
-        changed_ratings = []
-        previous_truskills = f"{self.previous_map} {TRUSKILLS.name}"
-
-        for rating_provider_name in [previous_truskills, TRUSKILLS.name, A_ELO.name, B_ELO.name]:
-            formatted_diffs = self.format_rating_diffs_for_rating_provider_name_and_player(
-                rating_provider_name, player.steam_id)
-            if formatted_diffs is not None:
-                changed_ratings.append(formatted_diffs)
-
+        changed_ratings = self.rating_changes.get(player.steam_id, [])
         if len(changed_ratings) == 0:
             return
 
         formatted_rating_changes = ", ".join(changed_ratings)
         player.tell(f"Your ratings changed since the last map: {formatted_rating_changes}")
 
-    def format_rating_diffs_for_rating_provider_name_and_player(self, rating_provider_name: str, steam_id: SteamId) \
-            -> Optional[str]:
-        if rating_provider_name not in self.rating_diffs or steam_id not in self.rating_diffs[rating_provider_name] or \
-                self.previous_gametype not in self.rating_diffs[rating_provider_name][steam_id] or \
-                rating_provider_name not in self.ratings or steam_id not in self.ratings[rating_provider_name]:
-            return None
+    def collect_rating_changes(self, fetched_ratings: dict[str, RatingProvider]) -> dict[SteamId, list[str]]:
+        """Compares the ratings fetched at the map change with the ones from before for the previously played gametype,
+        and formats the changes for all players at once, so they are ready when the players join a team."""
+        if self.previous_gametype is None:
+            return {}
 
-        current_rating = self.ratings[rating_provider_name].rating_for(steam_id, self.previous_gametype)
-        rating_diff = self.rating_diffs[rating_provider_name][steam_id][self.previous_gametype]
+        rating_changes: dict[SteamId, list[str]] = {}
+        previous_truskills = f"{self.previous_map} {TRUSKILLS.name}"
+        for rating_provider_name in [previous_truskills, TRUSKILLS.name, A_ELO.name, B_ELO.name]:
+            if rating_provider_name not in fetched_ratings or rating_provider_name not in self.previous_ratings:
+                continue
+
+            changes = rating_snapshot_changes(
+                self.previous_ratings[rating_provider_name].snapshot(self.previous_gametype),
+                fetched_ratings[rating_provider_name].snapshot(self.previous_gametype))
+            for steam_id, (current_rating, rating_diff) in changes.items():
+                formatted_change = self.format_rating_change(rating_provider_name, current_rating, rating_diff)
+                if formatted_change is not None:
+                    rating_changes.setdefault(steam_id, []).append(formatted_change)
+
+        return rating_changes
+
+    @staticmethod
+    def format_rating_change(rating_provider_name: str, current_rating: int | float, rating_diff: int | float) \
+            -> Optional[str]:
         if rating_provider_name.endswith(TRUSKILLS.name):
+            rating_diff = round(rating_diff, 2)
             if rating_diff < 0.0:
                 return f"^3{rating_provider_name}^7: ^4{current_rating:.02f}^7 (^1{rating_diff:+.02f}^7)"
 
@@ -2319,7 +2345,7 @@ class balancetwo(Plugin):
 
         self.previous_map = data["MAP"].lower()
         self.previous_gametype = data["GAME_TYPE"].lower()
-        # self.record_team_stats(self.previous_gametype)
+        self.record_team_stats(self.previous_gametype)
 
         if len(teams["red"] + teams["blue"]) == 4 and self.twovstwo_iter is None:
             steam_ids = [player.steam_id for player in teams["red"] + teams["blue"]]
@@ -2340,38 +2366,39 @@ class balancetwo(Plugin):
                 next_twovstwo = sorted(list(next(self.twovstwo_iter)))
                 other_twovstwo = sorted([steam_id for steam_id in steam_ids if steam_id not in next_twovstwo])
 
-    @minqlx.thread
     def record_team_stats(self, gametype: str) -> None:
+        if self.match_history is None:
+            return
+
         teams = self.teams()
 
         if len(teams["red"] + teams["blue"]) == 2:
             return
 
-        stats = [
-            self.game.map,
-            self.game.red_score,
-            self.game.blue_score,
-            self.team_stats(teams["red"], gametype),
-            self.team_stats(teams["blue"], gametype)
-        ]
+        players = self.team_stats(teams["red"], gametype)
+        players.update(self.team_stats(teams["blue"], gametype))
+        entry = MatchHistoryEntry(int(time.time()), gametype, self.game.map, self.game.red_score,
+                                  self.game.blue_score, players)
 
-        elostats_filename = os.path.join(self.get_cvar("fs_homepath"), "elostats.txt")
-        with open(elostats_filename, "a", encoding="utf-8") as elostats_file:
-            elostats_file.write(f"{stats}\n")
+        self.write_match_history(entry)
 
-    def team_stats(self, team: list[Player], gametype: str) -> dict[SteamId, list[Any]]:
+    @minqlx.thread
+    def write_match_history(self, entry: MatchHistoryEntry) -> None:
+        if self.match_history is None:
+            return
+
+        self.match_history.append(entry)
+
+    def team_stats(self, team: list[Player], gametype: str) -> dict[SteamId, tuple[str, list[float]]]:
         returned = {}
         for player in team:
-            a_elo = 0
-            if A_ELO.name in self.ratings and player.steam_id in self.ratings[A_ELO.name]:
-                a_elo = self.ratings[A_ELO.name].rating_for(player.steam_id, gametype)
-            b_elo = 0
-            if B_ELO.name in self.ratings and player.steam_id in self.ratings[B_ELO.name]:
-                b_elo = self.ratings[B_ELO.name].rating_for(player.steam_id, gametype)
-            truskill = 0
-            if TRUSKILLS.name in self.ratings and player.steam_id in self.ratings[TRUSKILLS.name]:
-                truskill = self.ratings[TRUSKILLS.name].rating_for(player.steam_id, gametype)
-            returned[player.steam_id] = [a_elo, b_elo, truskill]
+            player_ratings = []
+            for rating_provider in MATCH_HISTORY_RATING_PROVIDERS:
+                rating = None
+                if rating_provider.name in self.ratings and player.steam_id in self.ratings[rating_provider.name]:
+                    rating = self.ratings[rating_provider.name].rating_for(player.steam_id, gametype)
+                player_ratings.append(rating if rating is not None else 0.0)
+            returned[player.steam_id] = (player.team, player_ratings)
 
         return returned
 
@@ -2409,99 +2436,74 @@ TRUSKILLS = SkillRatingProvider("Truskill", "http://stats.houseofquake.com/", "e
 A_ELO = SkillRatingProvider("Elo", "http://qlstats.net/", "elo", timeout=15)
 B_ELO = SkillRatingProvider("B-Elo", "http://qlstats.net/", "elo_b", timeout=15)
 
+MATCH_HISTORY_RATING_PROVIDERS = (A_ELO, B_ELO, TRUSKILLS)
 
-class RatingProvider:
-    __slots__ = ("jsons", )
 
-    def __init__(self, json):
-        self.jsons = [json]
+def rating_snapshot_changes(previous: dict[SteamId, int | float], current: dict[SteamId, int | float]) \
+        -> dict[SteamId, tuple[int | float, int | float]]:
+    """Subtracts two rating snapshots of the same gametype.
 
-    def __iter__(self):
-        return iter(self.rated_steam_ids())
+    :return: the current rating and its change for every player rated in both snapshots whose rating changed
+    """
+    return {steam_id: (current[steam_id], current[steam_id] - previous[steam_id])
+            for steam_id in current.keys() & previous.keys() if current[steam_id] != previous[steam_id]}
 
-    def __contains__(self, item):
-        if not isinstance(item, int) and not isinstance(item, str):
-            return False
 
-        steam_id = item
-        if isinstance(item, str):
-            try:
-                steam_id = int(item)
-            except ValueError:
-                return False
+class RatingProvider:
+    """The ratings of the players fetched from a rating provider, keyed by steam id. Ratings appended later for the
+    same player replace the earlier ones."""
+    __slots__ = ("players",)
 
-        for json_rating in self.jsons:
-            if "playerinfo" not in json_rating:
-                continue
+    def __init__(self, json):
+        self.players: dict[SteamId, PlayerRating] = {}
+        self.append_ratings(json)
 
-            if str(steam_id) in json_rating["playerinfo"]:
-                return True
+    def __iter__(self):
+        return iter(self.players)
 
-        return False
+    def __len__(self):
+        return len(self.players)
+
+    def __contains__(self, item):
+        steam_id = self.steam_id_of(item)
+        return steam_id is not None and steam_id in self.players
 
     def __getitem__(self, item):
-        if item not in self:
+        steam_id = self.steam_id_of(item)
+        if steam_id is None or steam_id not in self.players:
             raise TypeError
 
-        steam_id = item
-        if isinstance(item, str):
-            try:
-                steam_id = int(item)
-            except ValueError as e:
-                raise TypeError from e
-
-        for json_rating in reversed(self.jsons):
-            if "playerinfo" not in json_rating:
-                continue
+        return self.players[steam_id]
 
-            if str(steam_id) not in json_rating["playerinfo"]:
-                continue
+    @staticmethod
+    def steam_id_of(item):
+        if isinstance(item, int):
+            return item
 
-            return PlayerRating(json_rating["playerinfo"][str(steam_id)])
+        if isinstance(item, str):
+            try:
+                return int(item)
+            except ValueError:
+                return None
 
         return None
 
-    def __sub__(self, other):
-        returned = {}
-
-        if not isinstance(other, RatingProvider):
-            formatted_other_type = type(other).__name__
-            raise TypeError(f"Can't subtract '{formatted_other_type}' from a RatingProvider")
-
-        for steam_id in self:
-            if steam_id not in other:
-                returned[steam_id] = {gametype: self.gametype_data_for(steam_id, gametype)
-                                      for gametype in self.rated_gametypes_for(steam_id)}
-                continue
-
-            returned[steam_id] = {}
-            for gametype in self.rated_gametypes_for(steam_id):
-                if gametype not in other.rated_gametypes_for(steam_id):
-                    returned[steam_id][gametype] = self.gametype_data_for(steam_id, gametype)
-                    continue
-                gametype_diff = self.rating_for(steam_id, gametype) - other.rating_for(steam_id, gametype)
-
-                if gametype_diff == 0:
-                    continue
-                returned[steam_id][gametype] = round(gametype_diff, 2)
-
-        return returned
-
     @staticmethod
     def from_json(json_response):
         return RatingProvider(json_response)
 
     def append_ratings(self, json_response):
-        self.jsons.append(json_response)
+        if json_response is None or "playerinfo" not in json_response:
+            return
 
-    def player_data_for(self, steam_id):
-        if steam_id not in self:
-            return None
+        for steam_id, player_info in json_response["playerinfo"].items():
+            self.players[int(steam_id)] = PlayerRating(player_info)
 
-        return self[steam_id]
+    def player_data_for(self, steam_id):
+        return self.players.get(steam_id)
 
     def gametype_data_for(self, steam_id, gametype):
-        player_data = self.player_data_for(steam_id)
+        player_data = self.players.get(steam_id)
         if player_data is None:
             return None
 
@@ -2511,26 +2513,21 @@ class RatingProvider:
         return player_data[gametype]
 
     def rating_for(self, steam_id, gametype):
-        gametype_data = self.gametype_data_for(steam_id, gametype)
-        if gametype_data is None:
+        player_data = self.players.get(steam_id)
+        if player_data is None:
             return None
 
-        if "elo" not in gametype_data:
-            return None
-        return gametype_data["elo"]
+        return player_data.rating(gametype)
 
     def games_for(self, steam_id, gametype):
-        gametype_data = self.gametype_data_for(steam_id, gametype)
-        if gametype_data is None:
-            return 0
-
-        if "games" not in gametype_data:
+        player_data = self.players.get(steam_id)
+        if player_data is None:
             return 0
 
-        return gametype_data["games"]
+        return player_data.games(gametype)
 
     def rated_gametypes_for(self, steam_id):
-        player_data = self[steam_id]
+        player_data = self.players.get(steam_id)
 
         if player_data is None:
             return []
@@ -2538,7 +2535,7 @@ class RatingProvider:
         return [gametype for gametype in player_data if gametype not in FILTERED_OUT_GAMETYPE_RESPONSES]
 
     def privacy_for(self, steam_id):
-        player_data = self[steam_id]
+        player_data = self.players.get(steam_id)
 
         if player_data is None:
             return None
@@ -2548,15 +2545,14 @@ class RatingProvider:
 
         return player_data.privacy
 
-    def rated_steam_ids(self):
-        returned: list[SteamId] = []
-        for json_rating in self.jsons:
-            if "playerinfo" not in json_rating:
-                continue
-
-            returned = returned + [int(steam_id) for steam_id in json_rating["playerinfo"]]
+    def snapshot(self, gametype):
+        """The ratings of all rated players for the given gametype, i.e. one column of the table of ratings by steam
+        id and gametype."""
+        ratings = {steam_id: player_rating.rating(gametype) for steam_id, player_rating in self.players.items()}
+        return {steam_id: rating for steam_id, rating in ratings.items() if rating is not None}
 
-        return list(set(returned))
+    def rated_steam_ids(self):
+        return list(self.players)
 
     def format_elos(self, steam_id):
         result = ""
@@ -2599,6 +2595,12 @@ class PlayerRating:
         returned["local"] = self.local
         return returned
 
+    def rating(self, gametype):
+        return self.ratings["ratings"].get(gametype, {}).get("elo")
+
+    def games(self, gametype):
+        return self.ratings["ratings"].get(gametype, {}).get("games", 0)
+
     def __getattr__(self, attr):
         if attr not in ["privacy"]:
             raise AttributeError(f"'{self.__class__.__name__}' object has no atrribute '{attr}'")
@@ -2606,6 +2608,152 @@ class PlayerRating:
         return self.ratings[attr]
 
 
+MATCH_HISTORY_MAGIC = b"QLMH"
+MATCH_HISTORY_VERSION = 1
+MATCH_HISTORY_TEAMS = ("free", "red", "blue", "spectator")
+# row size, timestamp, gametype, map, red score, blue score, number of players
+MATCH_HISTORY_ROW = struct.Struct("<HI8s32shhB")
+
+
+def match_history_player_struct(amount_rating_providers: int) -> struct.Struct:
+    # steam id, team index, one rating per rating provider
+    return struct.Struct(f"<QB{amount_rating_providers}f")
+
+
+class MatchHistoryEntry:
+    __slots__ = ("timestamp", "gametype", "mapname", "red_score", "blue_score", "players")
+
+    def __init__(self, timestamp: int, gametype: str, mapname: str, red_score: int, blue_score: int,
+                 players: dict[SteamId, tuple[str, list[float]]]):
+        self.timestamp = timestamp
+        self.gametype = gametype
+        self.mapname = mapname
+        self.red_score = red_score
+        self.blue_score = blue_score
+        self.players = players
+
+    def __repr__(self) -> str:
+        return f"MatchHistoryEntry({self.timestamp}, {self.gametype}, {self.mapname}, " \
+               f"{self.red_score}:{self.blue_score}, {self.players})"
+
+    def team(self, team: str) -> dict[SteamId, list[float]]:
+        return {steam_id: ratings for steam_id, (player_team, ratings) in self.players.items() if player_team == team}
+
+
+def match_history_segments(directory: str) -> list[str]:
+    if not os.path.isdir(directory):
+        return []
+
+    return [os.path.join(directory, filename) for filename in sorted(os.listdir(directory))
+            if filename.startswith("matchhistory.") and filename.endswith(".bin")]
+
+
+class MatchHistoryWriter:
+    """Append-only binary match history, split into segment files of roughly *max_segment_size* bytes.
+
+    Each segment starts with a header naming the rating providers whose ratings are stored per player, followed by
+    fixed-layout rows: a row header (see MATCH_HISTORY_ROW) and one fixed-size entry per player."""
+    __slots__ = ("directory", "max_segment_size", "rating_providers", "player_struct", "_lock")
+
+    def __init__(self, directory: str, *, max_segment_size: int = 4 * 1024 * 1024,
+                 rating_providers: Sequence[SkillRatingProvider] = MATCH_HISTORY_RATING_PROVIDERS):
+        self.directory = directory
+        self.max_segment_size = max_segment_size
+        self.rating_providers = [rating_provider.name for rating_provider in rating_providers]
+        self.player_struct = match_history_player_struct(len(self.rating_providers))
+        self._lock = threading.Lock()
+
+    def segment_header(self) -> bytes:
+        header = MATCH_HISTORY_MAGIC + struct.pack("<BB", MATCH_HISTORY_VERSION, len(self.rating_providers))
+        for rating_provider_name in self.rating_providers:
+            encoded_name = rating_provider_name.encode("utf-8")
+            header += struct.pack("<B", len(encoded_name)) + encoded_name
+        return header
+
+    def current_segment(self) -> str:
+        segments = match_history_segments(self.directory)
+        if len(segments) > 0 and os.path.getsize(segments[-1]) < self.max_segment_size:
+            return segments[-1]
+
+        # pruned segments leave gaps in the numbering, so continue after the highest segment number still around
+        segment_numbers = [int(os.path.basename(segment).split(".")[1]) for segment in segments]
+        next_segment_number = max(segment_numbers, default=0) + 1
+        return os.path.join(self.directory, f"matchhistory.{next_segment_number:06d}.bin")
+
+    def pack(self, entry: MatchHistoryEntry) -> bytes:
+        players = b"".join(
+            self.player_struct.pack(steam_id, MATCH_HISTORY_TEAMS.index(team), *ratings)
+            for steam_id, (team, ratings) in entry.players.items())
+        row_size = MATCH_HISTORY_ROW.size + len(players)
+        return MATCH_HISTORY_ROW.pack(row_size, entry.timestamp, entry.gametype.encode("utf-8"),
+                                      entry.mapname.encode("utf-8"), entry.red_score, entry.blue_score,
+                                      len(entry.players)) + players
+
+    def append(self, entry: MatchHistoryEntry) -> None:
+        row = self.pack(entry)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            segment = self.current_segment()
+            with open(segment, "ab") as segment_file:
+                if segment_file.tell() == 0:
+                    segment_file.write(self.segment_header())
+                segment_file.write(row)
+
+
+class MatchHistoryReader:
+    """Scans the match history written by MatchHistoryWriter. Rows not matching the given filters are skipped
+    without unpacking their player entries."""
+    __slots__ = ("directory", )
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def __iter__(self) -> Iterator[MatchHistoryEntry]:
+        return self.entries()
+
+    def entries(self, *, since: int = 0, gametype: Optional[str] = None, mapname: Optional[str] = None) \
+            -> Iterator[MatchHistoryEntry]:
+        for segment in match_history_segments(self.directory):
+            with open(segment, "rb") as segment_file:
+                data = segment_file.read()
+            yield from self.segment_entries(data, since=since, gametype=gametype, mapname=mapname)
+
+    @staticmethod
+    def segment_entries(data: bytes, *, since: int = 0, gametype: Optional[str] = None,
+                        mapname: Optional[str] = None) -> Iterator[MatchHistoryEntry]:
+        if data[:len(MATCH_HISTORY_MAGIC)] != MATCH_HISTORY_MAGIC:
+            return
+
+        offset = len(MATCH_HISTORY_MAGIC)
+        _version, amount_rating_providers = struct.unpack_from("<BB", data, offset)
+        offset += 2
+        for _ in range(amount_rating_providers):
+            offset += 1 + data[offset]
+        player_struct = match_history_player_struct(amount_rating_providers)
+
+        while offset + MATCH_HISTORY_ROW.size <= len(data):
+            row_size, timestamp, row_gametype, row_mapname, red_score, blue_score, _amount_players = \
+                MATCH_HISTORY_ROW.unpack_from(data, offset)
+            if offset + row_size > len(data):
+                return
+
+            decoded_gametype = row_gametype.rstrip(b"\0").decode("utf-8")
+            decoded_mapname = row_mapname.rstrip(b"\0").decode("utf-8")
+            if timestamp < since or \
+                    (gametype is not None and decoded_gametype != gametype) or \
+                    (mapname is not None and decoded_mapname != mapname):
+                offset += row_size
+                continue
+
+            players = {}
+            for steam_id, team_index, *ratings in \
+                    player_struct.iter_unpack(data[offset + MATCH_HISTORY_ROW.size:offset + row_size]):
+                players[steam_id] = (MATCH_HISTORY_TEAMS[team_index], ratings)
+            offset += row_size
+
+            yield MatchHistoryEntry(timestamp, decoded_gametype, decoded_mapname, red_score, blue_score, players)
+
+
 class ConnectThread(threading.Thread):
     __slots__ = ("rating_provider", "_steam_id", "fetched_result")
 
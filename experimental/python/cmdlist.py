@@ -1,9 +1,11 @@
-import time
+from typing import Iterable, Optional
 
 import minqlx
 
 from minqlx import Plugin
 
+MAX_PERMISSION_LEVEL = 5
+
 
 # noinspection PyPep8Naming
 class cmdlist(Plugin):
@@ -11,37 +13,71 @@ class cmdlist(Plugin):
     def __init__(self):
         super().__init__()
 
+        self.add_hook("cvar_changed", self.handle_cvar_changed)
         self.add_command("cmdlist", self.cmd_cmdlist)
 
+        self.rendered_generation: int = -1
+        self.rendered_commands: dict[int, list[str]] = {}
+
+    def handle_cvar_changed(self, name: str, _old_value: Optional[str], _new_value: Optional[str]) -> None:
+        if name.startswith("qlx_perm_"):
+            self.rendered_commands = {}
+
     def cmd_cmdlist(self, player: minqlx.Player, _msg: str, _channel: minqlx.AbstractChannel) -> None:
-        self.thread_reply(player)
+        self.tell_lines(player, self.rendered_command_list(self.permission_level_of(player)))
+
+    def permission_level_of(self, player: minqlx.Player) -> int:
+        if player.steam_id == minqlx.owner():
+            return MAX_PERMISSION_LEVEL
+
+        return min(self.db.get_permission(player), MAX_PERMISSION_LEVEL)
+
+    def rendered_command_list(self, permission_level: int) -> list[str]:
+        """The lines listing the commands available at the given permission level.
+
+        Rendered lines are cached per permission level until commands get added or removed, or a qlx_perm_ cvar
+        overriding the permission of a command changes."""
+        if self.rendered_generation != minqlx.COMMANDS.generation:
+            self.rendered_generation = minqlx.COMMANDS.generation
+            self.rendered_commands = {}
 
-    @minqlx.thread
-    def thread_reply(self, player: minqlx.Player) -> None:
-        available_commands: dict[int, list[str]] = {0: [], 1: [], 2: [], 3: [], 4: [], 5: []}
+        if permission_level not in self.rendered_commands:
+            self.rendered_commands[permission_level] = self.render_command_list(permission_level)
+
+        return self.rendered_commands[permission_level]
+
+    @staticmethod
+    def render_command_list(permission_level: int) -> list[str]:
+        available_commands: dict[int, list[str]] = {level: [] for level in range(MAX_PERMISSION_LEVEL + 1)}
 
         for command in minqlx.COMMANDS.commands:
-            if not command.is_eligible_player(player, False):
+            permission_override = minqlx.CVARS.get("qlx_perm_" + command.name[0])
+            required_permission = int(permission_override) if permission_override else command.permission
+            if required_permission > permission_level:
                 continue
-            if isinstance(command.name, str):
+
+            for name in command.name:
                 if command.usage is not None:
-                    available_commands[command.permission].append(f"{command.name} {command.usage}".strip())
+                    available_commands[command.permission].append(f"{name} {command.usage}".strip())
                 else:
-                    available_commands[command.permission].append(command.name.strip())
-            else:
-                for name in command.name:
-                    if command.usage is not None:
-                        available_commands[command.permission].append(f"{name} {command.usage}".strip())
-                    else:
-                        available_commands[command.permission].append(name.strip())
-
-        for level in range(0, 6):
+                    available_commands[command.permission].append(name.strip())
+
+        lines = []
+        for level in range(MAX_PERMISSION_LEVEL + 1):
             if len(available_commands[level]) == 0:
                 continue
 
             level_colorcode = level % 6 + 1
-            player.tell(f"^{level_colorcode}Permission level {level}^7 commands:")
+            lines.append(f"^{level_colorcode}Permission level {level}^7 commands:")
             formatted_commands = f"^7, ^{level_colorcode}".join(available_commands[level])
             for line in minqlx.CHAT_CHANNEL.split_long_lines(formatted_commands, delimiter=","):
-                player.tell(f"^{level_colorcode}  {line}")
-                time.sleep(0.005)
+                lines.append(f"^{level_colorcode}  {line}")
+
+        return lines
+
+    @staticmethod
+    def tell_lines(player: minqlx.Player, lines: Iterable[str]) -> None:
+        # The outbound message queue paces and merges the lines, so they are queued with a low priority to leave room
+        # for the chat of the other players.
+        for line in lines:
+            player.tell(line, priority=minqlx.PRI_LOW)
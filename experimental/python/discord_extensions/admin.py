@@ -1,6 +1,6 @@
 import asyncio
-from asyncio import AbstractEventLoop
 import threading
+from typing import Any
 
 # noinspection PyPackageRequirements
 import discord.utils
@@ -17,10 +17,10 @@ class DiscordInteractionChannel(minqlx.AbstractChannel, minqlx.AbstractDummyPlay
     """
     a minqlx channel class to respond to from within minqlx for interactions with discord
     """
-    def __init__(self, user: User, message: Message, *, loop: AbstractEventLoop):
+    def __init__(self, user: User, message: Message, *, bridge: Any):
         self.user: User = user
         self.message: Message = message
-        self.loop: AbstractEventLoop = loop
+        self.bridge = bridge
         self.embed = Embed(color=Color.red())
 
         super().__init__(name=f"Discord-{self.user.display_name}")
@@ -50,9 +50,7 @@ class DiscordInteractionChannel(minqlx.AbstractChannel, minqlx.AbstractDummyPlay
 
         :param: msg: the msg to send to this player
         """
-        asyncio.run_coroutine_threadsafe(
-            self.expand_original_reply(content=Plugin.clean_text(msg)),
-            loop=self.loop)
+        self.bridge.submit(self.expand_original_reply, content=Plugin.clean_text(msg))
 
     def reply(self, msg: str) -> None:
         """
@@ -60,9 +58,7 @@ class DiscordInteractionChannel(minqlx.AbstractChannel, minqlx.AbstractDummyPlay
 
         :param: msg: the message to send to this channel
         """
-        asyncio.run_coroutine_threadsafe(
-            self.expand_original_reply(content=Plugin.clean_text(msg)),
-            loop=self.loop)
+        self.bridge.submit(self.expand_original_reply, content=Plugin.clean_text(msg))
 
 
 class AdminCog(Cog):
@@ -184,17 +180,22 @@ class AdminCog(Cog):
         command_length = self.command_length(ctx)
         qlx_command = ctx.message.content[command_length:]
         message = await ctx.reply(content=f"executing command `{qlx_command}`", ephemeral=False)
-        self.execute_qlx_command(ctx.author, message, qlx_command)
+        await self.execute_qlx_command(ctx.author, message, qlx_command)
 
-    @minqlx.next_frame
-    def execute_qlx_command(self, user: discord.User, message: Message, qlx_command: str):
-        discord_interaction = DiscordInteractionChannel(user, message, loop=self.bot.loop)
+    async def execute_qlx_command(self, user: discord.User, message: Message, qlx_command: str):
         try:
-            minqlx.COMMANDS.handle_input(discord_interaction, qlx_command, discord_interaction)
+            await asyncio.wrap_future(
+                minqlx.run_in_main_thread(self.handle_qlx_command, user, message, qlx_command))
         except Exception as e:  # pylint: disable=broad-except
-            send_message = message.edit(content=f"{e.__class__.__name__}: {e}")
-            asyncio.run_coroutine_threadsafe(send_message, loop=self.bot.loop)
+            await message.edit(content=f"{e.__class__.__name__}: {e}")
+
+    def handle_qlx_command(self, user: discord.User, message: Message, qlx_command: str):
+        discord_interaction = DiscordInteractionChannel(user, message, bridge=self.bot.bridge)
+        try:
+            minqlx.COMMANDS.handle_input(discord_interaction, qlx_command, discord_interaction)
+        except Exception:  # pylint: disable=broad-except
             minqlx.log_exception()
+            raise
 
     @app_commands.describe(command="minqlx ommand to execute on the server")
     async def slash_qlx(self, interaction: Interaction, command: str):
@@ -206,7 +207,7 @@ class AdminCog(Cog):
         await interaction.response.send_message(content=f"executing command `{command}`",
                                                 ephemeral=interaction.channel.guild is not None)
         message = await interaction.original_message()
-        self.execute_qlx_command(interaction.user, message, command)
+        await self.execute_qlx_command(interaction.user, message, command)
 
 
 async def setup(bot: Bot):
@@ -1,6 +1,4 @@
 import asyncio
-import threading
-import time
 from datetime import timedelta
 
 # noinspection PyPackageRequirements
@@ -10,9 +8,10 @@ from discord.utils import utcnow
 # noinspection PyPackageRequirements
 from discord.ext.commands import Bot
 
+import minqlx
 from minqlx import Plugin
 
-import schedule
+CHECK_PLAYING_ACTIVITY_JOB = "event.check_playing_activity"
 
 
 async def create_and_start_event(bot: Bot):
@@ -42,23 +41,20 @@ async def end_event(bot: Bot):
     await asyncio.gather(*end_events)
 
 
-def check_playing_activity(bot: Bot) -> None:
-    players = Plugin.players()
+async def check_playing_activity(bot: Bot) -> None:
+    players = await asyncio.wrap_future(minqlx.run_in_main_thread(Plugin.players))
     if len(players) == 0:
-        asyncio.run_coroutine_threadsafe(end_event(bot), loop=bot.loop)
+        await end_event(bot)
     else:
-        asyncio.run_coroutine_threadsafe(create_and_start_event(bot), loop=bot.loop)
+        await create_and_start_event(bot)
 
 
 async def setup(bot: Bot):
     if not bot.intents.guild_scheduled_events:
         raise ValueError("client needs guild_scheduled_events for this extension")
 
-    schedule.every(1).minute.do(check_playing_activity, bot)
-    threading.Thread(target=run_schedule).start()
+    bot.scheduler.every(60, lambda: check_playing_activity(bot), name=CHECK_PLAYING_ACTIVITY_JOB)
 
 
-def run_schedule():
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+async def teardown(bot: Bot):
+    bot.scheduler.cancel(CHECK_PLAYING_ACTIVITY_JOB)
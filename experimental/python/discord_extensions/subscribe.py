@@ -1,17 +1,13 @@
 import asyncio
-import time
-import threading
 from typing import Optional
 
-import schedule
-
 # noinspection PyPackageRequirements
 from discord import app_commands, Member, Activity, ActivityType, Interaction, Color, Embed, User
 # noinspection PyPackageRequirements
 from discord.ext.commands import Bot, Cog, GroupCog
 
 import minqlx
-from minqlx import Plugin, Player
+from minqlx import Plugin
 from minqlx.database import Redis
 
 DISCORD_MAP_SUBSCRIPTION_KEY = "minqlx:discord:{}:subscribed_maps"
@@ -54,7 +50,9 @@ class SubscriberCog(Cog):
         self.known_players: dict[int, str] = self.gather_known_players()
 
         self.last_notified_map: Optional[str] = None
-        self.notified_steam_ids: list[int] = []
+        self.server_events: Optional[minqlx.ServerEventCursor] = None
+        self.server_events_published: asyncio.Event = asyncio.Event()
+        self.server_events_consumer: Optional[asyncio.Task] = None
 
         if not self.bot.intents.presences:
             self.subscribe_group.remove_command("member")
@@ -63,6 +61,23 @@ class SubscriberCog(Cog):
 
         super().__init__()
 
+    async def cog_load(self) -> None:
+        self.server_events = minqlx.SERVER_EVENTS.cursor()
+        minqlx.SERVER_EVENTS.add_listener(self.wake_up_server_events_consumer)
+        self.server_events_consumer = asyncio.create_task(self.consume_server_events())
+
+        try:
+            game = minqlx.Game()
+            self.last_notified_map = game.map
+        except minqlx.NonexistentGameError:
+            pass
+
+    async def cog_unload(self) -> None:
+        minqlx.SERVER_EVENTS.remove_listener(self.wake_up_server_events_consumer)
+        if self.server_events_consumer is not None:
+            self.server_events_consumer.cancel()
+            self.server_events_consumer = None
+
     def gather_known_players(self) -> dict[int, str]:
         returned = {}
         for key in self.db.keys(LAST_USED_NAME_KEY.format("*")):
@@ -405,10 +420,10 @@ class SubscriberCog(Cog):
 
         await asyncio.gather(*notifications)
 
-    async def notify_player_connected(self, player: Player) -> None:
+    async def notify_player_connected(self, steam_id: int, name: str) -> None:
         notifications = []
         for key in self.db.keys(DISCORD_PLAYER_SUBSCRIPTION_KEY.format("*")):
-            if self.db.sismember(key, player.steam_id):
+            if self.db.sismember(key, steam_id):
                 prefix = DISCORD_PLAYER_SUBSCRIPTION_KEY.split("{", maxsplit=1)[0]
                 suffix = DISCORD_PLAYER_SUBSCRIPTION_KEY.rsplit("}", maxsplit=1)[-1]
                 discord_id = int(key.replace(prefix, "").replace(suffix, ""))
@@ -418,29 +433,29 @@ class SubscriberCog(Cog):
                     continue
 
                 notifications.append(subscribed_discord_user.send(
-                    content=f"`{player.clean_name}`, one of your followed players, "
+                    content=f"`{name}`, one of your followed players, "
                             f"just connected to the server!"))
 
         await asyncio.gather(*notifications)
 
-    async def check_subscriptions(self):
-        notification_actions = []
-        game = None
-        try:
-            game = minqlx.Game()
-        except minqlx.NonexistentGameError:
-            pass
+    def wake_up_server_events_consumer(self, _event: minqlx.ServerEvent) -> None:
+        self.bot.loop.call_soon_threadsafe(self.server_events_published.set)
 
-        if game is not None and game.map != self.last_notified_map:
-            self.last_notified_map = game.map
-            notification_actions.append(self.notify_map_change(self.last_notified_map))
+    async def consume_server_events(self) -> None:
+        while True:
+            await self.server_events_published.wait()
+            self.server_events_published.clear()
+
+            notification_actions = []
+            for event in self.server_events.read():
+                if event.type == "map" and event.data["mapname"] != self.last_notified_map:
+                    self.last_notified_map = event.data["mapname"]
+                    notification_actions.append(self.notify_map_change(self.last_notified_map))
+                elif event.type == "player_connect" and not event.data["is_bot"]:
+                    notification_actions.append(
+                        self.notify_player_connected(event.data["steam_id"], Plugin.clean_text(event.data["name"])))
 
-        players = Plugin.players()
-        new_players = [player for player in players if player.steam_id not in self.notified_steam_ids]
-        for player in new_players:
-            notification_actions.append(self.notify_player_connected(player))
-        self.notified_steam_ids = [player.steam_id for player in players]
-        await asyncio.gather(*notification_actions)
+            await asyncio.gather(*notification_actions)
 
     # noinspection PyMethodMayBeStatic
     def find_relevant_activity(self, member: Member) -> Optional[Activity]:
@@ -480,18 +495,5 @@ class SubscriberCog(Cog):
         await asyncio.gather(*notifications)
 
 
-def check_subscriptions(cog: SubscriberCog) -> None:
-    asyncio.run_coroutine_threadsafe(cog.check_subscriptions(), loop=cog.bot.loop)
-
-
 async def setup(bot: Bot) -> None:
-    subscriber_cog = SubscriberCog(bot, Redis("mydiscordbot"))
-    await bot.add_cog(subscriber_cog)
-    schedule.every(1).minute.do(check_subscriptions, subscriber_cog)
-    threading.Thread(target=run_schedule).start()
-
-
-def run_schedule():
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    await bot.add_cog(SubscriberCog(bot, Redis("mydiscordbot")))
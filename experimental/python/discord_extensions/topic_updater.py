@@ -1,5 +1,5 @@
-import threading
 import asyncio
+import time
 from ast import literal_eval
 from typing import Optional
 
@@ -8,51 +8,10 @@ from discord import TextChannel
 # noinspection PyPackageRequirements
 from discord.ext.commands import Cog, Bot
 
-import minqlx
-from minqlx import Plugin
+from minqlx import Plugin, get_logger
 
 
-def get_game_info(game: minqlx.Game) -> str:
-    """
-    Helper to format the current ```game.state``` that may be used in status messages and setting of channel topics.
-
-    :param: game: the game object to derive the information from
-
-    :return: the current text representation of the game state
-    """
-    if game.state == "warmup":
-        return "Warmup"
-    if game.state == "countdown":
-        return "Match starting"
-    if game.roundlimit in [game.blue_score, game.red_score] or game.red_score < 0 or game.blue_score < 0:
-        return f"Match ended: **{game.red_score}** - **{game.blue_score}**"
-    if game.state == "in_progress":
-        return f"Match in progress: **{game.red_score}** - **{game.blue_score}**"
-
-    return "Warmup"
-
-
-def game_status_information(game: minqlx.Game) -> str:
-    """
-    Generate the text for the topic set on discord channels.
-
-    :param: game: the game to derive the status information from
-
-    :return: the topic that represents the current game state.
-    """
-    ginfo = get_game_info(game)
-
-    num_players = len(Plugin.players())
-    max_players = game.maxclients
-
-    maptitle = game.map_title if game.map_title else game.map
-    gametype = game.type_short.upper()
-
-    # CAUTION: if you change anything on the next line, you may need to change the topic_ending logic in
-    #          :func:`TopicUpdater.update_topic_on_triggered_channels(self, topic)` to keep the right portion
-    #          of the triggered relay channels' topics!
-    return f"{ginfo} on **{Plugin.clean_text(maptitle)}** ({gametype}) " \
-           f"with **{num_players}/{max_players}** players. "
+REFRESH_TOPIC_JOB = "topic_updater.refresh_topic"
 
 
 def int_set(string_set: set[str]) -> set[int]:
@@ -69,21 +28,33 @@ def int_set(string_set: set[str]) -> set[int]:
 
 class TopicUpdater(Cog):
     """
+    Updates the topics of the relay and triggered channels with the current game status.
+
+    Topic updates are triggered by game events changing the shared game status, i.e. map changes, score changes, and
+    players connecting or disconnecting. Bursts of events are debounced, channel topics are only edited when the
+    resulting topic differs from the last one applied, and edits towards a channel are spaced by the configured interval
+    to stay within discord's rate limits for topic edits.
+
     Uses:
     * qlx_discordUpdateTopicOnTriggeredChannels (default: "1") Boolean flag to indicate whether to update the topic with
     the current game state on triggered relay channels. Your bot needs edit_channel permission for these channels.
     * qlx_discordKeepTopicSuffixChannelIds (default: "") Comma separated list of channel ids where the topic suffix
     will be kept upon updating.
-    * qlx_discordUpdateTopicInterval (default: 305) Amount of seconds between automatic topic updates
+    * qlx_discordUpdateTopicInterval (default: 305) Minimum amount of seconds between topic updates. The topic is also
+    refreshed after this interval when no game events changed it in the meantime.
+    * qlx_discordUpdateTopicDebounce (default: 5) Amount of seconds to wait for further game events before updating
+    the topic
     * qlx_discordKeptTopicSuffixes (default: {}) A dictionary of channel_ids for kept topic suffixes and the related
     suffixes. Make sure to use single quotes for the suffixes.
     """
     def __init__(self, bot: Bot):
         self.bot = bot
+        self.logger = get_logger("mydiscordbot")
 
         Plugin.set_cvar_once("qlx_discordUpdateTopicOnTriggeredChannels", "1")
         Plugin.set_cvar_once("qlx_discordKeepTopicSuffixChannelIds", "")
         Plugin.set_cvar_once("qlx_discordUpdateTopicInterval", "305")
+        Plugin.set_cvar_once("qlx_discordUpdateTopicDebounce", "5")
         Plugin.set_cvar_once("qlx_discordKeptTopicSuffixes", "{}")
 
         self.discord_relay_channel_ids: set[int] = int_set(Plugin.get_cvar("qlx_discordRelayChannelIds", set))
@@ -92,49 +63,83 @@ class TopicUpdater(Cog):
         self.discord_update_triggered_channels_topic: bool = \
             Plugin.get_cvar("qlx_discordUpdateTopicOnTriggeredChannels", bool)
         self.discord_topic_update_interval: int = Plugin.get_cvar("qlx_discordUpdateTopicInterval", int)
+        self.discord_topic_update_debounce: float = Plugin.get_cvar("qlx_discordUpdateTopicDebounce", float)
         self.discord_keep_topic_suffix_channel_ids: set[int] = \
             int_set(Plugin.get_cvar("qlx_discordKeepTopicSuffixChannelIds", set))
         self.discord_kept_topic_suffixes: dict[int, str] = \
             literal_eval(Plugin.get_cvar("qlx_discordKeptTopicSuffixes", str))
 
+        self.update_requested: bool = False
+        self.applied_topics: dict[int, str] = {}
+        self.pending_topics: dict[int, str] = {}
+        self.last_topic_edits: dict[int, float] = {}
+
         super().__init__()
 
     async def cog_load(self):
-        self._topic_updater()
+        self.bot.game_status.add_listener(self.handle_game_status_invalidated)
 
-    def _topic_updater(self) -> None:
-        try:
-            game = minqlx.Game()
-            topic = game_status_information(game)
-            self.update_topics_on_relay_and_triggered_channels(topic)
-        except minqlx.NonexistentGameError:
-            pass
-        finally:
-            threading.Timer(self.discord_topic_update_interval, self._topic_updater).start()
-
-    def update_topics_on_relay_and_triggered_channels(self, topic: str) -> None:
-        """
-        Helper function to update the topics on all the relay and all the triggered channels
+        self.bot.scheduler.every(self.discord_topic_update_interval, self.request_topic_update,
+                                 name=REFRESH_TOPIC_JOB)
+        self.request_topic_update()
 
-        :param: topic: the topic to set on all the channels
+    async def cog_unload(self):
+        self.bot.game_status.remove_listener(self.handle_game_status_invalidated)
+
+        self.bot.scheduler.cancel(REFRESH_TOPIC_JOB)
+
+    def handle_game_status_invalidated(self, formats: tuple[str, ...]) -> None:
+        if "topic" not in formats:
+            return
+
+        self.request_topic_update()
+
+    def request_topic_update(self) -> None:
         """
+        Requests a topic update on the bot's event loop. Further requests until the topic is recomputed are merged into
+        the pending one. This may be called from any thread.
+        """
+        if self.update_requested:
+            return
+        self.update_requested = True
+
+        self.bot.bridge.submit(self.debounced_topic_update)
+
+    async def debounced_topic_update(self) -> None:
+        await asyncio.sleep(self.discord_topic_update_debounce)
+        # game events from now on need another topic update
+        self.update_requested = False
+
         if not self.is_discord_logged_in():
             return
 
+        status = await self.bot.game_status.current("topic")
+        if status is None:
+            return
+        # channels already showing the topic are skipped per channel, so failed edits are retried with this update
+        await self.update_topics_on_relay_and_triggered_channels(status)
+
+    async def update_topics_on_relay_and_triggered_channels(self, topic: str) -> None:
+        """
+        Helper function to update the topics on all the relay and all the triggered channels
+
+        :param: topic: the topic to set on all the channels
+        """
         if self.discord_update_triggered_channels_topic:
             topic_channel_ids = self.discord_relay_channel_ids | self.discord_triggered_channel_ids
         else:
             topic_channel_ids = self.discord_relay_channel_ids
 
         # directly set the topic on channels with no topic suffix
-        self.set_topic_on_discord_channels(topic_channel_ids - self.discord_keep_topic_suffix_channel_ids, topic)
+        await self.set_topic_on_discord_channels(topic_channel_ids - self.discord_keep_topic_suffix_channel_ids, topic)
         # keep the topic suffix on the channels that are configured accordingly
-        self.update_topic_on_channels_and_keep_channel_suffix(
+        await self.update_topic_on_channels_and_keep_channel_suffix(
             topic_channel_ids & self.discord_keep_topic_suffix_channel_ids, topic)
 
-    def set_topic_on_discord_channels(self, channel_ids: set[int], topic: str) -> None:
+    async def set_topic_on_discord_channels(self, channel_ids: set[int], topic: str) -> None:
         """
-        Set the topic on a set of channel_ids on discord provided.
+        Set the topic on a set of channel_ids on discord provided. Channels that already show the topic are skipped,
+        and edits are spaced by the configured topic update interval per channel.
 
         :param: channel_ids: the ids of the channels the topic should be set upon.
         :param: topic: the new topic that should be set.
@@ -143,14 +148,37 @@ class TopicUpdater(Cog):
         if not channel_ids or len(channel_ids) == 0:
             return
 
-        # set the topic in its own thread to avoid blocking of the server
-        for channel_id in channel_ids:
-            channel: Optional[TextChannel] = self.bot.get_channel(channel_id)
+        await asyncio.gather(*[self.set_topic_on_discord_channel(channel_id, topic) for channel_id in channel_ids])
 
-            if channel is None:
-                continue
+    async def set_topic_on_discord_channel(self, channel_id: int, topic: str) -> None:
+        if channel_id in self.pending_topics:
+            # an edit is already waiting for the channel's rate limit, let it pick up the newer topic
+            self.pending_topics[channel_id] = topic
+            return
+
+        remaining = self.last_topic_edits.get(channel_id, 0.0) + self.discord_topic_update_interval - time.monotonic()
+        if remaining > 0:
+            self.pending_topics[channel_id] = topic
+            await asyncio.sleep(remaining)
+            topic = self.pending_topics.pop(channel_id)
+
+        if self.applied_topics.get(channel_id) == topic:
+            return
+
+        channel: Optional[TextChannel] = self.bot.get_channel(channel_id)
+
+        if channel is None:
+            return
+
+        try:
+            await channel.edit(topic=topic)
+        except Exception as e:  # pylint: disable=broad-except
+            # leave the bookkeeping untouched, so the next update retries the topic on the channel
+            self.logger.error(f"Setting the topic on discord channel {channel_id} failed: {e}")
+            return
 
-            asyncio.run_coroutine_threadsafe(channel.edit(topic=topic), loop=self.bot.loop)
+        self.applied_topics[channel_id] = topic
+        self.last_topic_edits[channel_id] = time.monotonic()
 
     def is_discord_logged_in(self) -> bool:
         if self.bot is None:
@@ -158,7 +186,7 @@ class TopicUpdater(Cog):
 
         return not self.bot.is_closed() and self.bot.is_ready()
 
-    def update_topic_on_channels_and_keep_channel_suffix(self, channel_ids: set[int], topic: str) -> None:
+    async def update_topic_on_channels_and_keep_channel_suffix(self, channel_ids: set[int], topic: str) -> None:
         """
         Updates the topic on the given channels and keeps the topic suffix intact on the configured channels
 
@@ -172,6 +200,7 @@ class TopicUpdater(Cog):
         # take the final 10 characters from the topic, and search for it in the current topic
         topic_ending = topic[-10:]
 
+        topic_updates = []
         for channel_id in channel_ids:
             previous_topic = self.get_channel_topic(channel_id)
 
@@ -186,7 +215,9 @@ class TopicUpdater(Cog):
                 topic_suffix = self.discord_kept_topic_suffixes[channel_id]
 
             # update the topic on the triggered channels
-            self.set_topic_on_discord_channels({channel_id}, f"{topic}{topic_suffix}")
+            topic_updates.append(self.set_topic_on_discord_channel(channel_id, f"{topic}{topic_suffix}"))
+
+        await asyncio.gather(*topic_updates)
 
     def get_channel_topic(self, channel_id: int) -> Optional[str]:
         """
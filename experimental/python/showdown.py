@@ -21,6 +21,7 @@ class showdown(minqlx.Plugin):
 
         self.add_hook("death", self.handle_death)
         self.add_hook("team_switch", self.handle_switch)
+        self.add_hook("last_standing", self.handle_last_standing)
         self.add_hook("round_start", self.handle_round_start)
         self.add_hook("round_end", self.handle_round_end)
 
@@ -52,38 +53,51 @@ class showdown(minqlx.Plugin):
         if _old not in ["blue", "red"] and _new not in ["spectator", "free"]:
             return
 
+        # Switches leaving a team with its last player are reported through last_standing.
+        if self.last_standing_steam_id is None:
+            return
+
         self.detect()
 
-    def detect(self):
-        if self.game is None or self.game.type_short != "ca":
+    def handle_last_standing(self, _player):
+        if self.last_standing_steam_id is not None:
             return
 
-        if self.game.state != "in_progress":
-            return
+        self.detect()
 
+    def detect(self):
         if self.between_rounds:
             return
 
-        if self.game.roundlimit in [self.game.blue_score, self.game.red_score]:
+        if self.showdown_skipped_this_round:
             return
 
-        if self.showdown_skipped_this_round:
+        amount_alive_red = minqlx.ALIVE_PLAYERS.alive_count("red")
+        amount_alive_blue = minqlx.ALIVE_PLAYERS.alive_count("blue")
+
+        if amount_alive_red == 0 or amount_alive_blue == 0:
             return
 
-        teams = self.teams()
+        if amount_alive_red != 1 and amount_alive_blue != 1:
+            return
 
-        if len(teams["red"]) < self.vote_showdown_teamsize or len(teams["blue"]) < self.vote_showdown_teamsize:
+        if self.game is None or self.game.type_short != "ca":
             return
 
-        alive_r = self.alive_players(teams["red"])
-        alive_b = self.alive_players(teams["blue"])
+        if self.game.state != "in_progress":
+            return
 
-        if not alive_r or not alive_b:
+        if self.game.roundlimit in [self.game.blue_score, self.game.red_score]:
             return
 
-        if len(alive_r) != 1 and len(alive_b) != 1:
+        teams = self.teams()
+
+        if len(teams["red"]) < self.vote_showdown_teamsize or len(teams["blue"]) < self.vote_showdown_teamsize:
             return
 
+        alive_r = minqlx.ALIVE_PLAYERS.alive_players("red")
+        alive_b = minqlx.ALIVE_PLAYERS.alive_players("blue")
+
         if self.last_standing_time is None:
             self.last_standing_time = time.time()
             self.last_standing_steam_id = alive_r[0].steam_id if len(alive_r) == 1 else alive_b[0].steam_id
@@ -148,17 +162,13 @@ class showdown(minqlx.Plugin):
         if self.last_standing_steam_id is None:
             return False
 
-        teams = self.teams()
         showdown_player = self.player(self.last_standing_steam_id)
 
         other_team = self.other_team(showdown_player.team)
         if other_team is None:
             return False
 
-        larger_team = teams[other_team]
-        alive_opponents = self.alive_players(larger_team)
-
-        if len(alive_opponents) < self.min_opp:
+        if minqlx.ALIVE_PLAYERS.alive_count(other_team) < self.min_opp:
             return False
 
         if showdown_player.health < 100:
@@ -166,9 +176,6 @@ class showdown(minqlx.Plugin):
 
         return True
 
-    def alive_players(self, players):
-        return [player for player in players if player.is_alive]
-
     def should_reactivate_normal_game(self, alive_r, alive_b):
         if not self.showdown_activated:
             return False
@@ -358,6 +365,10 @@ class showdown(minqlx.Plugin):
         return None
 
     def handle_death(self, victim, killer, data):
+        # Deaths leaving a team with its last player are reported through last_standing.
+        if self.last_standing_steam_id is None:
+            return
+
         self.detect()
 
     def handle_round_start(self, round_number):
@@ -498,9 +509,8 @@ class showdown(minqlx.Plugin):
         self.showdown_votes = None
 
     def weapon_showdown(self, preselected_weapon=None):
-        teams = self.teams()
-        alive_r = self.alive_players(teams["red"])
-        alive_b = self.alive_players(teams["blue"])
+        alive_r = minqlx.ALIVE_PLAYERS.alive_players("red")
+        alive_b = minqlx.ALIVE_PLAYERS.alive_players("blue")
 
         if len(alive_r) < 1 or len(alive_b) < 1:
             return
@@ -24,13 +24,6 @@ def color_format_team(team: str) -> str:
     return team
 
 
-def damage_this_round(damages: dict[SteamId, int], steam_id: int):
-    if steam_id not in damages:
-        return 0
-
-    return damages[steam_id]
-
-
 # noinspection PyPep8Naming
 class spec_rotation(minqlx.Plugin):
     def __init__(self):
@@ -45,10 +38,8 @@ class spec_rotation(minqlx.Plugin):
         self.add_hook("game_countdown", self.handle_game_countdown)
         self.add_hook("game_start", self.handle_game_start)
         self.add_hook("round_countdown", self.handle_round_countdown)
-        self.add_hook("round_start", self.handle_round_start)
         self.add_hook("round_end", self.handle_round_end)
 
-        self.stats_snapshot: dict[SteamId, int] = {}
         self.scheduled_switches: list[SteamId] = []
         self.spec_rotation: list[SteamId] = []
         self.team_score_snapshots: dict[SteamId, int] = {}
@@ -58,7 +49,6 @@ class spec_rotation(minqlx.Plugin):
 
     def handle_map_change(self, _mapname: str, _factory: str) -> None:
         self.in_countdown = False
-        self.stats_snapshot = {}
         self.scheduled_switches = []
         self.spec_rotation = []
         self.team_score_snapshots = {}
@@ -272,10 +262,6 @@ class spec_rotation(minqlx.Plugin):
 
         return int(self.db[completed_key])
 
-    def handle_round_start(self, _round_number: int) -> None:
-        teams = self.teams()
-        self.stats_snapshot = {player.steam_id: player.stats.damage_dealt for player in teams["red"] + teams["blue"]}
-
     def handle_round_end(self, data: dict) -> None:
         if not self.spec_rotation_plugin_is_enabled():
             return
@@ -308,7 +294,7 @@ class spec_rotation(minqlx.Plugin):
         if len(self.spec_rotation) == 0:
             return
 
-        if len(self.stats_snapshot) == 0 and data["ROUND"] > 1:
+        if minqlx.ROUND_STATS.current_round() is None and data["ROUND"] > 1:
             return
 
         winning_team = data['TEAM_WON'].lower()
@@ -359,26 +345,11 @@ class spec_rotation(minqlx.Plugin):
             if player and len(player.name) != 0:
                 self.msg(f"Place ^3{place}.^7 {player.name} ^7(Wins:^2{score}^7)")
 
-    def calculate_damage_deltas(self) -> dict[SteamId, int]:
-        returned = {}
-
-        for steam_id in self.stats_snapshot:
-            minqlx_player = self.player(steam_id)
-
-            if minqlx_player is None:
-                continue
-
-            returned[steam_id] = minqlx_player.stats.damage_dealt - self.stats_snapshot[steam_id]
-
-        return returned
-
     def player_to_replace(self, losing_team: str) -> Player:
-        round_damage = self.calculate_damage_deltas()
-
         teams = self.teams()
 
         losing_steam_ids = teams[losing_team]
 
-        losing_steam_ids.sort(key=lambda player: damage_this_round(round_damage, player.steam_id))
+        losing_steam_ids.sort(key=lambda player: minqlx.ROUND_STATS.damage_this_round(player.steam_id))
 
         return losing_steam_ids[0]
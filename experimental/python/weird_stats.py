@@ -173,7 +173,32 @@ class Weapons(NamedTuple):
     other: WeaponStats
 
 
+SUMMED_STATS = ("BLUE_FLAG_PICKUPS", "DEATHS", "HOLY_SHITS", "KILLS", "LOSE", "NEUTRAL_FLAG_PICKUPS", "PLAY_TIME",
+                "QUIT", "RED_FLAG_PICKUPS", "SCORE", "WIN")
+DAMAGE_STATS = ("DEALT", "TAKEN")
+MEDAL_STATS = ("ACCURACY", "ASSISTS", "CAPTURES", "COMBOKILL", "DEFENDS", "EXCELLENT", "FIRSTFRAG", "HEADSHOT",
+               "HUMILIATION", "IMPRESSIVE", "MIDAIR", "PERFECT", "PERFORATED", "QUADGOD", "RAMPAGE", "REVENGE")
+PICKUP_STATS = ("AMMO", "ARMOR", "ARMOR_REGEN", "BATTLESUIT", "DOUBLER", "FLIGHT", "GREEN_ARMOR", "GUARD", "HASTE",
+                "HEALTH", "INVIS", "INVULNERABILITY", "KAMIKAZE", "MEDKIT", "MEGA_HEALTH", "OTHER_HOLDABLE",
+                "OTHER_POWERUP", "PORTAL", "QUAD", "RED_ARMOR", "REGEN", "SCOUT", "TELEPORTER", "YELLOW_ARMOR")
+WEAPON_NAMES = ("MACHINEGUN", "SHOTGUN", "GRENADE", "ROCKET", "LIGHTNING", "RAILGUN", "PLASMA", "HMG", "BFG",
+                "GAUNTLET", "NAILGUN", "PROXMINE", "CHAINGUN", "OTHER_WEAPON")
+WEAPON_STATS = ("D", "DG", "DR", "H", "K", "P", "S", "T")
+
+
+def sum_stats_into(totals: list[int], offset: int, data: dict[str, int], keys: tuple[str, ...]) -> None:
+    for index, key in enumerate(keys, start=offset):
+        totals[index] += data.get(key, 0)
+
+
 class PlayerStatsEntry:
+    """The stats of a player in a match, combined from all the PLAYER_STATS messages of the player.
+
+    Combined stats are folded into flat lists of totals in the fixed order of the *_STATS and WEAPON_NAMES tuples,
+    and the totals read by the announcers are precomputed on every combination, so reading them is free."""
+    __slots__ = ("steam_id", "match_guid", "warmup", "model", "name", "aborted", "max_streak", "sums", "damage_totals",
+                 "medal_totals", "pickup_totals", "weapon_totals", "damage", "medals", "pickups", "weapons")
+
     def __init__(self, stats_data: dict[str, Any]):
         if "TYPE" not in stats_data:
             raise ValueError("Unknown stats_data")
@@ -184,265 +209,95 @@ class PlayerStatsEntry:
         if "DATA" not in stats_data:
             raise ValueError("stats contain no data")
 
-        self.stats_data = [stats_data]
+        self.aborted: bool = False
+        self.max_streak: int = 0
+        self.sums: list[int] = [0] * len(SUMMED_STATS)
+        self.damage_totals: list[int] = [0] * len(DAMAGE_STATS)
+        self.medal_totals: list[int] = [0] * len(MEDAL_STATS)
+        self.pickup_totals: list[int] = [0] * len(PICKUP_STATS)
+        self.weapon_totals: list[int] = [0] * (len(WEAPON_NAMES) * len(WEAPON_STATS))
 
-    def __repr__(self) -> str:
-        return f"{self.stats_data}"
+        self.fold(stats_data["DATA"])
 
-    @property
-    def steam_id(self) -> SteamId:
-        return int(self.stats_data[-1]["DATA"].get("STEAM_ID", "-1"))
-
-    @property
-    def aborted(self) -> bool:
-        for stats_entry in self.stats_data:
-            if "ABORTED" in stats_entry["DATA"] and stats_entry["DATA"].get("ABORTED", False):
-                return True
-
-        return False
+    def __repr__(self) -> str:
+        return f"PlayerStatsEntry({self.steam_id}, {self.name}, {self.match_guid})"
+
+    def fold(self, data: dict[str, Any]) -> None:
+        self.steam_id: SteamId = int(data.get("STEAM_ID", "-1"))
+        self.match_guid: str = data.get("MATCH_GUID", "")
+        self.warmup: bool = data.get("WARMUP", False)
+        self.model: str = data.get("MODEL", "")
+        self.name: str = data.get("NAME", "")
+        self.aborted = self.aborted or bool(data.get("ABORTED", False))
+        self.max_streak = max(self.max_streak, data.get("MAX_STREAK", 0))
+
+        sum_stats_into(self.sums, 0, data, SUMMED_STATS)
+        if "DAMAGE" in data:
+            sum_stats_into(self.damage_totals, 0, data["DAMAGE"], DAMAGE_STATS)
+        if "MEDALS" in data:
+            sum_stats_into(self.medal_totals, 0, data["MEDALS"], MEDAL_STATS)
+        if "PICKUPS" in data:
+            sum_stats_into(self.pickup_totals, 0, data["PICKUPS"], PICKUP_STATS)
+        if "WEAPONS" in data:
+            for weapon_index, weapon_name in enumerate(WEAPON_NAMES):
+                if weapon_name not in data["WEAPONS"]:
+                    continue
+                sum_stats_into(self.weapon_totals, weapon_index * len(WEAPON_STATS), data["WEAPONS"][weapon_name],
+                               WEAPON_STATS)
 
-    def _sum_entries(self, entry: str) -> int:
-        returned = 0
-        for stats_entry in self.stats_data:
-            if "DATA" not in stats_entry:
-                continue
+        self.build_totals()
 
-            returned += stats_entry["DATA"].get(entry, 0)
-
-        return returned
+    def build_totals(self) -> None:
+        self.damage: Damage = Damage(*self.damage_totals)
+        self.medals: Medals = Medals(*self.medal_totals)
+        self.pickups: Pickups = Pickups(*self.pickup_totals)
+        self.weapons: Weapons = Weapons(*[
+            WeaponStats(weapon_name, *self.weapon_totals[index * len(WEAPON_STATS):(index + 1) * len(WEAPON_STATS)])
+            for index, weapon_name in enumerate(WEAPON_NAMES)])
 
     @property
     def blue_flag_pickups(self) -> int:
-        return self._sum_entries("BLUE_FLAG_PICKUPS")
-
-    @property
-    def damage(self) -> Damage:
-        returned = Damage(0, 0)
-        for stats_entry in self.stats_data:
-            if "DAMAGE" not in stats_entry["DATA"]:
-                continue
-
-            damage_entry = Damage(stats_entry["DATA"]["DAMAGE"].get("DEALT", 0),
-                                  stats_entry["DATA"]["DAMAGE"].get("TAKEN", 0))
-            returned = Damage(returned.dealt + damage_entry.dealt,
-                              returned.taken + damage_entry.taken)
-
-        return returned
+        return self.sums[0]
 
     @property
     def deaths(self) -> int:
-        return self._sum_entries("DEATHS")
+        return self.sums[1]
 
     @property
     def holy_shits(self) -> int:
-        return self._sum_entries("HOLY_SHITS")
+        return self.sums[2]
 
     @property
     def kills(self) -> int:
-        return self._sum_entries("KILLS")
+        return self.sums[3]
 
     @property
     def lose(self) -> int:
-        return self._sum_entries("LOSE")
-
-    @property
-    def match_guid(self) -> int:
-        return self.stats_data[-1]["DATA"].get("MATCH_GUID", "")
-
-    @property
-    def max_streak(self) -> int:
-        max_streaks = [stats_entry["DATA"].get("MAX_STREAK", 0) for stats_entry in self.stats_data]
-        return max(max_streaks)
-
-    @property
-    def medals(self) -> Medals:
-        returned = Medals(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
-        for stats_entry in self.stats_data:
-            if "MEDALS" not in stats_entry["DATA"]:
-                continue
-
-            medal_entry = Medals(stats_entry["DATA"]["MEDALS"].get("ACCURACY", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("ASSISTS", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("CAPTURES", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("COMBOKILL", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("DEFENDS", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("EXCELLENT", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("FIRSTFRAG", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("HEADSHOT", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("HUMILIATION", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("IMPRESSIVE", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("MIDAIR", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("PERFECT", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("PERFORATED", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("QUADGOD", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("RAMPAGE", 0),
-                                 stats_entry["DATA"]["MEDALS"].get("REVENGE", 0))
-
-            returned = Medals(
-                returned.accuracy + medal_entry.accuracy,
-                returned.assists + medal_entry.assists,
-                returned.captures + medal_entry.captures,
-                returned.combokill + medal_entry.combokill,
-                returned.defends + medal_entry.defends,
-                returned.excellent + medal_entry.excellent,
-                returned.firstfrag + medal_entry.firstfrag,
-                returned.headshot + medal_entry.headshot,
-                returned.humiliation + medal_entry.humiliation,
-                returned.impressive + medal_entry.impressive,
-                returned.midair + medal_entry.midair,
-                returned.perfect + medal_entry.perfect,
-                returned.perforated + medal_entry.perforated,
-                returned.quadgod + medal_entry.quadgod,
-                returned.rampage + medal_entry.rampage,
-                returned.revenge + medal_entry.revenge)
-
-        return returned
-
-    @property
-    def model(self) -> str:
-        return self.stats_data[-1]["DATA"].get("MODEL", "")
-
-    @property
-    def name(self) -> str:
-        return self.stats_data[-1]["DATA"].get("NAME", "")
+        return self.sums[4]
 
     @property
     def neutral_flag_pickups(self) -> int:
-        return self._sum_entries("NEUTRAL_FLAG_PICKUPS")
-
-    @property
-    def pickups(self) -> Pickups:
-        returned = Pickups(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
-        for stats_entry in self.stats_data:
-            if "PICKUPS" not in stats_entry["DATA"]:
-                continue
-
-            pickup_entry = Pickups(
-                stats_entry["DATA"]["PICKUPS"].get("AMMO", 0),
-                stats_entry["DATA"]["PICKUPS"].get("ARMOR", 0),
-                stats_entry["DATA"]["PICKUPS"].get("ARMOR_REGEN", 0),
-                stats_entry["DATA"]["PICKUPS"].get("BATTLESUIT", 0),
-                stats_entry["DATA"]["PICKUPS"].get("DOUBLER", 0),
-                stats_entry["DATA"]["PICKUPS"].get("FLIGHT", 0),
-                stats_entry["DATA"]["PICKUPS"].get("GREEN_ARMOR", 0),
-                stats_entry["DATA"]["PICKUPS"].get("GUARD", 0),
-                stats_entry["DATA"]["PICKUPS"].get("HASTE", 0),
-                stats_entry["DATA"]["PICKUPS"].get("HEALTH", 0),
-                stats_entry["DATA"]["PICKUPS"].get("INVIS", 0),
-                stats_entry["DATA"]["PICKUPS"].get("INVULNERABILITY", 0),
-                stats_entry["DATA"]["PICKUPS"].get("KAMIKAZE", 0),
-                stats_entry["DATA"]["PICKUPS"].get("MEDKIT", 0),
-                stats_entry["DATA"]["PICKUPS"].get("MEGA_HEALTH", 0),
-                stats_entry["DATA"]["PICKUPS"].get("OTHER_HOLDABLE", 0),
-                stats_entry["DATA"]["PICKUPS"].get("OTHER_POWERUP", 0),
-                stats_entry["DATA"]["PICKUPS"].get("PORTAL", 0),
-                stats_entry["DATA"]["PICKUPS"].get("QUAD", 0),
-                stats_entry["DATA"]["PICKUPS"].get("RED_ARMOR", 0),
-                stats_entry["DATA"]["PICKUPS"].get("REGEN", 0),
-                stats_entry["DATA"]["PICKUPS"].get("SCOUT", 0),
-                stats_entry["DATA"]["PICKUPS"].get("TELEPORTER", 0),
-                stats_entry["DATA"]["PICKUPS"].get("YELLOW_ARMOR", 0))
-
-            returned = Pickups(
-                returned.ammo + pickup_entry.ammo,
-                returned.armor + pickup_entry.armor,
-                returned.armor_regen + pickup_entry.armor_regen,
-                returned.battlesuit + pickup_entry.battlesuit,
-                returned.doubler + pickup_entry.doubler,
-                returned.flight + pickup_entry.flight,
-                returned.green_armor + pickup_entry.green_armor,
-                returned.guard + pickup_entry.guard,
-                returned.haste + pickup_entry.haste,
-                returned.health + pickup_entry.health,
-                returned.invisibility + pickup_entry.invisibility,
-                returned.invulnerability + pickup_entry.invulnerability,
-                returned.kamikaze + pickup_entry.kamikaze,
-                returned.medkit + pickup_entry.medkit,
-                returned.mega_health + pickup_entry.mega_health,
-                returned.other_holdable + pickup_entry.other_holdable,
-                returned.other_powerup + pickup_entry.other_powerup,
-                returned.portal + pickup_entry.portal,
-                returned.quad + pickup_entry.quad,
-                returned.red_armor + pickup_entry.red_armor,
-                returned.regeneration + pickup_entry.regeneration,
-                returned.scout + pickup_entry.scout,
-                returned.teleporter + pickup_entry.teleporter,
-                returned.yellow_armor + pickup_entry.yellow_armor)
-
-        return returned
+        return self.sums[5]
 
     @property
     def play_time(self) -> int:
-        return self._sum_entries("PLAY_TIME")
+        return self.sums[6]
 
     @property
     def quit(self) -> int:
-        return self._sum_entries("QUIT")
+        return self.sums[7]
 
     @property
     def red_flag_pickups(self) -> int:
-        return self._sum_entries("RED_FLAG_PICKUPS")
+        return self.sums[8]
 
     @property
     def score(self) -> int:
-        return self._sum_entries("SCORE")
-
-    @property
-    def warmup(self) -> bool:
-        return self.stats_data[-1]["DATA"].get("WARMUP", False)
-
-    @property
-    def weapons(self) -> Weapons:
-        return Weapons(
-            self._sum_weapon("MACHINEGUN"),
-            self._sum_weapon("SHOTGUN"),
-            self._sum_weapon("GRENADE"),
-            self._sum_weapon("ROCKET"),
-            self._sum_weapon("LIGHTNING"),
-            self._sum_weapon("RAILGUN"),
-            self._sum_weapon("PLASMA"),
-            self._sum_weapon("HMG"),
-            self._sum_weapon("BFG"),
-            self._sum_weapon("GAUNTLET"),
-            self._sum_weapon("NAILGUN"),
-            self._sum_weapon("PROXMINE"),
-            self._sum_weapon("CHAINGUN"),
-            self._sum_weapon("OTHER_WEAPON"))
-
-    def _sum_weapon(self, weapon_name: str) -> WeaponStats:
-        returned = WeaponStats(weapon_name, 0, 0, 0, 0, 0, 0, 0, 0)
-        for stats_entry in self.stats_data:
-            if "WEAPONS" not in stats_entry["DATA"]:
-                continue
-
-            if weapon_name not in stats_entry["DATA"]["WEAPONS"]:
-                continue
-
-            weapon_entry = WeaponStats(weapon_name,
-                                       stats_entry["DATA"]["WEAPONS"][weapon_name].get("D", 0),
-                                       stats_entry["DATA"]["WEAPONS"][weapon_name].get("DG", 0),
-                                       stats_entry["DATA"]["WEAPONS"][weapon_name].get("DR", 0),
-                                       stats_entry["DATA"]["WEAPONS"][weapon_name].get("H", 0),
-                                       stats_entry["DATA"]["WEAPONS"][weapon_name].get("K", 0),
-                                       stats_entry["DATA"]["WEAPONS"][weapon_name].get("P", 0),
-                                       stats_entry["DATA"]["WEAPONS"][weapon_name].get("S", 0),
-                                       stats_entry["DATA"]["WEAPONS"][weapon_name].get("T", 0))
-
-            returned = WeaponStats(weapon_name,
-                                   returned.deaths + weapon_entry.deaths,
-                                   returned.damage_dealt + weapon_entry.damage_dealt,
-                                   returned.damage_taken + weapon_entry.damage_taken,
-                                   returned.hits + weapon_entry.hits,
-                                   returned.kills + weapon_entry.kills,
-                                   returned.pickups + weapon_entry.pickups,
-                                   returned.shots + weapon_entry.shots,
-                                   returned.time + weapon_entry.time)
-
-        return returned
+        return self.sums[9]
 
     @property
     def win(self) -> int:
-        return self._sum_entries("WIN")
+        return self.sums[10]
 
     def combine(self, other: object) -> None:
         if not isinstance(other, PlayerStatsEntry):
@@ -457,8 +312,22 @@ class PlayerStatsEntry:
         if other.steam_id != self.steam_id:
             raise ValueError("Cannot combine stats for two different players")
 
-        for stats_entry in other.stats_data:
-            self.stats_data.append(stats_entry)
+        self.steam_id = other.steam_id
+        self.match_guid = other.match_guid
+        self.warmup = other.warmup
+        self.model = other.model
+        self.name = other.name
+        self.aborted = self.aborted or other.aborted
+        self.max_streak = max(self.max_streak, other.max_streak)
+
+        for totals, other_totals in ((self.sums, other.sums), (self.damage_totals, other.damage_totals),
+                                     (self.medal_totals, other.medal_totals),
+                                     (self.pickup_totals, other.pickup_totals),
+                                     (self.weapon_totals, other.weapon_totals)):
+            for index, value in enumerate(other_totals):
+                totals[index] += value
+
+        self.build_totals()
 
 
 def filter_stats_for_max_value(stats: list[PlayerStatsEntry], func: Callable[[PlayerStatsEntry], Any]) \
@@ -1048,6 +917,7 @@ class weird_stats(Plugin):
         self.travelled_distances: dict[SteamId, float] = {}
 
         self.player_stats: dict[SteamId, PlayerStatsEntry] = {}
+        self.missing_player_stats: set[SteamId] = set()
         self.playerstats_announcements: list[Callable[[list[PlayerStatsEntry]], Optional[str]]] = \
             [most_accurate_railbitches_announcement, longest_shaftlamers_announcement,
              most_honorable_haste_pickup_announcement, weird_facts]
@@ -1132,6 +1002,7 @@ class weird_stats(Plugin):
         self.match_end_announced = False
         self.round_start_datetime = None
         self.player_stats = {}
+        self.missing_player_stats = set()
         self.previous_positions = {}
         self.travelled_distances = {}
 
@@ -1208,6 +1079,8 @@ class weird_stats(Plugin):
                 (datetime.now() - self.join_times[player.steam_id]).total_seconds() + \
                 self.play_times.get(player.steam_id, 0.0)
 
+        self.missing_player_stats = \
+            {player.steam_id for player in teams["red"] + teams["blue"]} - self.player_stats.keys()
         self.announce_match_end_stats()
 
     def handle_stats(self, stats: dict) -> None:
@@ -1223,6 +1096,7 @@ class weird_stats(Plugin):
             self.player_stats[player_stats.steam_id] = player_stats
         else:
             self.player_stats[player_stats.steam_id].combine(player_stats)
+        self.missing_player_stats.discard(player_stats.steam_id)
 
         self.announce_match_end_stats()
 
@@ -1252,16 +1126,7 @@ class weird_stats(Plugin):
                 self.msg(stats_announcement)
 
     def stats_from_all_players_collected(self) -> bool:
-        steam_ids_in_stats = self.player_stats.keys()
-
-        teams = self.teams()
-        steam_ids_in_teams = [player.steam_id for player in teams["red"] + teams["blue"]]
-
-        for steam_id in steam_ids_in_teams:
-            if steam_id not in steam_ids_in_stats:
-                return False
-
-        return True
+        return len(self.missing_player_stats) == 0
 
     def player_speeds_announcements(self) -> list[str]:
         if len(self.travelled_distances) == 0 or len(self.alive_times) == 0:
@@ -1,7 +1,9 @@
 import minqlx
 from minqlx import Plugin
 
+import json
 import time
+from collections import OrderedDict
 from operator import itemgetter
 
 MIN_ACTIVE_PLAYERS = 3  # min players for duelarena
@@ -10,6 +12,9 @@ MAX_ACTIVE_PLAYERS = 4  # max players for duelarena
 DUELARENA_JOIN_CMD = ("join", "j")
 DUELARENA_JOIN_MSG = "You joined ^6DuelArena^7 mode, and you will automatically rotate with round loser."
 
+DUELARENA_STATE_KEY = "minqlx:duelarena:{}:state"  # formatted with the server's net_port
+DUELARENA_STATE_TTL = 60 * 60  # seconds the persisted state is restored within
+
 
 class duelarena(minqlx.Plugin):
 
@@ -30,14 +35,16 @@ class duelarena(minqlx.Plugin):
         self.add_hook("game_end", self.handle_game_end)
         self.add_command(DUELARENA_JOIN_CMD, self.cmd_join)
 
-        self.duelarena_game = DuelArenaGame()
+        self.duelarena_game = DuelArenaGame(db=self.db if self.database is not None else None)
 
         teams = Plugin.teams()
         for _p in teams["red"] + teams["blue"]:
             self.duelarena_game.add_player(_p.steam_id)
+        self.duelarena_game.restore()
 
     def handle_map_change(self, mapname, factory):
         self.duelarena_game.reset()
+        self.duelarena_game.persist()
 
     @minqlx.delay(3)
     def handle_player_loaded(self, player):
@@ -76,6 +83,7 @@ class duelarena(minqlx.Plugin):
                 self.duelarena_game.player_spec.remove(player.steam_id)
             else:
                 self.duelarena_game.remove_player(player.steam_id)
+        self.duelarena_game.persist()
 
         if self.game.state == "warmup":
             if not self.duelarena_game.should_be_activated():
@@ -102,6 +110,7 @@ class duelarena(minqlx.Plugin):
 
     def handle_player_disconnect(self, player, reason):
         self.duelarena_game.remove_player(player.steam_id)
+        self.duelarena_game.persist()
 
     @minqlx.delay(3)
     def handle_game_countdown(self):
@@ -115,6 +124,7 @@ class duelarena(minqlx.Plugin):
         if not self.duelarena_game.is_activated():
             self.duelarena_game.activate()
         self.duelarena_game.init_duel()
+        self.duelarena_game.persist()
 
     def handle_round_countdown(self, round_number):
         self.duelarena_game.announce_next_round()
@@ -159,6 +169,7 @@ class duelarena(minqlx.Plugin):
 
         losing_team = self.other_team(winning_team)
         self.duelarena_game.exchange_player(losing_team)
+        self.duelarena_game.persist()
 
     @staticmethod
     def determine_winning_team(data):
@@ -190,17 +201,76 @@ class duelarena(minqlx.Plugin):
             return
 
         self.duelarena_game.add_player(player.steam_id)
+        self.duelarena_game.persist()
         player.tell("You successfully joined the DuelArena queue. Prepare for your duel!")
         Plugin.msg("^7{} joined DuelArena!".format(player.clean_name))
 
 
+class UniqueDeque:
+    """A deque of steam ids holding every steam id at most once.
+
+    Backed by an OrderedDict, so that membership tests, adding and popping at both ends, and removing steam ids from
+    anywhere in between are O(1). Iterating and comparing to lists work in the order a list built with the same
+    operations would have.
+    """
+
+    def __init__(self, steam_ids=()):
+        self._steam_ids = OrderedDict.fromkeys(steam_ids)
+
+    def __contains__(self, steam_id):
+        return steam_id in self._steam_ids
+
+    def __len__(self):
+        return len(self._steam_ids)
+
+    def __iter__(self):
+        return iter(self._steam_ids)
+
+    def __eq__(self, other):
+        if isinstance(other, (UniqueDeque, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return "UniqueDeque({})".format(list(self))
+
+    def append(self, steam_id):
+        self._steam_ids[steam_id] = None
+
+    def appendleft(self, steam_id):
+        self._steam_ids[steam_id] = None
+        self._steam_ids.move_to_end(steam_id, last=False)
+
+    def pop(self):
+        try:
+            return self._steam_ids.popitem(last=True)[0]
+        except KeyError:
+            raise IndexError("pop from an empty UniqueDeque")
+
+    def popleft(self):
+        try:
+            return self._steam_ids.popitem(last=False)[0]
+        except KeyError:
+            raise IndexError("pop from an empty UniqueDeque")
+
+    def remove(self, steam_id):
+        try:
+            del self._steam_ids[steam_id]
+        except KeyError:
+            raise ValueError("{} not in UniqueDeque".format(steam_id))
+
+    def discard(self, steam_id):
+        self._steam_ids.pop(steam_id, None)
+
+
 class DuelArenaGame:
 
-    def __init__(self):
+    def __init__(self, db=None):
+        self.db = db
         self.duelmode = False
         self.initduel = False
-        self.playerset = []
-        self.queue = []
+        self.playerset = UniqueDeque()
+        self.queue = UniqueDeque()
         self.player_red = None
         self.player_blue = None
         self.player_spec = []
@@ -210,6 +280,7 @@ class DuelArenaGame:
         self.duel_to_normal_threshold = Plugin.get_cvar("qlx_duelarenaDuelToNormalThreshold", int)
         self.normal_to_duel_threshold = Plugin.get_cvar("qlx_duelarenaNormalToDuelThreshold", int)
         self.duel_to_normal_score_reset = Plugin.get_cvar("qlx_duelarenaDuelToNormalScoreReset")
+        self.state_key = DUELARENA_STATE_KEY.format(Plugin.get_cvar("net_port"))
 
     @property
     def game(self):
@@ -218,15 +289,63 @@ class DuelArenaGame:
         except minqlx.NonexistentGameError:
             return None
 
+    @property
+    def playerset(self):
+        return self._playerset
+
+    @playerset.setter
+    def playerset(self, steam_ids):
+        self._playerset = steam_ids if isinstance(steam_ids, UniqueDeque) else UniqueDeque(steam_ids)
+
+    @property
+    def queue(self):
+        """The players waiting for their duel. New players are added to the left, the next player is popped from the
+        right."""
+        return self._queue
+
+    @queue.setter
+    def queue(self, steam_ids):
+        self._queue = steam_ids if isinstance(steam_ids, UniqueDeque) else UniqueDeque(steam_ids)
+
+    def persist(self):
+        """Stores the queue and scores in the database, so that they survive plugin reloads and server restarts."""
+        if self.db is None:
+            return
+
+        state = {"duelmode": self.duelmode, "playerset": list(self.playerset), "queue": list(self.queue),
+                 "scores": {str(sid): score for sid, score in self.scores.items()}}
+        self.db.set(self.state_key, json.dumps(state), ex=DUELARENA_STATE_TTL)
+
+    def restore(self):
+        """Restores the state persisted while the current game was in progress, dropping players no longer
+        connected."""
+        if self.db is None or not self.game or self.game.state != "in_progress":
+            return
+
+        persisted = self.db.get(self.state_key)
+        if persisted is None:
+            return
+
+        try:
+            state = json.loads(persisted)
+        except ValueError:
+            return
+
+        self.duelmode = state.get("duelmode", False)
+        for sid in state.get("playerset", []):
+            self.playerset.append(sid)
+        self.queue = state.get("queue", [])
+        self.scores = {int(sid): score for sid, score in state.get("scores", {}).items()}
+        self.validate_players()
+
     def add_player(self, player_sid):
-        if player_sid not in self.playerset:
-            self.playerset.append(player_sid)
+        self.playerset.append(player_sid)
 
         if not self.is_activated():
             return
 
         if player_sid not in self.queue:
-            self.queue.insert(0, player_sid)
+            self.queue.appendleft(player_sid)
         if player_sid not in self.scores:
             self.scores[player_sid] = 0
 
@@ -236,8 +355,7 @@ class DuelArenaGame:
             if player is not None:
                 self.insert_next_player(player.team)
 
-        if player_sid in self.playerset:
-            self.playerset.remove(player_sid)
+        self.playerset.discard(player_sid)
 
         self.validate_players()
         self.check_for_activation_or_abortion()
@@ -359,18 +477,18 @@ class DuelArenaGame:
     def reset(self):
         self.deactivate()
         self.print_reset_scores = False
-        self.playerset = []
-        self.queue = []
+        self.playerset = UniqueDeque()
+        self.queue = UniqueDeque()
 
     def init_duel(self, winner_sid=None):
         teams = Plugin.teams()
-        for p in [player for player in teams["red"] + teams["blue"] if player.steam_id not in self.playerset]:
+        for p in teams["red"] + teams["blue"]:
             self.playerset.append(p.steam_id)
         self.validate_players()
         self.init_scores()
 
         for sid in [player_sid for player_sid in self.playerset if player_sid not in self.queue]:
-            self.queue.insert(0, sid)
+            self.queue.appendleft(sid)
 
         red_sid, blue_sid = self.determine_initial_players(winner_sid)
 
@@ -383,10 +501,11 @@ class DuelArenaGame:
             return self.queue.pop(), self.queue.pop()
 
         teams = Plugin.teams()
+        active_sids = {player.steam_id for player in teams["red"] + teams["blue"]}
         self.queue.remove(winner_sid)
         other_player = self.next_player_sid()
-        while other_player in [player.steam_id for player in teams["red"] + teams["blue"]]:
-            self.queue.insert(0, other_player)
+        while other_player in active_sids:
+            self.queue.appendleft(other_player)
             other_player = self.next_player_sid()
 
         return winner_sid, other_player
@@ -480,8 +599,9 @@ class DuelArenaGame:
         return self.initduel
 
     def validate_players(self):
-        self.playerset[:] = [sid for sid in self.playerset if Plugin.player(sid) and Plugin.player(sid).ping < 990]
-        self.queue[:] = [sid for sid in self.queue if sid in self.playerset]
+        connected_sids = {player.steam_id for player in Plugin.players() if player.ping < 990}
+        self.playerset = UniqueDeque(sid for sid in self.playerset if sid in connected_sids)
+        self.queue = UniqueDeque(sid for sid in self.queue if sid in self.playerset)
 
     def record_scores(self, red_score, blue_score):
         teams = Plugin.teams()
@@ -508,7 +628,7 @@ class DuelArenaGame:
         if loser is None:
             return
 
-        self.queue.insert(0, loser.steam_id)
+        self.queue.appendleft(loser.steam_id)
         self.player_spec.append(loser.steam_id)
         loser.put("spectator")
         loser.tell("{}, you've been put back to DuelArena queue. Prepare for your next duel!".format(loser.name))
@@ -8,6 +8,8 @@ You are free to modify this plugin to your own one.
 from __future__ import annotations
 
 import asyncio
+import threading
+import time
 from typing import Optional, Any, Callable
 
 import aiohttp
@@ -18,36 +20,24 @@ import minqlx
 from minqlx import Player, AbstractChannel, Plugin
 from minqlx.database import Redis
 
-from requests import Session, RequestException, codes
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry  # type: ignore
-
 
 SteamId = int
 
 
 PLAYER_BASE = "minqlx:players:{0}"
 IPS_BASE = "minqlx:ips"
+ALTS_ROOTS_KEY = "minqlx:alts:roots"
+ALTS_COMPONENT_BASE = "minqlx:alts:{0}"
 
 
-def requests_retry_session(
-        retries: int = 3,
-        backoff_factor: float = 0.1,
-        status_forcelist: tuple[int, int, int] = (500, 502, 504),
-        session: Session = None,
-) -> Session:
-    session = session or Session()
-    retry = Retry(
-        total=retries,
-        read=retries,
-        connect=retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=status_forcelist,
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-    return session
+def retry_client() -> RetryClient:
+    """Creates an http client retrying failed requests. Use one client for all requests of a lookup, so that they share
+    its connection pool."""
+    retry_options = ExponentialRetry(attempts=3, factor=0.1,
+                                     statuses={500, 502, 504},
+                                     exceptions={aiohttp.ClientResponseError, aiohttp.ClientPayloadError})
+    return RetryClient(raise_for_status=False, retry_options=retry_options,
+                       timeout=ClientTimeout(total=5, connect=3, sock_connect=3, sock_read=5))
 
 
 def identify_reply_channel(channel: AbstractChannel) -> AbstractChannel:
@@ -69,19 +59,22 @@ def remove_trailing_color_code(text: str) -> str:
 class elocheck(Plugin):
     """
     Checks qlstats for the elos of a player given as well as checking the elos of potentially aliases of the player
-    by looking for connection from the same IP as the player has connected from locally.
+    by looking for connection from the same IP as the player has connected from locally. Accounts linked through
+    shared IPs are kept in an index in the database that is updated whenever a player connects, see
+    :class:`AltAccountIndex`.
 
     Uses:
     * qlx_elocheckPermission (default: "0") The permission for issuing the elocheck
     * qlx_elocheckReplyChannel (default: "public") The reply channel where the elocheck output is put to.
         Possible values: "public" or "private". Any other value leads to public announcements
     * qlx_elocheckShowSteamids (default: "0") Also lists the steam ids of the players checked
+    * qlx_elocheckAliasesCacheTime (default: "900") Seconds the aliases fetched for a player are kept in memory
     """
 
     database = Redis  # type: ignore
 
     __slots__ = ("reply_channel", "show_steam_ids", "balance_api", "previous_gametype", "previous_map",
-                 "previous_ratings", "ratings", "rating_diffs", "informed_players")
+                 "previous_ratings", "ratings", "rating_changes", "informed_players", "aliases_cache", "alt_accounts")
 
     def __init__(self):
         super().__init__()
@@ -89,11 +82,14 @@ class elocheck(Plugin):
         self.set_cvar_once("qlx_elocheckPermission", "0")
         self.set_cvar_once("qlx_elocheckReplyChannel", "public")
         self.set_cvar_once("qlx_elocheckShowSteamids", "0")
+        self.set_cvar_once("qlx_elocheckAliasesCacheTime", "900")
 
         self.reply_channel: str = self.get_cvar("qlx_elocheckReplyChannel")
         if self.reply_channel != "private":
             self.reply_channel = "public"
         self.show_steam_ids: bool = self.get_cvar("qlx_elocheckShowSteamids", bool)
+        self.aliases_cache: AliasesCache = AliasesCache(self.get_cvar("qlx_elocheckAliasesCacheTime", int))
+        self.alt_accounts: AltAccountIndex = AltAccountIndex(self.db)
 
         self.add_command("elocheck", self.cmd_elocheck,
                          permission=self.get_cvar("qlx_elocheckPermission", int),
@@ -114,7 +110,7 @@ class elocheck(Plugin):
         self.previous_gametype: Optional[str] = None
         self.previous_ratings: dict[str, RatingProvider] = {}
         self.ratings: dict[str, RatingProvider] = {}
-        self.rating_diffs: dict[str, dict[SteamId, Any]] = {}
+        self.rating_changes: dict[SteamId, list[str]] = {}
         self.fetch_elos_from_all_players()
 
         self.informed_players: list[SteamId] = []
@@ -131,8 +127,8 @@ class elocheck(Plugin):
         for rating_provider in [TRUSKILLS, A_ELO, B_ELO]:
             missing_steam_ids = steam_ids
             if rating_provider in self.ratings:
-                rated_steam_ids = self.ratings[rating_provider.name].rated_steam_ids()
-                missing_steam_ids = [steam_id for steam_id in steam_ids if steam_id not in rated_steam_ids]
+                rated_players = self.ratings[rating_provider.name]
+                missing_steam_ids = [steam_id for steam_id in steam_ids if steam_id not in rated_players]
 
             async_requests.append(rating_provider.fetch_elos(missing_steam_ids))
 
@@ -160,8 +156,8 @@ class elocheck(Plugin):
         rating_provider_name = f"{mapname} {TRUSKILLS.name}"
         missing_steam_ids = steam_ids
         if rating_provider_name in self.ratings:
-            rated_steam_ids = self.ratings[rating_provider_name].rated_steam_ids()
-            missing_steam_ids = [steam_id for steam_id in steam_ids if steam_id not in rated_steam_ids]
+            rated_players = self.ratings[rating_provider_name]
+            missing_steam_ids = [steam_id for steam_id in steam_ids if steam_id not in rated_players]
 
         if len(missing_steam_ids) == 0:
             return None, None
@@ -182,6 +178,7 @@ class elocheck(Plugin):
         self.informed_players = []
         self.previous_ratings = self.ratings
         self.ratings = {}
+        self.rating_changes = {}
         self.fetch_and_diff_ratings(mapname.lower())
 
     @minqlx.thread
@@ -204,12 +201,14 @@ class elocheck(Plugin):
                                              headers={"X-QuakeLive-Map": self.previous_map}))
 
             results = await asyncio.gather(*async_requests, return_exceptions=True)
+            fetched_ratings: dict[str, RatingProvider] = {}
             for rating_provider_name, rating_results in zip(rating_providers_fetched, results):
                 if isinstance(rating_results, BaseException):
                     continue
                 self.append_ratings(rating_provider_name, rating_results)
-                self.rating_diffs[rating_provider_name] = \
-                    RatingProvider.from_json(rating_results) - self.previous_ratings[rating_provider_name]
+                fetched_ratings[rating_provider_name] = RatingProvider.from_json(rating_results)
+
+            self.rating_changes = self.collect_rating_changes(fetched_ratings)
 
         async def fetch_ratings_from_newmap(_mapname) -> None:
             steam_ids = [player.steam_id for player in self.players()]
@@ -228,7 +227,13 @@ class elocheck(Plugin):
         def fetch_player_elos(_player):
             asyncio.run(self.fetch_ratings([_player.steam_id]))
 
+        @minqlx.thread
+        def link_player_ip(steam_id, ip):
+            self.alt_accounts.link_ip(steam_id, ip)
+
         fetch_player_elos(player)
+        if not player.is_bot and player.ip:
+            link_player_ip(player.steam_id, player.ip)
 
     def handle_team_switch(self, player, _old, new):
         if new not in ["red", "blue", "any"]:
@@ -242,34 +247,40 @@ class elocheck(Plugin):
         if not self.wants_to_be_informed(player.steam_id):
             return
 
-        changed_ratings = []
-        previous_truskills = f"{self.previous_map} {TRUSKILLS.name}"
-
-        for rating_provider_name in [previous_truskills, TRUSKILLS.name, A_ELO.name, B_ELO.name]:
-            formatted_diffs = self.format_rating_diffs_for_rating_provider_name_and_player(
-                rating_provider_name, player.steam_id)
-            if formatted_diffs is not None:
-                changed_ratings.append(formatted_diffs)
-
+        changed_ratings = self.rating_changes.get(player.steam_id, [])
         if len(changed_ratings) == 0:
             return
 
         formatted_rating_changes = ", ".join(changed_ratings)
         player.tell(f"Your ratings changed since the last map: {formatted_rating_changes}")
 
-    def format_rating_diffs_for_rating_provider_name_and_player(self, rating_provider_name: str, steam_id: SteamId) \
-            -> Optional[str]:
-        if rating_provider_name not in self.rating_diffs or steam_id not in self.rating_diffs[rating_provider_name] or \
-                self.previous_gametype not in self.rating_diffs[rating_provider_name][steam_id] or \
-                rating_provider_name not in self.ratings or steam_id not in self.ratings[rating_provider_name]:
-            return None
-
+    def collect_rating_changes(self, fetched_ratings: dict[str, RatingProvider]) -> dict[SteamId, list[str]]:
+        """Compares the ratings fetched at the map change with the ones from before for the previously played gametype,
+        and formats the changes for all players at once, so they are ready when the players join a team."""
         if self.previous_gametype is None:
-            return None
+            return {}
 
-        current_rating = self.ratings[rating_provider_name].rating_for(steam_id, self.previous_gametype)
-        rating_diff = self.rating_diffs[rating_provider_name][steam_id][self.previous_gametype]
+        rating_changes: dict[SteamId, list[str]] = {}
+        previous_truskills = f"{self.previous_map} {TRUSKILLS.name}"
+        for rating_provider_name in [previous_truskills, TRUSKILLS.name, A_ELO.name, B_ELO.name]:
+            if rating_provider_name not in fetched_ratings or rating_provider_name not in self.previous_ratings:
+                continue
+
+            changes = rating_snapshot_changes(
+                self.previous_ratings[rating_provider_name].snapshot(self.previous_gametype),
+                fetched_ratings[rating_provider_name].snapshot(self.previous_gametype))
+            for steam_id, (current_rating, rating_diff) in changes.items():
+                formatted_change = self.format_rating_change(rating_provider_name, current_rating, rating_diff)
+                if formatted_change is not None:
+                    rating_changes.setdefault(steam_id, []).append(formatted_change)
+
+        return rating_changes
+
+    @staticmethod
+    def format_rating_change(rating_provider_name: str, current_rating: int | float, rating_diff: int | float) \
+            -> Optional[str]:
         if rating_provider_name.endswith(TRUSKILLS.name):
+            rating_diff = round(rating_diff, 2)
             if rating_diff < 0.0:
                 return f"^3{rating_provider_name}^7: ^4{current_rating:.02f}^7 (^1{rating_diff:+.02f}^7)"
 
@@ -344,19 +355,23 @@ class elocheck(Plugin):
             reply_func = self.reply_func(player, channel)
 
             used_steam_ids = self.used_steam_ids_for(target_steam_id)
-            aliases = self.fetch_aliases(used_steam_ids)
-
-            async_requests = [
-                TRUSKILLS.fetch_elos(used_steam_ids),
-                A_ELO.fetch_elos(used_steam_ids),
-                B_ELO.fetch_elos(used_steam_ids),
-            ]
-            if self.game is not None and self.game.map is not None:
-                async_requests.append(
-                    TRUSKILLS.fetch_elos(used_steam_ids, headers={"X-QuakeLive-Map": self.game.map.lower()})
-                )
 
-            results = await asyncio.gather(*async_requests, return_exceptions=True)
+            async with retry_client() as session:
+                async_requests = [
+                    self.fetch_aliases(used_steam_ids, session=session),
+                    TRUSKILLS.fetch_elos(used_steam_ids, session=session),
+                    A_ELO.fetch_elos(used_steam_ids, session=session),
+                    B_ELO.fetch_elos(used_steam_ids, session=session),
+                ]
+                if self.game is not None and self.game.map is not None:
+                    async_requests.append(
+                        TRUSKILLS.fetch_elos(used_steam_ids, headers={"X-QuakeLive-Map": self.game.map.lower()},
+                                             session=session)
+                    )
+
+                aliases, *results = await asyncio.gather(*async_requests, return_exceptions=True)
+            if isinstance(aliases, BaseException):
+                aliases = {}
 
             truskill = RatingProvider.from_json(results[0]) if not isinstance(results[0], Exception) else None
             a_elo = RatingProvider.from_json(results[1]) if not isinstance(results[1], Exception) else None
@@ -409,37 +424,33 @@ class elocheck(Plugin):
         return identify_reply_channel(channel).reply
 
     def used_steam_ids_for(self, steam_id: SteamId) -> list[int]:
-        if not self.db.exists(PLAYER_BASE.format(steam_id) + ":ips"):
-            return [steam_id]
+        return self.alt_accounts.linked_steam_ids(steam_id)
 
-        ips = self.db.smembers(PLAYER_BASE.format(steam_id) + ":ips")
-
-        used_steam_ids: set[str] = set()
-        for ip in ips:
-            if not self.db.exists(IPS_BASE + f":{ip}"):
-                continue
-
-            used_steam_ids = used_steam_ids | self.db.smembers(IPS_BASE + f":{ip}")
-
-        return [int(_steam_id) for _steam_id in used_steam_ids]
+    async def fetch_aliases(self, steam_ids: list[SteamId], *, session: RetryClient = None) \
+            -> dict[SteamId, list[str]]:
+        aliases, missing_steam_ids = self.aliases_cache.lookup(steam_ids)
+        if len(missing_steam_ids) == 0:
+            return aliases
 
-    def fetch_aliases(self, steam_ids: list[SteamId]) -> dict[SteamId, list[str]]:
-        formatted_steam_ids = "+".join([str(steam_id) for steam_id in steam_ids])
+        formatted_steam_ids = "+".join([str(steam_id) for steam_id in missing_steam_ids])
         url_template = f"{A_ELO.url_base}aliases/{formatted_steam_ids}.json"
 
         try:
-            result = requests_retry_session().get(url_template, timeout=A_ELO.timeout)
-        except RequestException as exception:
+            if session is None:
+                async with retry_client() as retry_session:
+                    js = await self.fetch_json(retry_session, url_template)
+            else:
+                js = await self.fetch_json(session, url_template)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
             self.logger.debug(f"request exception: {exception}")
-            return {}
+            return aliases
 
-        if result.status_code != codes.ok:
-            return {}
-        js = result.json()
+        if js is None:
+            return aliases
 
-        aliases: dict[SteamId, list[str]] = {}
-        for steam_id in steam_ids:
+        for steam_id in missing_steam_ids:
             if str(steam_id) not in js:
+                self.aliases_cache.store(steam_id, None)
                 continue
 
             player_entry = js[str(steam_id)]
@@ -449,8 +460,16 @@ class elocheck(Plugin):
                 if self.clean_text(entry) not in cleaned_aliases:
                     aliases[steam_id].append(entry)
                     cleaned_aliases.append(self.clean_text(entry))
+            self.aliases_cache.store(steam_id, aliases[steam_id])
         return aliases
 
+    @staticmethod
+    async def fetch_json(session: RetryClient, url: str) -> Optional[dict[str, Any]]:
+        async with session.get(url, timeout=ClientTimeout(total=A_ELO.timeout)) as result:
+            if result.status != 200:
+                return None
+            return await result.json()
+
     def format_player_elos(self, a_elo: RatingProvider, b_elo: RatingProvider,
                            truskill: RatingProvider, map_based_truskill: Optional[RatingProvider],
                            steam_id: SteamId, indent: int = 0, aliases: list[str] = None) -> str:
@@ -527,47 +546,50 @@ class elocheck(Plugin):
 
     @minqlx.thread
     def do_aliases(self, player: Player, target: str, channel: AbstractChannel) -> None:
-        target_players = self.find_target_player(target)
+        async def _async_aliases():
+            target_players = self.find_target_player(target)
 
-        target_steam_id = None
+            target_steam_id = None
 
-        if target_players is None or len(target_players) == 0:
-            try:
-                target_steam_id = int(target)
+            if target_players is None or len(target_players) == 0:
+                try:
+                    target_steam_id = int(target)
 
-                if not self.db.exists(PLAYER_BASE.format(target_steam_id)):
-                    player.tell(f"Sorry, player with steam id {target_steam_id} never played here.")
+                    if not self.db.exists(PLAYER_BASE.format(target_steam_id)):
+                        player.tell(f"Sorry, player with steam id {target_steam_id} never played here.")
+                        return
+                except ValueError:
+                    player.tell(f"Sorry, but no players matched your tokens: {target}.")
                     return
-            except ValueError:
-                player.tell(f"Sorry, but no players matched your tokens: {target}.")
+
+            if len(target_players) > 1:
+                amount_alternatives = len(target_players)
+                player.tell(f"A total of ^6{amount_alternatives}^7 players matched for {target}:")
+                out = ""
+                for p in target_players:
+                    out += " " * 2
+                    out += f"{p.id}^6:^7 {p.name}\n"
+                player.tell(out[:-1])
                 return
 
-        if len(target_players) > 1:
-            amount_alternatives = len(target_players)
-            player.tell(f"A total of ^6{amount_alternatives}^7 players matched for {target}:")
-            out = ""
-            for p in target_players:
-                out += " " * 2
-                out += f"{p.id}^6:^7 {p.name}\n"
-            player.tell(out[:-1])
-            return
+            if len(target_players) == 1:
+                target_steam_id = target_players.pop().steam_id
 
-        if len(target_players) == 1:
-            target_steam_id = target_players.pop().steam_id
+            if target_steam_id is None:
+                return
 
-        if target_steam_id is None:
-            return
+            reply_func = self.reply_func(player, channel)
 
-        reply_func = self.reply_func(player, channel)
+            aliases = await self.fetch_aliases([target_steam_id])
 
-        aliases = self.fetch_aliases([target_steam_id])
+            if target_steam_id not in aliases:
+                reply_func(f"Sorry, no aliases returned for {target_steam_id}")
+                return
 
-        if target_steam_id not in aliases:
-            reply_func(f"Sorry, no aliases returned for {target_steam_id}")
-            return
+            formatted_aliases = self.format_player_aliases(target_steam_id, aliases[target_steam_id])
+            reply_func(f"{formatted_aliases}^7")
 
-        formatted_aliases = self.format_player_aliases(target_steam_id, aliases[target_steam_id])
-        reply_func(f"{formatted_aliases}^7")
+        asyncio.run(_async_aliases())
 
     def format_player_aliases(self, steam_id: SteamId, aliases: list[str]) -> str:
         formatted_player_name = self.format_player_name(steam_id)
@@ -604,21 +626,21 @@ class SkillRatingProvider:
         self.balance_api: str = balance_api
         self.timeout: int = timeout
 
-    async def fetch_elos(self, steam_ids: list[SteamId], *, headers: Optional[dict[str, str]] = None):
+    async def fetch_elos(self, steam_ids: list[SteamId], *, headers: Optional[dict[str, str]] = None,
+                         session: RetryClient = None):
         if len(steam_ids) == 0:
             return None
 
+        if session is None:
+            async with retry_client() as retry_session:
+                return await self.fetch_elos(steam_ids, headers=headers, session=retry_session)
+
         formatted_steam_ids = "+".join([str(steam_id) for steam_id in steam_ids])
         request_url = f"{self.url_base}{self.balance_api}/{formatted_steam_ids}"
-        retry_options = ExponentialRetry(attempts=3, factor=0.1,
-                                         statuses={500, 502, 504},
-                                         exceptions={aiohttp.ClientResponseError, aiohttp.ClientPayloadError})
-        async with RetryClient(raise_for_status=False, retry_options=retry_options,
-                               timeout=ClientTimeout(total=5, connect=3, sock_connect=3, sock_read=5)) as retry_client:
-            async with retry_client.get(request_url, headers=headers) as result:
-                if result.status != 200:
-                    return None
-                return await result.json()
+        async with session.get(request_url, headers=headers) as result:
+            if result.status != 200:
+                return None
+            return await result.json()
 
 
 TRUSKILLS = SkillRatingProvider("Truskill", "http://stats.houseofquake.com/", "elo/map_based")
@@ -626,98 +648,215 @@ A_ELO = SkillRatingProvider("Elo", "http://qlstats.net/", "elo", timeout=15)
 B_ELO = SkillRatingProvider("B-Elo", "http://qlstats.net/", "elo_b", timeout=15)
 
 
-class RatingProvider:
-    __slots__ = ("jsons",)
+class AltAccountIndex:
+    """Index of the accounts linked by connecting from the same IPs, maintained in the database as the connected
+    components of the graph of steam ids and IPs.
 
-    def __init__(self, json):
-        self.jsons = [json]
+    Each component is kept as a set of its steam ids and IPs in ``minqlx:alts:<root>``, and the hash
+    ``minqlx:alts:roots`` maps every steam id and IP, the latter prefixed with ``ip:``, to the root of its component.
+    Finding all the accounts linked to a player, no matter over how many hops, is therefore a single hash lookup
+    followed by reading one set, and other plugins may query these keys on every connect cheaply.
 
-    def __iter__(self):
-        return iter(self.rated_steam_ids())
+    Components are merged by moving the nodes of the smaller component into the larger one, so each node is relabeled
+    at most a logarithmic amount of times. Steam ids and IPs not in the index yet are seeded from the IP sets
+    ``minqlx:players:<steam_id>:ips`` and ``minqlx:ips:<ip>`` kept by other plugins."""
+    __slots__ = ("db", "max_seeded_nodes")
 
-    def __contains__(self, item) -> bool:
-        if not isinstance(item, int) and not isinstance(item, str):
-            return False
+    def __init__(self, db, max_seeded_nodes: int = 1024):
+        self.db = db
+        self.max_seeded_nodes: int = max_seeded_nodes
 
-        steam_id = item
-        if isinstance(item, str):
-            try:
-                steam_id = int(item)
-            except ValueError:
-                return False
+    @staticmethod
+    def ip_node(ip: str) -> str:
+        return f"ip:{ip}"
+
+    def linked_steam_ids(self, steam_id: SteamId) -> list[SteamId]:
+        """Finds the steam ids linked to the given one through shared IPs, including the steam id itself."""
+        root = self.db.hget(ALTS_ROOTS_KEY, str(steam_id))
+        if root is None:
+            root = self.link([str(steam_id)])
+
+        nodes = self.db.smembers(ALTS_COMPONENT_BASE.format(root))
+        return [int(node) for node in nodes if not node.startswith("ip:")]
+
+    def link_ip(self, steam_id: SteamId, ip: str) -> None:
+        """Links the steam id with the IP it connected from."""
+        self.link([str(steam_id), self.ip_node(ip)])
+
+    def link(self, nodes: list[str]) -> str:
+        """Merges the components of the given nodes. Nodes not in the index, yet, are seeded from the IP sets.
+
+        :return: the root of the merged component
+        """
+        roots = self.db.hmget(ALTS_ROOTS_KEY, nodes)
+        unindexed_nodes = [node for node, root in zip(nodes, roots) if root is None]
+        linked_nodes = set(nodes) | self.seeded_nodes(unindexed_nodes)
+
+        return self.db.transaction(lambda pipeline: self.merge(pipeline, linked_nodes), ALTS_ROOTS_KEY,
+                                   value_from_callable=True)
+
+    def seeded_nodes(self, nodes: list[str]) -> set[str]:
+        """Walks the IP sets breadth first from the given nodes, fetching each layer in a single round trip."""
+        seen = set(nodes)
+        layer = list(nodes)
+        while len(layer) > 0 and len(seen) < self.max_seeded_nodes:
+            pipeline = self.db.pipeline(transaction=False)
+            for node in layer:
+                if node.startswith("ip:"):
+                    pipeline.smembers(IPS_BASE + f":{node[3:]}")
+                else:
+                    pipeline.smembers(PLAYER_BASE.format(node) + ":ips")
+
+            next_layer = []
+            for node, neighbours in zip(layer, pipeline.execute()):
+                for neighbour in neighbours:
+                    neighbour_node = str(neighbour) if node.startswith("ip:") else self.ip_node(neighbour)
+                    if neighbour_node in seen:
+                        continue
+                    seen.add(neighbour_node)
+                    next_layer.append(neighbour_node)
+            layer = next_layer
 
-        for json_rating in self.jsons:
-            if "playerinfo" not in json_rating:
+        return seen
+
+    @staticmethod
+    def merge(pipeline, nodes: set[str]) -> str:
+        ordered_nodes = sorted(nodes)
+        roots = pipeline.hmget(ALTS_ROOTS_KEY, ordered_nodes)
+
+        components: dict[str, set[str]] = {}
+        for node, root in zip(ordered_nodes, roots):
+            if root is None:
+                components[node] = {node}
+            elif root not in components:
+                components[root] = pipeline.smembers(ALTS_COMPONENT_BASE.format(root))
+
+        merged_root = max(components, key=lambda root: len(components[root]))
+        pipeline.multi()
+        for root, component in components.items():
+            if root == merged_root:
                 continue
+            pipeline.sadd(ALTS_COMPONENT_BASE.format(merged_root), *component)
+            pipeline.hset(ALTS_ROOTS_KEY, mapping={node: merged_root for node in component})
+            pipeline.delete(ALTS_COMPONENT_BASE.format(root))
+        if merged_root not in roots:
+            # the largest component is made of a single node new to the index
+            pipeline.sadd(ALTS_COMPONENT_BASE.format(merged_root), merged_root)
+            pipeline.hset(ALTS_ROOTS_KEY, merged_root, merged_root)
+
+        return merged_root
+
+
+class AliasesCache:
+    """Keeps the aliases fetched for players for a limited time, so that repeated lookups of the same players are
+    answered from memory. Players without any aliases are remembered as well."""
+    __slots__ = ("ttl", "max_size", "entries", "lock")
+
+    def __init__(self, ttl: float, max_size: int = 4096):
+        self.ttl: float = ttl
+        self.max_size: int = max_size
+        self.entries: dict[SteamId, tuple[float, Optional[list[str]]]] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def lookup(self, steam_ids: list[SteamId]) -> tuple[dict[SteamId, list[str]], list[SteamId]]:
+        """Looks up the cached aliases of the given players.
+
+        :return: the cached aliases of the players that have any, and the steam ids that still need to be fetched
+        """
+        now = time.monotonic()
+        aliases: dict[SteamId, list[str]] = {}
+        missing_steam_ids: list[SteamId] = []
+        with self.lock:
+            for steam_id in steam_ids:
+                if steam_id not in self.entries or self.entries[steam_id][0] < now:
+                    missing_steam_ids.append(steam_id)
+                    continue
+                if self.entries[steam_id][1] is not None:
+                    aliases[steam_id] = self.entries[steam_id][1]
+        return aliases, missing_steam_ids
 
-            if str(steam_id) in json_rating["playerinfo"]:
-                return True
+    def store(self, steam_id: SteamId, aliases: Optional[list[str]]) -> None:
+        if self.ttl <= 0:
+            return
 
-        return False
+        now = time.monotonic()
+        with self.lock:
+            # entries are kept in the order they expire in
+            self.entries.pop(steam_id, None)
+            self.entries[steam_id] = (now + self.ttl, aliases)
 
-    def __getitem__(self, item):
-        if item not in self:
-            raise TypeError
+            while len(self.entries) > 0:
+                oldest_steam_id = next(iter(self.entries))
+                if self.entries[oldest_steam_id][0] >= now and len(self.entries) <= self.max_size:
+                    break
+                del self.entries[oldest_steam_id]
 
-        steam_id = item
-        if isinstance(item, str):
-            try:
-                steam_id = int(item)
-            except ValueError as e:
-                raise TypeError from e
 
-        for json_rating in reversed(self.jsons):
-            if "playerinfo" not in json_rating:
-                continue
+def rating_snapshot_changes(previous: dict[SteamId, int | float], current: dict[SteamId, int | float]) \
+        -> dict[SteamId, tuple[int | float, int | float]]:
+    """Subtracts two rating snapshots of the same gametype.
 
-            if str(steam_id) not in json_rating["playerinfo"]:
-                continue
+    :return: the current rating and its change for every player rated in both snapshots whose rating changed
+    """
+    return {steam_id: (current[steam_id], current[steam_id] - previous[steam_id])
+            for steam_id in current.keys() & previous.keys() if current[steam_id] != previous[steam_id]}
 
-            return PlayerRating(json_rating["playerinfo"][str(steam_id)])
 
-        return None
+class RatingProvider:
+    """The ratings of the players fetched from a rating provider, keyed by steam id. Ratings appended later for the
+    same player replace the earlier ones."""
+    __slots__ = ("players",)
 
-    def __sub__(self, other):
-        returned = {}
+    def __init__(self, json):
+        self.players: dict[SteamId, PlayerRating] = {}
+        self.append_ratings(json)
 
-        if not isinstance(other, RatingProvider):
-            formatted_other_type = type(other).__name__
-            raise TypeError(f"Can't subtract '{formatted_other_type}' from a RatingProvider")
+    def __iter__(self):
+        return iter(self.players)
 
-        for steam_id in self:
-            if steam_id not in other:
-                returned[steam_id] = {gametype: self.gametype_data_for(steam_id, gametype)
-                                      for gametype in self.rated_gametypes_for(steam_id)}
-                continue
+    def __len__(self) -> int:
+        return len(self.players)
 
-            returned[steam_id] = {}
-            for gametype in self.rated_gametypes_for(steam_id):
-                if gametype not in other.rated_gametypes_for(steam_id):
-                    returned[steam_id][gametype] = self.gametype_data_for(steam_id, gametype)
-                    continue
-                gametype_diff = self.rating_for(steam_id, gametype) - other.rating_for(steam_id, gametype)
+    def __contains__(self, item) -> bool:
+        steam_id = self.steam_id_of(item)
+        return steam_id is not None and steam_id in self.players
 
-                if gametype_diff == 0:
-                    continue
-                returned[steam_id][gametype] = round(gametype_diff, 2)
+    def __getitem__(self, item):
+        steam_id = self.steam_id_of(item)
+        if steam_id is None or steam_id not in self.players:
+            raise TypeError
 
-        return returned
+        return self.players[steam_id]
+
+    @staticmethod
+    def steam_id_of(item) -> Optional[SteamId]:
+        if isinstance(item, int):
+            return item
+
+        if isinstance(item, str):
+            try:
+                return int(item)
+            except ValueError:
+                return None
+
+        return None
 
     @staticmethod
     def from_json(json_response) -> RatingProvider:
         return RatingProvider(json_response)
 
     def append_ratings(self, json_response) -> None:
-        self.jsons.append(json_response)
+        if json_response is None or "playerinfo" not in json_response:
+            return
 
-    def player_data_for(self, steam_id: SteamId):
-        if steam_id not in self:
-            return None
+        for steam_id, player_info in json_response["playerinfo"].items():
+            self.players[int(steam_id)] = PlayerRating(player_info)
 
-        return self[steam_id]
+    def player_data_for(self, steam_id: SteamId):
+        return self.players.get(steam_id)
 
     def gametype_data_for(self, steam_id: SteamId, gametype: str):
-        player_data = self.player_data_for(steam_id)
+        player_data = self.players.get(steam_id)
         if player_data is None:
             return None
 
@@ -727,26 +866,21 @@ class RatingProvider:
         return player_data[gametype]
 
     def rating_for(self, steam_id: SteamId, gametype: str) -> Optional[int | float]:
-        gametype_data = self.gametype_data_for(steam_id, gametype)
-        if gametype_data is None:
+        player_data = self.players.get(steam_id)
+        if player_data is None:
             return None
 
-        if "elo" not in gametype_data:
-            return None
-        return gametype_data["elo"]
+        return player_data.rating(gametype)
 
     def games_for(self, steam_id: SteamId, gametype: str) -> int:
-        gametype_data = self.gametype_data_for(steam_id, gametype)
-        if gametype_data is None:
-            return 0
-
-        if "games" not in gametype_data:
+        player_data = self.players.get(steam_id)
+        if player_data is None:
             return 0
 
-        return gametype_data["games"]
+        return player_data.games(gametype)
 
     def rated_gametypes_for(self, steam_id: SteamId) -> list[str]:
-        player_data = self[steam_id]
+        player_data = self.players.get(steam_id)
 
         if player_data is None:
             return []
@@ -754,7 +888,7 @@ class RatingProvider:
         return [gametype for gametype in player_data if gametype not in FILTERED_OUT_GAMETYPE_RESPONSES]
 
     def privacy_for(self, steam_id: SteamId) -> Optional[str]:
-        player_data = self[steam_id]
+        player_data = self.players.get(steam_id)
 
         if player_data is None:
             return None
@@ -764,15 +898,14 @@ class RatingProvider:
 
         return player_data.privacy
 
-    def rated_steam_ids(self) -> list[SteamId]:
-        returned: list[SteamId] = []
-        for json_rating in self.jsons:
-            if "playerinfo" not in json_rating:
-                continue
-
-            returned = returned + [int(steam_id) for steam_id in json_rating["playerinfo"]]
+    def snapshot(self, gametype: str) -> dict[SteamId, int | float]:
+        """The ratings of all rated players for the given gametype, i.e. one column of the table of ratings by steam
+        id and gametype."""
+        ratings = {steam_id: player_rating.rating(gametype) for steam_id, player_rating in self.players.items()}
+        return {steam_id: rating for steam_id, rating in ratings.items() if rating is not None}
 
-        return list(set(returned))
+    def rated_steam_ids(self) -> list[SteamId]:
+        return list(self.players)
 
     def format_elos(self, steam_id: SteamId) -> str:
         result = ""
@@ -815,6 +948,12 @@ class PlayerRating:
         returned["local"] = self.local
         return returned
 
+    def rating(self, gametype: str) -> Optional[int | float]:
+        return self.ratings["ratings"].get(gametype, {}).get("elo")
+
+    def games(self, gametype: str) -> int:
+        return self.ratings["ratings"].get(gametype, {}).get("games", 0)
+
     def __getattr__(self, attr):
         if attr not in ["privacy"]:
             raise AttributeError(f"'{self.__class__.__name__}' object has no atrribute '{attr}'")
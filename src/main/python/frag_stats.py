@@ -1,7 +1,7 @@
 import minqlx
 import redis
 
-from collections import Counter
+from collections import Counter, defaultdict
 
 COLLECTED_SOULZ_KEY =\
     "minqlx:players:{}:soulz"
@@ -26,14 +26,24 @@ class frag_stats(minqlx.Plugin):
         self.add_command("mapreaperz", self.cmd_mapreaperz)
         self.add_command("soulz", self.cmd_soulz)
         self.add_command("reaperz", self.cmd_reaperz)
+        self.add_command("nemesis", self.cmd_nemesis)
+        self.add_command("favvictim", self.cmd_favvictim)
 
-        self.frag_log = []
+        self.reset_frag_matrix()
 
     def handle_player_disconnect(self, player, reason):
         self.db.set(_name_key.format(player.steam_id), player.name)
 
     def handle_game_countdown(self):
-        self.frag_log = []
+        self.reset_frag_matrix()
+
+    def reset_frag_matrix(self):
+        # killer -> Counter of victims, and its transposition victim -> Counter of killers
+        self.frag_matrix = defaultdict(Counter)
+        self.reaper_matrix = defaultdict(Counter)
+        # running maxima per player, kept up to date in record_frag: identifier -> (other identifier, count)
+        self.nemeses = {}
+        self.favourite_victims = {}
 
     def handle_death(self, victim, killer, data):
         if not self.game or self.game.state != "in_progress":
@@ -50,7 +60,14 @@ class frag_stats(minqlx.Plugin):
         self.record_frag(recorded_killer, victim.steam_id)
 
     def record_frag(self, recorded_killer, victim_sid):
-        self.frag_log.append((recorded_killer, victim_sid))
+        self.frag_matrix[recorded_killer][victim_sid] += 1
+        self.reaper_matrix[victim_sid][recorded_killer] += 1
+
+        frag_count = self.frag_matrix[recorded_killer][victim_sid]
+        if victim_sid not in self.nemeses or self.nemeses[victim_sid][1] < frag_count:
+            self.nemeses[victim_sid] = (recorded_killer, frag_count)
+        if recorded_killer not in self.favourite_victims or self.favourite_victims[recorded_killer][1] < frag_count:
+            self.favourite_victims[recorded_killer] = (victim_sid, frag_count)
 
         if redis.VERSION[0] == 2:
             self.db.zincrby(COLLECTED_SOULZ_KEY.format(recorded_killer), victim_sid, 1)
@@ -120,10 +137,16 @@ class frag_stats(minqlx.Plugin):
         return fragging_player.name, fragging_player.steam_id
 
     def mapfrag_statistics_for(self, fragger_identifier):
-        player_fragged_log = [killed for killer, killed in self.frag_log if killer == fragger_identifier]
+        if fragger_identifier not in self.frag_matrix:
+            return Counter()
 
-        resolved_fragged_log = self.resolve_player_names(player_fragged_log)
-        return Counter(resolved_fragged_log)
+        return self.resolve_top_entries(self.frag_matrix[fragger_identifier])
+
+    def resolve_top_entries(self, counter):
+        resolved_counter = Counter()
+        for identifier, count in counter.most_common(self.toplimit):
+            resolved_counter[self.resolve_player_name(identifier)] += count
+        return resolved_counter
 
     def cmd_mapreaperz(self, player, msg, channel):
         if len(msg) == 1:
@@ -146,10 +169,44 @@ class frag_stats(minqlx.Plugin):
                 victim, kill_count in fragged_statistics.most_common(self.toplimit))))
 
     def mapfraggers_of(self, fragged_identifier):
-        player_fragged_log = [killer for killer, killed in self.frag_log if killed == fragged_identifier]
+        if fragged_identifier not in self.reaper_matrix:
+            return Counter()
 
-        resolved_fragged_log = self.resolve_player_names(player_fragged_log)
-        return Counter(resolved_fragged_log)
+        return self.resolve_top_entries(self.reaper_matrix[fragged_identifier])
+
+    def cmd_nemesis(self, player, msg, channel):
+        if len(msg) == 1:
+            fragged_name, fragged_identifier = self.identify_target(player, player)
+        else:
+            fragged_name, fragged_identifier = self.identify_target(player, msg[1])
+            if fragged_name is None and fragged_identifier is None:
+                return
+
+        reply_channel = self.identify_reply_channel(channel)
+        if fragged_identifier not in self.nemeses:
+            reply_channel.reply("{}^7's soul was not reaped by anyone, yet.".format(fragged_name))
+            return
+
+        nemesis, kill_count = self.nemeses[fragged_identifier]
+        reply_channel.reply("{}^7's nemesis this map: {}^7 ({})".format(
+            fragged_name, self.resolve_player_name(nemesis), kill_count))
+
+    def cmd_favvictim(self, player, msg, channel):
+        if len(msg) == 1:
+            fragger_name, fragger_identifier = self.identify_target(player, player)
+        else:
+            fragger_name, fragger_identifier = self.identify_target(player, msg[1])
+            if fragger_name is None and fragger_identifier is None:
+                return
+
+        reply_channel = self.identify_reply_channel(channel)
+        if fragger_identifier not in self.favourite_victims:
+            reply_channel.reply("{}^7 didn't reap any soulz, yet.".format(fragger_name))
+            return
+
+        victim, kill_count = self.favourite_victims[fragger_identifier]
+        reply_channel.reply("{}^7's favourite victim this map: {}^7 ({})".format(
+            fragger_name, self.resolve_player_name(victim), kill_count))
 
     def resolve_player_names(self, entries):
         if len(entries) == 0:
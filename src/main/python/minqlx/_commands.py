@@ -62,7 +62,7 @@ class Command:
 
     def is_eligible_name(self, name):
         if self.prefix:
-            prefix = minqlx.get_cvar("qlx_commandPrefix")
+            prefix = minqlx.CVARS.get("qlx_commandPrefix")
             if not name.startswith(prefix):
                 return False
             name = name[len(prefix):]
@@ -89,11 +89,11 @@ class Command:
         client_cmd_perm = self.client_cmd_perm
 
         if is_client_cmd:
-            cvar_client_cmd = minqlx.get_cvar("qlx_ccmd_perm_" + self.name[0])
+            cvar_client_cmd = minqlx.CVARS.get("qlx_ccmd_perm_" + self.name[0])
             if cvar_client_cmd:
                 client_cmd_perm = int(cvar_client_cmd)
         else:
-            cvar = minqlx.get_cvar("qlx_perm_" + self.name[0])
+            cvar = minqlx.CVARS.get("qlx_perm_" + self.name[0])
             if cvar:
                 perm = int(cvar)
 
@@ -114,6 +114,17 @@ class CommandInvoker:
     """
     def __init__(self):
         self._commands = ([], [], [], [], [])
+        self._generation = 0
+        self._names_generation = -1
+        self._names = ({}, {})
+
+    @property
+    def generation(self):
+        """A counter incremented whenever a command is added or removed, so that anything derived
+        from the registered commands can tell when it needs to be rebuilt.
+
+        """
+        return self._generation
 
     @property
     def commands(self):
@@ -128,6 +139,7 @@ class CommandInvoker:
             raise ValueError("Attempted to add an already registered command.")
 
         self._commands[priority].append(command)
+        self._generation += 1
 
     def remove_command(self, command):
         if not self.is_registered(command):
@@ -137,6 +149,7 @@ class CommandInvoker:
                 for cmd in priority_level:
                     if cmd == command:
                         priority_level.remove(cmd)
+                        self._generation += 1
                         return
 
     def is_registered(self, command):
@@ -152,6 +165,37 @@ class CommandInvoker:
 
         return False
 
+    def candidates(self, name):
+        """Get the commands that might be executed by input starting with a name, going by
+        the command names only. They are returned in the order they would be checked in.
+
+        """
+        if self._names_generation != self._generation:
+            # Commands by name, with their position for merging prefixed and unprefixed ones.
+            prefixed, unprefixed = {}, {}
+            for position, cmd in enumerate(self.commands):
+                names = prefixed if cmd.prefix else unprefixed
+                for cmd_name in set(cmd.name):
+                    names.setdefault(cmd_name, []).append((position, cmd))
+            self._names = (prefixed, unprefixed)
+            self._names_generation = self._generation
+
+        prefixed, unprefixed = self._names
+        candidates = unprefixed.get(name, [])
+        if prefixed:
+            prefix = minqlx.CVARS.get("qlx_commandPrefix")
+            if name.startswith(prefix) and name[len(prefix):] in prefixed:
+                candidates = sorted(candidates + prefixed[name[len(prefix):]], key=lambda candidate: candidate[0])
+
+        return [cmd for _, cmd in candidates]
+
+    def might_handle(self, msg):
+        """Check if input might execute a command, going by the command names only."""
+        if not msg.strip():
+            return False
+
+        return len(self.candidates(msg.strip().split(" ", 1)[0].lower())) > 0
+
     def handle_input(self, player, msg, channel):
         if not msg.strip():
             return
@@ -160,32 +204,31 @@ class CommandInvoker:
         is_client_cmd = channel == "client_command"
         pass_through = True
 
-        for priority_level in self._commands:
-            for cmd in priority_level:
-                if cmd.is_eligible_name(name) and cmd.is_eligible_channel(channel) and cmd.is_eligible_player(player, is_client_cmd):
-                    # Client commands will not pass through to the engine unless told to explicitly.
-                    # This is to avoid having to return RET_STOP_EVENT just to not get the "unknown cmd" msg.
-                    if is_client_cmd:
-                        pass_through = cmd.client_cmd_pass
-
-                    # Dispatch "command" and allow people to stop it from being executed.
-                    if minqlx.EVENT_DISPATCHERS["command"].dispatch(player, cmd, msg) is False:
-                        return True
-
-                    res = cmd.execute(player, msg, channel)
-                    if res == minqlx.RET_STOP:
-                        return
-                    elif res == minqlx.RET_STOP_EVENT:
-                        pass_through = False
-                    elif res == minqlx.RET_STOP_ALL:
-                        # C-level dispatchers expect False if it shouldn't go to the engine.
-                        return False
-                    elif res == minqlx.RET_USAGE and cmd.usage:
-                        channel.reply("^7Usage: ^6{} {}".format(name, cmd.usage))
-                    elif res is not None and res != minqlx.RET_NONE:
-                        logger = minqlx.get_logger(None)
-                        logger.warning("Command '{}' with handler '{}' returned an unknown return value: {}"
-                            .format(cmd.name, cmd.handler.__name__, res))
+        for cmd in self.candidates(name):
+            if cmd.is_eligible_name(name) and cmd.is_eligible_channel(channel) and cmd.is_eligible_player(player, is_client_cmd):
+                # Client commands will not pass through to the engine unless told to explicitly.
+                # This is to avoid having to return RET_STOP_EVENT just to not get the "unknown cmd" msg.
+                if is_client_cmd:
+                    pass_through = cmd.client_cmd_pass
+
+                # Dispatch "command" and allow people to stop it from being executed.
+                if minqlx.EVENT_DISPATCHERS["command"].dispatch(player, cmd, msg) is False:
+                    return True
+
+                res = cmd.execute(player, msg, channel)
+                if res == minqlx.RET_STOP:
+                    return
+                elif res == minqlx.RET_STOP_EVENT:
+                    pass_through = False
+                elif res == minqlx.RET_STOP_ALL:
+                    # C-level dispatchers expect False if it shouldn't go to the engine.
+                    return False
+                elif res == minqlx.RET_USAGE and cmd.usage:
+                    channel.reply("^7Usage: ^6{} {}".format(name, cmd.usage))
+                elif res is not None and res != minqlx.RET_NONE:
+                    logger = minqlx.get_logger(None)
+                    logger.warning("Command '{}' with handler '{}' returned an unknown return value: {}"
+                        .format(cmd.name, cmd.handler.__name__, res))
 
         return pass_through
 
@@ -275,7 +318,7 @@ class ChatChannel(AbstractChannel):
         self.team = "all"
 
     @minqlx.next_frame
-    def reply(self, msg, limit=100, delimiter=" "):
+    def reply(self, msg, limit=100, delimiter=" ", priority=minqlx.PRI_NORMAL):
         # We convert whatever we got to a string and replace all double quotes
         # to single quotes, since the engine doesn't support escaping them.
         # TODO: rcon can print quotes to clients using NET_OutOfBandPrint. Maybe we should too?
@@ -311,10 +354,10 @@ class ChatChannel(AbstractChannel):
 
         for s in joined_msgs:
             if not targets:
-                minqlx.send_server_command(None, self.fmt.format(last_color + s))
+                minqlx.outbound_messages.put(None, self.fmt, last_color + s, priority)
             else:
                 for cid in targets:
-                    minqlx.send_server_command(cid, self.fmt.format(last_color + s))
+                    minqlx.outbound_messages.put(cid, self.fmt, last_color + s, priority)
 
             find = re_color_tag.findall(s)
             if find:
@@ -27,6 +27,7 @@ import subprocess
 import threading
 import traceback
 import importlib
+import functools
 import datetime
 import os.path
 import logging
@@ -95,6 +96,20 @@ def parse_variables(varstr, ordered=False):
 
     return res
 
+@functools.lru_cache(maxsize=128)
+def _parse_userinfo(varstr):
+    return parse_variables(varstr, ordered=True)
+
+def parse_userinfo(varstr):
+    """Parses a userinfo string like :func:`parse_variables` does, keeping the order of the variables.
+    Clients keep sending the same userinfo, so the parsed userinfo strings are cached.
+
+    :param varstr: The userinfo string.
+    :type varstr: str
+    :returns: collections.OrderedDict -- A copy of the parsed variables, free to be modified.
+    """
+    return _parse_userinfo(varstr).copy()
+
 main_logger = None
 
 def get_logger(plugin=None):
@@ -168,7 +183,7 @@ def uptime():
 def owner():
     """Returns the SteamID64 of the owner. This is set in the config."""
     try:
-        sid = int(minqlx.get_cvar("qlx_owner"))
+        sid = CVARS.get("qlx_owner", int)
         if sid == -1:
             raise RuntimeError
         return sid
@@ -182,9 +197,157 @@ def stats_listener():
     """Returns the :class:`minqlx.StatsListener` instance used to listen for stats."""
     return _stats
 
+def parse_cvar(value, return_type=str):
+    """Parses the value of a cvar into the given type.
+
+    :param value: The value of the cvar.
+    :type value: str
+    :param return_type: The type the cvar should be returned in.
+        Supported types: str, int, float, bool, list, set, tuple
+    :raises: ValueError
+
+    """
+    if return_type == str:
+        return value
+    elif return_type == int:
+        return int(value)
+    elif return_type == float:
+        return float(value)
+    elif return_type == bool:
+        return bool(int(value))
+    elif return_type == list:
+        return [s.strip() for s in value.split(",")]
+    elif return_type == set:
+        return {s.strip() for s in value.split(",")}
+    elif return_type == tuple:
+        return tuple([s.strip() for s in value.split(",")])
+    else:
+        raise ValueError("Invalid return type: {}".format(return_type))
+
+class CvarCache:
+    """Caches the values of cvars parsed to the types they are read as, so that hot paths do not
+    have to go through the C API and parse them on every call.
+
+    Every cvar read through the cache is watched for changes. Cvars set through :meth:`minqlx.Plugin.set_cvar`
+    are checked on the next frame, and the others are checked round-robin, *checks_per_frame* of them per
+    frame, and all of them on a new game. Changed cvars drop their cached values and dispatch the
+    ``cvar_changed`` event, so plugins can update what they derived from them instead of re-reading them.
+
+    """
+    def __init__(self, checks_per_frame=4):
+        self.checks_per_frame = checks_per_frame
+        self._lock = threading.Lock()
+        # The parsed values by name and type.
+        self._parsed = {}
+        # The last value seen for each watched cvar, to detect changes.
+        self._watched = {}
+        self._watched_names = []
+        self._next_check = 0
+        self._set = set()
+
+    def get(self, name, return_type=str):
+        """Gets the value of a cvar parsed to the given type. See :func:`minqlx.parse_cvar`."""
+        parsed = self._parsed.get(name)
+        if parsed is not None and return_type in parsed:
+            value = parsed[return_type]
+        else:
+            value = self._read(name, return_type)
+
+        # Do not hand out the cached containers themselves, callers might modify them.
+        if return_type == list:
+            return list(value)
+        elif return_type == set:
+            return set(value)
+        return value
+
+    def _read(self, name, return_type):
+        value = minqlx.get_cvar(name)
+        parsed_value = parse_cvar(value, return_type)
+        with self._lock:
+            if name not in self._watched:
+                self._watched[name] = value
+                self._watched_names.append(name)
+            # Only cache values that are still current, the cvar might have changed since.
+            if self._watched[name] == value:
+                self._parsed.setdefault(name, {})[return_type] = parsed_value
+        return parsed_value
+
+    def watch(self, name):
+        """Watches a cvar for changes without reading it, i.e. to only get ``cvar_changed`` events for it."""
+        value = minqlx.get_cvar(name)
+        with self._lock:
+            if name not in self._watched:
+                self._watched[name] = value
+                self._watched_names.append(name)
+
+    def invalidate(self, name):
+        """Drops the cached values of a cvar that has been set, and checks it for changes on the next frame."""
+        with self._lock:
+            self._parsed.pop(name, None)
+            if name in self._watched:
+                self._set.add(name)
+
+    def clear(self):
+        """Drops all cached values and stops watching all cvars."""
+        with self._lock:
+            self._parsed.clear()
+            self._watched.clear()
+            self._watched_names.clear()
+            self._next_check = 0
+            self._set.clear()
+
+    def check(self, name):
+        """Checks a watched cvar for changes and dispatches ``cvar_changed`` if it changed.
+        Must be called from the main thread.
+
+        :returns: bool -- True if the cvar changed, False otherwise.
+
+        """
+        value = minqlx.get_cvar(name)
+        with self._lock:
+            if name not in self._watched:
+                return False
+            old_value = self._watched[name]
+            if old_value == value:
+                return False
+            self._watched[name] = value
+            self._parsed.pop(name, None)
+
+        minqlx.EVENT_DISPATCHERS["cvar_changed"].dispatch(name, old_value, value)
+        return True
+
+    def check_pending(self):
+        """Checks the cvars set since the last frame, and the next *checks_per_frame* watched cvars.
+        Must be called from the main thread.
+
+        """
+        with self._lock:
+            names = list(self._set)
+            self._set.clear()
+            amount_watched = len(self._watched_names)
+            for _ in range(min(self.checks_per_frame, amount_watched)):
+                self._next_check %= amount_watched
+                names.append(self._watched_names[self._next_check])
+                self._next_check += 1
+
+        for name in names:
+            self.check(name)
+
+    def check_all(self):
+        """Checks all watched cvars for changes. Must be called from the main thread."""
+        with self._lock:
+            names = list(self._watched_names)
+            self._set.clear()
+
+        for name in names:
+            self.check(name)
+
+CVARS = CvarCache()
+
 def set_cvar_once(name, value, flags=0):
     if minqlx.get_cvar(name) is None:
         minqlx.set_cvar(name, value, flags)
+        CVARS.invalidate(name)
         return True
 
     return False
@@ -192,6 +355,7 @@ def set_cvar_once(name, value, flags=0):
 def set_cvar_limit_once(name, value, minimum, maximum, flags=0):
     if minqlx.get_cvar(name) is None:
         minqlx.set_cvar_limit(name, value, minimum, maximum, flags)
+        CVARS.invalidate(name)
         return True
 
     return False
@@ -420,6 +584,8 @@ def initialize_cvars():
     minqlx.set_cvar_once("qlx_redisDatabase", "0")
     minqlx.set_cvar_once("qlx_redisUnixSocket", "0")
     minqlx.set_cvar_once("qlx_redisPassword", "")
+    # Stats
+    minqlx.set_cvar_once("qlx_statsRecording", "")
 
 
 # ====================================================================
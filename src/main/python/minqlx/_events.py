@@ -17,6 +17,9 @@
 # along with minqlx. If not, see <http://www.gnu.org/licenses/>.
 
 import minqlx
+import collections
+import threading
+import time
 import re
 
 _re_vote = re.compile(r"^(?P<cmd>[^ ]+)(?: \"?(?P<args>.*?)\"?)?$")
@@ -493,6 +496,15 @@ class RoundEndDispatcher(EventDispatcher):
     def dispatch(self, data):
         return super().dispatch(data)
 
+class LastStandingDispatcher(EventDispatcher):
+    """Event that goes off when a team is down to its last player during a round, while the other
+    team still has players alive."""
+    name = "last_standing"
+    need_zmq_stats_enabled = True
+
+    def dispatch(self, player):
+        return super().dispatch(player)
+
 class TeamSwitchDispatcher(EventDispatcher):
     """For when a player switches teams. If cancelled,
     simply put the player back in the old team.
@@ -535,6 +547,14 @@ class NewGameDispatcher(EventDispatcher):
     def dispatch(self):
         return super().dispatch()
 
+class CvarChangedDispatcher(EventDispatcher):
+    """Event that goes off when a cvar watched by :class:`minqlx.CvarCache` changed its value,
+    i.e. one that was read through :meth:`minqlx.Plugin.get_cvar`."""
+    name = "cvar_changed"
+
+    def dispatch(self, name, old_value, new_value):
+        return super().dispatch(name, old_value, new_value)
+
 class KillDispatcher(EventDispatcher):
     """Event that goes off when someone is killed."""
     name = "kill"
@@ -635,12 +655,154 @@ EVENT_DISPATCHERS.add_dispatcher(GameEndDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(RoundCountdownDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(RoundStartDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(RoundEndDispatcher)
+EVENT_DISPATCHERS.add_dispatcher(LastStandingDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(TeamSwitchDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(TeamSwitchAttemptDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(MapDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(NewGameDispatcher)
+EVENT_DISPATCHERS.add_dispatcher(CvarChangedDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(KillDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(DeathDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(UserinfoDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(PlayerInactivityKickDispatcher)
 EVENT_DISPATCHERS.add_dispatcher(PlayerInactivityKickWarningDispatcher)
+
+# ====================================================================
+#                            EVENT STREAM
+# ====================================================================
+
+class ServerEvent:
+    """An event published to the :class:`ServerEventStream`.
+
+    :param sequence: The position of the event in the stream.
+    :type sequence: int
+    :param type: The type of the event, i.e. "player_connect", "player_disconnect" or "map".
+    :type type: str
+    :param data: The event's data. Only immutable copies of game data are kept, since the event
+        is read outside the main thread.
+    :type data: dict
+
+    """
+    __slots__ = ("sequence", "type", "time", "data")
+
+    def __init__(self, sequence, type, data):
+        self.sequence = sequence
+        self.type = type
+        self.time = time.time()
+        self.data = data
+
+    def __repr__(self):
+        return "ServerEvent({}, {}, {})".format(self.sequence, self.type, self.data)
+
+class ServerEventStream:
+    """A thread-safe, append-only stream of server events such as players connecting and
+    disconnecting, and map changes. Events are published on the main thread, and can be read
+    from any thread through a :class:`ServerEventCursor`, so that consumers outside the main
+    thread do not need to poll snapshots of the game state.
+
+    The stream only keeps the most recent events. Cursors falling behind further than that
+    skip the lost events, and count them in :attr:`ServerEventCursor.lost`.
+
+    Listeners are called on the main thread with every published event. They should do nothing
+    but waking up their consumer, i.e. through ``loop.call_soon_threadsafe``.
+
+    """
+    def __init__(self, maxlen=1024):
+        self._lock = threading.Lock()
+        self._events = collections.deque(maxlen=maxlen)
+        self._next_sequence = 0
+        self._listeners = []
+
+    @property
+    def next_sequence(self):
+        return self._next_sequence
+
+    def publish(self, type, **data):
+        """Appends an event to the stream and calls the listeners.
+
+        :param type: The type of the event.
+        :type type: str
+        :returns: minqlx.ServerEvent -- The published event.
+
+        """
+        with self._lock:
+            event = ServerEvent(self._next_sequence, type, data)
+            self._events.append(event)
+            self._next_sequence += 1
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(event)
+            except:
+                minqlx.log_exception()
+
+        return event
+
+    def read(self, sequence):
+        """Reads the events from the given sequence on.
+
+        :param sequence: The sequence of the first event to read.
+        :type sequence: int
+        :returns: tuple -- The events read, the sequence to continue reading from, and the amount
+            of events that were lost, because they were dropped from the stream already.
+
+        """
+        with self._lock:
+            next_sequence = self._next_sequence
+            if sequence >= next_sequence:
+                return [], next_sequence, 0
+
+            oldest = next_sequence - len(self._events)
+            lost = max(0, oldest - sequence)
+            # Events are numbered consecutively, so the first unread one is found by its offset.
+            first = max(sequence, oldest) - oldest
+            events = [self._events[i] for i in range(first, len(self._events))]
+
+        return events, next_sequence, lost
+
+    def cursor(self, from_start=False):
+        """Creates a cursor reading the stream.
+
+        :param from_start: Whether to read the events still kept in the stream, or only the ones
+            published from now on.
+        :type from_start: bool
+        :returns: minqlx.ServerEventCursor
+
+        """
+        with self._lock:
+            sequence = self._next_sequence - len(self._events) if from_start else self._next_sequence
+
+        return ServerEventCursor(self, sequence)
+
+    def add_listener(self, listener):
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+class ServerEventCursor:
+    """A reading position in a :class:`ServerEventStream`. A cursor should only be used by a
+    single consumer.
+
+    """
+    def __init__(self, stream, sequence):
+        self.stream = stream
+        self.sequence = sequence
+        self.lost = 0
+
+    def read(self):
+        """Reads the events published since the last read.
+
+        :returns: list -- The new events.
+
+        """
+        events, self.sequence, lost = self.stream.read(self.sequence)
+        self.lost += lost
+        return events
+
+SERVER_EVENTS = ServerEventStream()
@@ -21,6 +21,7 @@
 # it later so that it can be accessed with minqlx.__doc__ by Sphinx.
 
 import minqlx
+import collections
 
 class NonexistentGameError(Exception):
     """An exception raised when accessing properties on an invalid game."""
@@ -419,3 +420,262 @@ class Game():
     @classmethod
     def setmatchtime(cls, time):
         return minqlx.console_command("setmatchtime {}".format(time))
+
+# ====================================================================
+#                             ROUND STATS
+# ====================================================================
+
+class RoundStats:
+    """The damage dealt and score of the players on the red and blue team during a single round.
+
+    Players are snapshotted once when the round starts, and once more when it ends, so that the
+    deltas of ended rounds are looked up without touching the game. Players joining during the
+    round are not part of it.
+
+    :param round_number: The number of the round.
+    :type round_number: int
+    :param snapshot: The client ID, team, damage dealt and score of the players keyed by their
+        Steam ID, when the round started.
+    :type snapshot: dict
+
+    """
+    __slots__ = ("round_number", "start", "ended", "damage", "score", "team_damage")
+
+    def __init__(self, round_number, snapshot):
+        self.round_number = round_number
+        self.start = snapshot
+        self.ended = False
+        self.damage = {}
+        self.score = {}
+        self.team_damage = {"red": 0, "blue": 0}
+
+    def __repr__(self):
+        return "RoundStats({}, ended={})".format(self.round_number, self.ended)
+
+    def end(self, snapshot):
+        """Calculates the deltas of the players still around at the end of the round.
+
+        :param snapshot: The snapshot of the players at the end of the round.
+        :type snapshot: dict
+
+        """
+        for steam_id, (_, team, damage_dealt, score) in self.start.items():
+            if steam_id not in snapshot:
+                continue
+
+            _, _, end_damage_dealt, end_score = snapshot[steam_id]
+            self.damage[steam_id] = end_damage_dealt - damage_dealt
+            self.score[steam_id] = end_score - score
+            self.team_damage[team] += self.damage[steam_id]
+
+        self.ended = True
+
+    def team_of(self, steam_id):
+        if steam_id not in self.start:
+            return None
+
+        return self.start[steam_id][1]
+
+    def damage_of(self, steam_id):
+        """The damage dealt by a player during the round. While the round is still going on,
+        the damage is read from the player's current stats.
+
+        """
+        if self.ended:
+            return self.damage.get(steam_id, 0)
+
+        if steam_id not in self.start:
+            return 0
+
+        client_id, _, damage_dealt, _ = self.start[steam_id]
+        info = minqlx.player_info(client_id)
+        # The client ID might have been taken over by someone else in the meantime.
+        if not info or info.steam_id != steam_id:
+            return 0
+
+        return minqlx.player_stats(client_id).damage_dealt - damage_dealt
+
+    def score_of(self, steam_id):
+        return self.score.get(steam_id, 0)
+
+class RoundStatsTracker:
+    """Keeps the :class:`RoundStats` of the most recent rounds in a ring buffer, so that plugins
+    share a single snapshot of the players per round boundary instead of taking their own.
+
+    The core handlers start a round right before dispatching the ``round_start`` event, and end it
+    right before dispatching ``round_end``, so plugins hooking those events already see the round's
+    stats. Ending rounds requires ZMQ stats to be enabled.
+
+    """
+    def __init__(self, maxlen=16):
+        self._rounds = collections.deque(maxlen=maxlen)
+
+    @staticmethod
+    def snapshot():
+        returned = {}
+        for info in minqlx.players_info():
+            if not info or info.team not in (minqlx.TEAM_RED, minqlx.TEAM_BLUE):
+                continue
+
+            stats = minqlx.player_stats(info.client_id)
+            if not stats:
+                continue
+
+            returned[info.steam_id] = (info.client_id, minqlx.TEAMS[info.team], stats.damage_dealt, stats.score)
+
+        return returned
+
+    def start_round(self, round_number):
+        self._rounds.append(RoundStats(round_number, self.snapshot()))
+
+    def end_round(self):
+        current = self.current_round()
+        if current is None or current.ended:
+            return
+
+        current.end(self.snapshot())
+
+    def reset(self):
+        self._rounds.clear()
+
+    def current_round(self):
+        """The most recently started round, whether it has ended already or not.
+
+        :returns: minqlx.RoundStats -- The round, or None if no round was started in this game.
+
+        """
+        if not self._rounds:
+            return None
+
+        return self._rounds[-1]
+
+    def last_rounds(self, amount):
+        """The most recent ended rounds, newest first.
+
+        :param amount: The amount of rounds. At most the size of the ring buffer are kept.
+        :type amount: int
+        :returns: list -- The :class:`RoundStats` of the rounds.
+
+        """
+        returned = []
+        for round_stats in reversed(self._rounds):
+            if len(returned) >= amount:
+                break
+            if round_stats.ended:
+                returned.append(round_stats)
+
+        return returned
+
+    def damage_this_round(self, steam_id):
+        current = self.current_round()
+        if current is None:
+            return 0
+
+        return current.damage_of(steam_id)
+
+    def damage_last_rounds(self, steam_id, amount):
+        return sum(round_stats.damage_of(steam_id) for round_stats in self.last_rounds(amount))
+
+    def team_damage_last_rounds(self, team, amount):
+        return sum(round_stats.team_damage[team] for round_stats in self.last_rounds(amount))
+
+ROUND_STATS = RoundStatsTracker()
+
+# ====================================================================
+#                            ALIVE PLAYERS
+# ====================================================================
+
+class AlivePlayerTracker:
+    """Keeps the players alive on the red and blue team during a round, so that plugins do not
+    need to walk the teams and read every player's state to find out who is still standing.
+
+    The core handlers rescan the players when a round starts, and keep the counts up to date on
+    spawns, deaths, team switches and disconnects. Whenever a team is down to its last player
+    while the other team still has players alive, the ``last_standing`` event goes off with the
+    survivor, at most once per team and round. Deaths and team switches are only reported with
+    ZMQ stats enabled.
+
+    """
+    def __init__(self):
+        # Client IDs of the alive players mapped to their Steam IDs. Bots share Steam IDs.
+        self._alive = {"red": {}, "blue": {}}
+        self._in_round = False
+        self._announced = set()
+
+    def start_round(self):
+        self._in_round = True
+        self._announced = set()
+        self._alive = {"red": {}, "blue": {}}
+        for info in minqlx.players_info():
+            if not info or info.team not in (minqlx.TEAM_RED, minqlx.TEAM_BLUE):
+                continue
+
+            state = minqlx.player_state(info.client_id)
+            if state and state.is_alive:
+                self._alive[minqlx.TEAMS[info.team]][info.client_id] = info.steam_id
+
+    def end_round(self):
+        self._in_round = False
+
+    def reset(self):
+        self._in_round = False
+        self._announced = set()
+        self._alive = {"red": {}, "blue": {}}
+
+    @property
+    def in_round(self):
+        return self._in_round
+
+    def spawn(self, player):
+        if player.team not in self._alive:
+            return
+
+        self.remove(player)
+        self._alive[player.team][player.id] = player.steam_id
+
+    def remove(self, player):
+        for alive in self._alive.values():
+            alive.pop(player.id, None)
+
+    def alive_count(self, team):
+        if team not in self._alive:
+            return 0
+
+        return len(self._alive[team])
+
+    def alive_steam_ids(self, team):
+        if team not in self._alive:
+            return []
+
+        return list(self._alive[team].values())
+
+    def alive_players(self, team):
+        """The players alive on the given team.
+
+        :param team: The team, i.e. "red" or "blue".
+        :type team: str
+        :returns: list -- The :class:`minqlx.Player` objects of the alive players.
+
+        """
+        if team not in self._alive:
+            return []
+
+        return [minqlx.Player(client_id) for client_id in self._alive[team]]
+
+    def announce_last_standing(self):
+        """Dispatches the ``last_standing`` event for every team that got down to its last player
+        since the last call.
+
+        """
+        if not self._in_round:
+            return
+
+        for team, other_team in (("red", "blue"), ("blue", "red")):
+            if team in self._announced or len(self._alive[team]) != 1 or not self._alive[other_team]:
+                continue
+
+            self._announced.add(team)
+            client_id = next(iter(self._alive[team]))
+            minqlx.EVENT_DISPATCHERS["last_standing"].dispatch(minqlx.Player(client_id))
+
+ALIVE_PLAYERS = AlivePlayerTracker()
@@ -18,6 +18,9 @@
 
 import minqlx
 import collections
+import concurrent.futures
+import threading
+import time
 import sched
 import re
 
@@ -25,13 +28,8 @@ import re
 #                        REGULAR EXPRESSIONS
 # ====================================================================
 
-_re_say = re.compile(r"^say +\"?(?P<msg>.+)\"?$", flags=re.IGNORECASE)
-_re_say_team = re.compile(r"^say_team +\"?(?P<msg>.+)\"?$", flags=re.IGNORECASE)
 _re_callvote = re.compile(r"^(?:cv|callvote) +(?P<cmd>[^ ]+)(?: \"?(?P<args>.+?)\"?)?$", flags=re.IGNORECASE)
-_re_vote = re.compile(r"^vote +(?P<arg>.)", flags=re.IGNORECASE)
-_re_team = re.compile(r"^team +(?P<arg>.)", flags=re.IGNORECASE)
 _re_vote_ended = re.compile(r"^print \"Vote (?P<result>passed|failed).\n\"$")
-_re_userinfo = re.compile(r"^userinfo \"(?P<vars>.+)\"$")
 
 # ====================================================================
 #                         LOW-LEVEL HANDLERS
@@ -62,105 +60,153 @@ def handle_client_command(client_id, cmd):
 
     """
     try:
-        # Dispatch the "client_command" event before further processing.
-        player = minqlx.Player(client_id)
-        retval = minqlx.EVENT_DISPATCHERS["client_command"].dispatch(player, cmd)
-        if retval is False:
-            return False
-        elif isinstance(retval, str):
-            # Allow plugins to modify the command before passing it on.
-            cmd = retval
+        # Most client commands are of no interest to any plugin, so the player is
+        # only looked up once an event is actually dispatched.
+        player = None
 
-        res = _re_say.match(cmd)
-        if res:
-            msg = res.group("msg").replace("\"", "")
-            channel = minqlx.CHAT_CHANNEL
-            if minqlx.EVENT_DISPATCHERS["chat"].dispatch(player, msg, channel) is False:
+        # Dispatch the "client_command" event before further processing.
+        dispatcher = minqlx.EVENT_DISPATCHERS["client_command"]
+        if dispatcher.plugins or minqlx.COMMANDS.might_handle(cmd):
+            player = minqlx.Player(client_id)
+            retval = dispatcher.dispatch(player, cmd)
+            if retval is False:
                 return False
-            return cmd
+            elif isinstance(retval, str):
+                # Allow plugins to modify the command before passing it on.
+                cmd = retval
 
-        res = _re_say_team.match(cmd)
-        if res:
-            msg = res.group("msg").replace("\"", "")
-            if player.team == "free": # I haven't tried this, but I don't think it's even possible.
-                channel = minqlx.FREE_CHAT_CHANNEL
-            elif player.team == "red":
-                channel = minqlx.RED_TEAM_CHAT_CHANNEL
-            elif player.team == "blue":
-                channel = minqlx.BLUE_TEAM_CHAT_CHANNEL
-            else:
-                channel = minqlx.SPECTATOR_CHAT_CHANNEL
-            if minqlx.EVENT_DISPATCHERS["chat"].dispatch(player, msg, channel) is False:
-                return False
+        name, _, args = cmd.partition(" ")
+        parser = _client_command_parsers.get(name.lower())
+        if parser is None:
             return cmd
 
-        res = _re_callvote.match(cmd)
-        if res and not minqlx.Plugin.is_vote_active():
-            vote = res.group("cmd")
-            args = res.group("args") if res.group("args") else ""
-            # Set the caller for vote_started in case the vote goes through.
-            minqlx.EVENT_DISPATCHERS["vote_started"].caller(player)
-            if minqlx.EVENT_DISPATCHERS["vote_called"].dispatch(player, vote, args) is False:
-                return False
-            return cmd
+        return parser(client_id, player, cmd, args)
+    except:
+        minqlx.log_exception()
+        return True
 
-        res = _re_vote.match(cmd)
-        if res and minqlx.Plugin.is_vote_active():
-            arg = res.group("arg").lower()
-            if arg == "y" or arg == "1":
-                if minqlx.EVENT_DISPATCHERS["vote"].dispatch(player, True) is False:
-                    return False
-            elif arg == "n" or arg == "2":
-                if minqlx.EVENT_DISPATCHERS["vote"].dispatch(player, False) is False:
-                    return False
-            return cmd
+def _parse_say(client_id, player, cmd, args):
+    # A message of nothing but spaces is passed on as a single space.
+    msg = args.lstrip(" ") or args[-1:]
+    if not msg:
+        return cmd
 
-        res = _re_team.match(cmd)
-        if res:
-            arg = res.group("arg").lower()
-            target_team = ""
-            if arg == player.team[0]:
-                # Don't trigger if player is joining the same team.
-                return cmd
-            elif arg == "f":
-                target_team = "free"
-            elif arg == "r":
-                target_team = "red"
-            elif arg == "b":
-                target_team = "blue"
-            elif arg == "s":
-                target_team = "spectator"
-            elif arg == "a":
-                target_team = "any"
-
-            if target_team:
-                if minqlx.EVENT_DISPATCHERS["team_switch_attempt"].dispatch(player, player.team, target_team) is False:
-                    return False
-            return cmd
+    if player is None:
+        player = minqlx.Player(client_id)
+    if minqlx.EVENT_DISPATCHERS["chat"].dispatch(player, msg.replace("\"", ""), minqlx.CHAT_CHANNEL) is False:
+        return False
+    return cmd
+
+def _parse_say_team(client_id, player, cmd, args):
+    # A message of nothing but spaces is passed on as a single space.
+    msg = args.lstrip(" ") or args[-1:]
+    if not msg:
+        return cmd
 
-        res = _re_userinfo.match(cmd)
-        if res:
-            new_info = minqlx.parse_variables(res.group("vars"), ordered=True)
-            old_info = player.cvars
-            changed = {}
-
-            for key in new_info:
-                if key not in old_info or (key in old_info and new_info[key] != old_info[key]):
-                    changed[key] = new_info[key]
-
-            if changed:
-                ret = minqlx.EVENT_DISPATCHERS["userinfo"].dispatch(player, changed)
-                if ret is False:
-                    return False
-                elif isinstance(ret, dict):
-                    for key in ret:
-                        new_info[key] = ret[key]
-                    cmd = "userinfo \"{}\"".format("".join(["\\{}\\{}".format(key, new_info[key]) for key in new_info]))
+    if player is None:
+        player = minqlx.Player(client_id)
+    if player.team == "free": # I haven't tried this, but I don't think it's even possible.
+        channel = minqlx.FREE_CHAT_CHANNEL
+    elif player.team == "red":
+        channel = minqlx.RED_TEAM_CHAT_CHANNEL
+    elif player.team == "blue":
+        channel = minqlx.BLUE_TEAM_CHAT_CHANNEL
+    else:
+        channel = minqlx.SPECTATOR_CHAT_CHANNEL
+    if minqlx.EVENT_DISPATCHERS["chat"].dispatch(player, msg.replace("\"", ""), channel) is False:
+        return False
+    return cmd
+
+def _parse_callvote(client_id, player, cmd, args):
+    res = _re_callvote.match(cmd)
+    if not res or minqlx.Plugin.is_vote_active():
+        return cmd
 
+    if player is None:
+        player = minqlx.Player(client_id)
+    vote = res.group("cmd")
+    args = res.group("args") if res.group("args") else ""
+    # Set the caller for vote_started in case the vote goes through.
+    minqlx.EVENT_DISPATCHERS["vote_started"].caller(player)
+    if minqlx.EVENT_DISPATCHERS["vote_called"].dispatch(player, vote, args) is False:
+        return False
+    return cmd
+
+def _parse_vote(client_id, player, cmd, args):
+    arg = args.lstrip(" ")[:1].lower()
+    if not arg or not minqlx.Plugin.is_vote_active():
         return cmd
-    except:
-        minqlx.log_exception()
-        return True
+
+    if arg == "y" or arg == "1":
+        yes = True
+    elif arg == "n" or arg == "2":
+        yes = False
+    else:
+        return cmd
+
+    if player is None:
+        player = minqlx.Player(client_id)
+    if minqlx.EVENT_DISPATCHERS["vote"].dispatch(player, yes) is False:
+        return False
+    return cmd
+
+_team_switch_targets = {"f": "free", "r": "red", "b": "blue", "s": "spectator", "a": "any"}
+
+def _parse_team(client_id, player, cmd, args):
+    arg = args.lstrip(" ")[:1].lower()
+    if not arg:
+        return cmd
+
+    if player is None:
+        player = minqlx.Player(client_id)
+    if arg == player.team[0]:
+        # Don't trigger if player is joining the same team.
+        return cmd
+
+    target_team = _team_switch_targets.get(arg)
+    if target_team:
+        if minqlx.EVENT_DISPATCHERS["team_switch_attempt"].dispatch(player, player.team, target_team) is False:
+            return False
+    return cmd
+
+def _parse_userinfo(client_id, player, cmd, args):
+    # Unlike the other commands, userinfo is case-sensitive and needs its variables quoted.
+    if len(cmd) < 12 or not cmd.startswith("userinfo \"") or not cmd.endswith("\""):
+        return cmd
+
+    # Clients send their userinfo a lot, so don't bother parsing it if nobody is interested.
+    dispatcher = minqlx.EVENT_DISPATCHERS["userinfo"]
+    if not dispatcher.plugins:
+        return cmd
+
+    if player is None:
+        player = minqlx.Player(client_id)
+    # Parsed userinfo is cached, so the old one, being the previously sent new one, is not parsed again.
+    new_info = minqlx.parse_userinfo(cmd[10:-1])
+    old_info = player.cvars
+    changed = {key: value for key, value in new_info.items() if old_info.get(key) != value}
+
+    if changed:
+        ret = dispatcher.dispatch(player, changed)
+        if ret is False:
+            return False
+        elif isinstance(ret, dict):
+            for key in ret:
+                new_info[key] = ret[key]
+            cmd = "userinfo \"{}\"".format("".join(["\\{}\\{}".format(key, new_info[key]) for key in new_info]))
+
+    return cmd
+
+# The client commands events are dispatched for, by their lowercase first token.
+_client_command_parsers = {
+    "say": _parse_say,
+    "say_team": _parse_say_team,
+    "cv": _parse_callvote,
+    "callvote": _parse_callvote,
+    "vote": _parse_vote,
+    "team": _parse_team,
+    "userinfo": _parse_userinfo,
+}
 
 def handle_server_command(client_id, cmd):
     try:
@@ -194,10 +240,239 @@ def handle_server_command(client_id, cmd):
 frame_tasks = sched.scheduler()
 next_frame_tasks = collections.deque()
 
+class MainThreadQueueFullError(Exception):
+    """Set on the future of a job submitted to a full :class:`MainThreadJobQueue`."""
+    pass
+
+class MainThreadJobQueue:
+    """A bounded queue of jobs other threads want to have run on the main thread, i.e. to
+    safely access the game state from the discord bot's event loop. Unlike with
+    :func:`minqlx.next_frame`, the submitting thread gets a future for the result of the job.
+
+    Jobs are run right before a frame, at most *jobs_per_frame* of them per frame, so that a
+    burst of jobs does not stall the server. When the queue is full, new jobs are rejected
+    with a :class:`MainThreadQueueFullError` set on their future, so the submitting thread
+    never blocks.
+
+    """
+    def __init__(self, maxsize=256, jobs_per_frame=16):
+        self.maxsize = maxsize
+        self.jobs_per_frame = jobs_per_frame
+        self._lock = threading.Lock()
+        self._jobs = collections.deque()
+
+        self.completed = 0
+        self.rejected = 0
+        self.latencies = collections.deque(maxlen=100)
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def submit(self, func, *args, **kwargs):
+        """Submits a job to be run on the main thread. This may be called from any thread.
+
+        :param func: The function to run.
+        :type func: callable
+        :returns: concurrent.futures.Future -- The future for the result of the function.
+
+        """
+        future = concurrent.futures.Future()
+        with self._lock:
+            if len(self._jobs) >= self.maxsize:
+                self.rejected += 1
+                future.set_exception(MainThreadQueueFullError(
+                    "{} jobs are already waiting for the main thread.".format(len(self._jobs))))
+                return future
+            self._jobs.append((time.monotonic(), future, func, args, kwargs))
+
+        return future
+
+    def run_pending(self):
+        """Runs the jobs waiting, up to *jobs_per_frame* of them. Must be called from the main thread."""
+        for _ in range(self.jobs_per_frame):
+            with self._lock:
+                if not self._jobs:
+                    return
+                submitted, future, func, args, kwargs = self._jobs.popleft()
+
+            # The submitting thread might have cancelled the job in the meantime.
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            self.latencies.append(time.monotonic() - submitted)
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            self.completed += 1
+
+    def status(self):
+        if self.latencies:
+            latency = "avg {:.1f}ms, max {:.1f}ms".format(
+                sum(self.latencies) / len(self.latencies) * 1000, max(self.latencies) * 1000)
+        else:
+            latency = "n/a"
+        return "main thread: {} queued, {} completed, {} rejected, latency {}".format(
+            len(self), self.completed, self.rejected, latency)
+
+main_thread_jobs = MainThreadJobQueue()
+
+def run_in_main_thread(func, *args, **kwargs):
+    """Runs a function on the main thread right before one of the next frames.
+    See :class:`MainThreadJobQueue`.
+
+    :param func: The function to run.
+    :type func: callable
+    :returns: concurrent.futures.Future -- The future for the result of the function.
+        Coroutines can await it through :func:`asyncio.wrap_future`.
+
+    """
+    return main_thread_jobs.submit(func, *args, **kwargs)
+
+class OutboundMessageQueue:
+    """A bounded queue of the chat messages, tells and center prints sent to the clients. Sending
+    a burst of them at once can overflow the clients' reliable command buffers, which gets them
+    kicked with a "Server command overflow", and makes the frame sending them take longer.
+
+    Messages are sent right before a frame, at most *commands_per_frame* server commands in total,
+    and at most *client_commands_per_frame* to any single client, messages to everyone counting
+    against every client. Messages with a higher priority are sent first. Messages reach each
+    client in the order they were queued within a priority, and adjacent prints to the same
+    recipient are merged into a single server command as long as they fit.
+
+    When the queue is full, new messages are dropped.
+
+    """
+    def __init__(self, maxsize=1024, commands_per_frame=32, client_commands_per_frame=4):
+        self.maxsize = maxsize
+        self.commands_per_frame = commands_per_frame
+        self.client_commands_per_frame = client_commands_per_frame
+        self._lock = threading.Lock()
+        # One queue per priority, from minqlx.PRI_HIGHEST to minqlx.PRI_LOWEST.
+        self._queues = tuple(collections.deque() for _ in range(minqlx.PRI_LOWEST + 1))
+        self._size = 0
+
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def __len__(self):
+        return self._size
+
+    def put(self, client_id, fmt, text, priority=minqlx.PRI_NORMAL):
+        """Queues a server command for a client. This may be called from any thread.
+
+        :param client_id: The client identifier of the recipient, or None to send it to everyone.
+        :type client_id: int
+        :param fmt: The format of the server command, i.e. ``print "{}\\n"\\n``.
+        :type fmt: str
+        :param text: The text formatted into the server command.
+        :type text: str
+        :param priority: The priority of the message, one of the minqlx.PRI_* constants.
+        :type priority: int
+        :returns: bool -- True if the message was queued, False if it was dropped.
+
+        """
+        with self._lock:
+            if self._size >= self.maxsize:
+                self.dropped += 1
+                return False
+            self._queues[priority].append((client_id, fmt, text))
+            self._size += 1
+
+        return True
+
+    def discard_client(self, client_id):
+        """Discards the messages still queued for a client, i.e. because it disconnected."""
+        with self._lock:
+            for queue in self._queues:
+                kept = [entry for entry in queue if entry[0] != client_id]
+                self._size -= len(queue) - len(kept)
+                queue.clear()
+                queue.extend(kept)
+
+    def send_pending(self):
+        """Sends the queued messages within this frame's budgets. Must be called from the main thread."""
+        total = 0
+        broadcasts = 0
+        per_client = collections.Counter()
+        # Recipients with messages deferred to the next frame. Later messages to them are deferred as
+        # well, so that they do not overtake. A deferred broadcast defers everything after it.
+        deferred_clients = set()
+        deferred_all = False
+
+        for queue in self._queues:
+            with self._lock:
+                entries = list(queue)
+                queue.clear()
+            if not entries:
+                continue
+
+            deferred = []
+            i = 0
+            try:
+                while i < len(entries):
+                    client_id, fmt, text = entries[i]
+                    i += 1
+                    if deferred_all or total >= self.commands_per_frame:
+                        deferred.append((client_id, fmt, text))
+                        continue
+
+                    if client_id is None:
+                        within_budget = not deferred_clients and \
+                            broadcasts + max(per_client.values(), default=0) < self.client_commands_per_frame
+                    else:
+                        within_budget = client_id not in deferred_clients and \
+                            broadcasts + per_client[client_id] < self.client_commands_per_frame
+                    if not within_budget:
+                        deferred.append((client_id, fmt, text))
+                        if client_id is None:
+                            deferred_all = True
+                        else:
+                            deferred_clients.add(client_id)
+                        continue
+
+                    if fmt.startswith("print "):
+                        while i < len(entries) and entries[i][0] == client_id and entries[i][1] == fmt:
+                            # Colors carry over to the next line of a print, so reset it to the default.
+                            merged = text + "\n^7" + entries[i][2]
+                            if len(merged.encode(errors="replace")) > minqlx.MAX_MSG_LENGTH:
+                                break
+                            text = merged
+                            i += 1
+                            self.merged += 1
+
+                    try:
+                        minqlx.send_server_command(client_id, fmt.format(text))
+                    except:
+                        # A failed command is dropped, the rest of the queue is still sent.
+                        minqlx.log_exception()
+                        self.failed += 1
+                        continue
+                    self.sent += 1
+                    total += 1
+                    if client_id is None:
+                        broadcasts += 1
+                    else:
+                        per_client[client_id] += 1
+            finally:
+                # Anything not processed, i.e. because of an unexpected error, goes back on the queue.
+                deferred.extend(entries[i:])
+                with self._lock:
+                    queue.extendleft(reversed(deferred))
+                    self._size -= len(entries) - len(deferred)
+
+    def status(self):
+        return "outbound messages: {} queued, {} sent, {} merged, {} dropped, {} failed".format(
+            len(self), self.sent, self.merged, self.dropped, self.failed)
+
+outbound_messages = OutboundMessageQueue()
+
 def handle_frame():
     """This will be called every frame. To allow threads to call stuff from the
     main thread, tasks can be scheduled using the :func:`minqlx.next_frame` decorator
-    and have it be executed here.
+    or :func:`minqlx.run_in_main_thread` and have it be executed here.
 
     """
 
@@ -224,6 +499,21 @@ def handle_frame():
     except IndexError:
         pass
 
+    try:
+        main_thread_jobs.run_pending()
+    except:
+        minqlx.log_exception()
+
+    try:
+        minqlx.CVARS.check_pending()
+    except:
+        minqlx.log_exception()
+
+    try:
+        outbound_messages.send_pending()
+    except:
+        minqlx.log_exception()
+
 
 _zmq_warning_issued = False
 _first_game = True
@@ -247,11 +537,20 @@ def handle_new_game(is_restart):
 
     minqlx.set_map_subtitles()
 
+    # Factories and map configs set plenty of cvars, so check them all before the map's hooks run.
+    try:
+        minqlx.CVARS.check_all()
+    except:
+        minqlx.log_exception()
+
     if not is_restart:
         try:
-            minqlx.EVENT_DISPATCHERS["map"].dispatch(
-                minqlx.get_cvar("mapname"),
-                minqlx.get_cvar("g_factory"))
+            mapname = minqlx.get_cvar("mapname")
+            factory = minqlx.get_cvar("g_factory")
+            minqlx.SERVER_EVENTS.publish("map", mapname=mapname, factory=factory)
+            minqlx.ROUND_STATS.reset()
+            minqlx.ALIVE_PLAYERS.reset()
+            minqlx.EVENT_DISPATCHERS["map"].dispatch(mapname, factory)
         except:
             minqlx.log_exception()
             return True
@@ -297,6 +596,8 @@ def handle_set_configstring(index, value):
                     pass
                 elif old_state == "PRE_GAME" and new_state == "COUNT_DOWN":
                     _ad_round_number = 1
+                    minqlx.ROUND_STATS.reset()
+                    minqlx.ALIVE_PLAYERS.reset()
                     minqlx.EVENT_DISPATCHERS["game_countdown"].dispatch()
                 elif old_state == "COUNT_DOWN" and new_state == "IN_PROGRESS":
                     pass
@@ -331,6 +632,8 @@ def handle_set_configstring(index, value):
                     minqlx.EVENT_DISPATCHERS["round_countdown"].dispatch(round_number)
                     return
                 elif round_number:
+                    minqlx.ROUND_STATS.start_round(round_number)
+                    minqlx.ALIVE_PLAYERS.start_round()
                     minqlx.EVENT_DISPATCHERS["round_start"].dispatch(round_number)
                     return
 
@@ -353,7 +656,12 @@ def handle_player_connect(client_id, is_bot):
     """
     try:
         player = minqlx.Player(client_id)
-        return minqlx.EVENT_DISPATCHERS["player_connect"].dispatch(player)
+        res = minqlx.EVENT_DISPATCHERS["player_connect"].dispatch(player)
+        # Only players that are allowed to connect are published, not rejected ones.
+        if res is True:
+            minqlx.SERVER_EVENTS.publish("player_connect", steam_id=player.steam_id, name=player.name,
+                                         client_id=client_id, is_bot=bool(is_bot))
+        return res
     except:
         minqlx.log_exception()
         return True
@@ -383,7 +691,13 @@ def handle_player_disconnect(client_id, reason):
     """
     try:
         player = minqlx.Player(client_id)
-        return minqlx.EVENT_DISPATCHERS["player_disconnect"].dispatch(player, reason)
+        minqlx.SERVER_EVENTS.publish("player_disconnect", steam_id=player.steam_id, name=player.name,
+                                     client_id=client_id, reason=reason)
+        minqlx.ALIVE_PLAYERS.remove(player)
+        res = minqlx.EVENT_DISPATCHERS["player_disconnect"].dispatch(player, reason)
+        minqlx.ALIVE_PLAYERS.announce_last_standing()
+        outbound_messages.discard_client(client_id)
+        return res
     except:
         minqlx.log_exception()
         return True
@@ -396,6 +710,7 @@ def handle_player_spawn(client_id):
     """
     try:
         player = minqlx.Player(client_id)
+        minqlx.ALIVE_PLAYERS.spawn(player)
         return minqlx.EVENT_DISPATCHERS["player_spawn"].dispatch(player)
     except:
         minqlx.log_exception()
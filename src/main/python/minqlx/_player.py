@@ -63,7 +63,7 @@ class Player():
         if self._info.name:
             self._name = self._info.name
         else:
-            self._userinfo = minqlx.parse_variables(self._info.userinfo, ordered=True)
+            self._userinfo = minqlx.parse_userinfo(self._info.userinfo)
             if "name" in self._userinfo:
                 self._name = self._userinfo["name"]
             else: # No name at all. Weird userinfo during connection perhaps?
@@ -112,7 +112,7 @@ class Player():
         if self._info.name:
             self._name = self._info.name
         else:
-            self._userinfo = minqlx.parse_variables(self._info.userinfo, ordered=True)
+            self._userinfo = minqlx.parse_userinfo(self._info.userinfo)
             if "name" in self._userinfo:
                 self._name = self._userinfo["name"]
             else:
@@ -128,7 +128,7 @@ class Player():
             self._invalidate()
 
         if not self._userinfo:
-            self._userinfo = minqlx.parse_variables(self._info.userinfo, ordered=True)
+            self._userinfo = minqlx.parse_userinfo(self._info.userinfo)
 
         return self._userinfo.copy()
 
@@ -565,8 +565,8 @@ class Player():
     def channel(self):
         return minqlx.TellChannel(self)
 
-    def center_print(self, msg):
-        minqlx.send_server_command(self.id, "cp \"{}\"".format(msg))
+    def center_print(self, msg, priority=minqlx.PRI_HIGH):
+        minqlx.outbound_messages.put(self.id, "cp \"{}\"", msg, priority)
 
     def tell(self, msg, **kwargs):
         return minqlx.Plugin.tell(msg, self, **kwargs)
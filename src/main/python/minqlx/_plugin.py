@@ -139,31 +139,15 @@ class Plugin():
 
     @classmethod
     def get_cvar(cls, name, return_type=str):
-        """Gets the value of a cvar as a string.
+        """Gets the value of a cvar as a string. The parsed values are cached, see :class:`minqlx.CvarCache`.
 
         :param name: The name of the cvar.
         :type name: str
         :param return_type: The type the cvar should be returned in.
-            Supported types: str, int, float, bool, list, tuple
+            Supported types: str, int, float, bool, list, set, tuple
 
         """
-        res = minqlx.get_cvar(name)
-        if return_type == str:
-            return res
-        elif return_type == int:
-            return int(res)
-        elif return_type == float:
-            return float(res)
-        elif return_type == bool:
-            return bool(int(res))
-        elif return_type == list:
-            return [s.strip() for s in res.split(",")]
-        elif return_type == set:
-            return {s.strip() for s in res.split(",")}
-        elif return_type == tuple:
-            return tuple([s.strip() for s in res.split(",")])
-        else:
-            raise ValueError("Invalid return type: {}".format(return_type))
+        return minqlx.CVARS.get(name, return_type)
 
     @classmethod
     def set_cvar(cls, name, value, flags=0):
@@ -180,12 +164,15 @@ class Plugin():
         :rtype: bool
 
         """
-        if cls.get_cvar(name) is None:
+        if minqlx.get_cvar(name) is None:
             minqlx.set_cvar(name, value, flags)
-            return True
+            created = True
         else:
             minqlx.console_command("{} \"{}\"".format(name, value))
-            return False
+            created = False
+
+        minqlx.CVARS.invalidate(name)
+        return created
 
     @classmethod
     def set_cvar_limit(cls, name, value, minimum, maximum, flags=0):
@@ -206,12 +193,15 @@ class Plugin():
         :rtype: bool
 
         """
-        if cls.get_cvar(name) is None:
+        if minqlx.get_cvar(name) is None:
             minqlx.set_cvar(name, value, flags)
-            return True
+            created = True
         else:
             minqlx.console_command("{} \"{}\"".format(name, value))
-            return False
+            created = False
+
+        minqlx.CVARS.invalidate(name)
+        return created
 
     @classmethod
     def set_cvar_once(cls, name, value, flags=0):
@@ -401,11 +391,11 @@ class Plugin():
         return res
 
     @classmethod
-    def center_print(cls, msg, recipient=None):
+    def center_print(cls, msg, recipient=None, priority=minqlx.PRI_HIGH):
         if recipient:
             recipient = cls.client_id(recipient)
 
-        minqlx.send_server_command(recipient, "cp \"{}\"".format(msg))
+        minqlx.outbound_messages.put(recipient, "cp \"{}\"", msg, priority)
 
     @classmethod
     def tell(cls, msg, recipient, **kwargs):
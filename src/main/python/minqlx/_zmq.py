@@ -20,11 +20,47 @@
 we get stats from it. It polls the ZMQ socket approx. every 0.25 seconds."""
 
 import minqlx
+import os.path
+import time
+import gzip
 import json
 import zmq
 
+class StatsRecorder():
+    """Records the raw messages received by :class:`StatsListener` to a gzip-compressed
+    file, so that they can be replayed later on. Every line holds a JSON array with the
+    offset in seconds since the recording started, and the raw message as received.
+
+    """
+    def __init__(self, path):
+        self.path = path
+        self.start = time.monotonic()
+        self.file = gzip.open(path, "at", encoding="utf-8")
+
+    def record(self, message):
+        self.file.write(json.dumps([round(time.monotonic() - self.start, 6), message]) + "\n")
+
+    def close(self):
+        self.file.close()
+
+def read_stats_recording(path):
+    """Reads a recording made by :class:`StatsRecorder`.
+
+    :param path: The path of the recording.
+    :type path: str
+    :returns: generator -- Tuples of the offset in seconds and the raw message.
+
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            offset, message = json.loads(line)
+            yield offset, message
+
 class StatsListener():
     def __init__(self):
+        self._in_progress = False
         if not bool(int(minqlx.get_cvar("zmq_stats_enable"))):
             self.done = True
             return
@@ -47,7 +83,13 @@ class StatsListener():
         self.socket.setsockopt_string(zmq.SUBSCRIBE, "")
 
         self.done = False
-        self._in_progress = False
+
+        # Keep recording into the same file when reconnecting.
+        if not getattr(self, "recorder", None):
+            self.recorder = None
+            recording = minqlx.get_cvar("qlx_statsRecording")
+            if recording:
+                self.recorder = StatsRecorder(os.path.join(minqlx.get_cvar("fs_homepath"), recording))
 
     @minqlx.delay(0.25)
     def keep_receiving(self):
@@ -60,52 +102,10 @@ class StatsListener():
             if self.done:
                 return
             while True: # Will throw an expcetion if no more data to get.
-                stats = json.loads(self.socket.recv(zmq.NOBLOCK).decode(errors="ignore"))
-                minqlx.EVENT_DISPATCHERS["stats"].dispatch(stats)
-
-                if stats["TYPE"] == "MATCH_STARTED":
-                    self._in_progress = True
-                    minqlx.EVENT_DISPATCHERS["game_start"].dispatch(stats["DATA"])
-                elif stats["TYPE"] == "ROUND_OVER":
-                    minqlx.EVENT_DISPATCHERS["round_end"].dispatch(stats["DATA"])
-                elif stats["TYPE"] == "MATCH_REPORT":
-                    # MATCH_REPORT event goes off with a map change and map_restart,
-                    # but we really only want it for when the game actually ends.
-                    # We use a variable instead of Game().state because by the
-                    # time we get the event, the game is probably gone.
-                    if self._in_progress:
-                        minqlx.EVENT_DISPATCHERS["game_end"].dispatch(stats["DATA"])
-                    self._in_progress = False
-                elif stats["TYPE"] == "PLAYER_DEATH":
-                    # Dead player.
-                    sid = int(stats["DATA"]["VICTIM"]["STEAM_ID"])
-                    if sid:
-                        player = minqlx.Plugin.player(sid)
-                    else: # It's a bot. Forced to use name as an identifier.
-                        player = minqlx.Plugin.player(stats["DATA"]["VICTIM"]["NAME"])
-
-                    # Killer player.
-                    if not stats["DATA"]["KILLER"]:
-                        player_killer = None
-                    else:
-                        sid_killer = int(stats["DATA"]["KILLER"]["STEAM_ID"])
-                        if sid_killer:
-                            player_killer = minqlx.Plugin.player(sid_killer)
-                        else: # It's a bot. Forced to use name as an identifier.
-                            player_killer = minqlx.Plugin.player(stats["DATA"]["KILLER"]["NAME"])
-
-                    minqlx.EVENT_DISPATCHERS["death"].dispatch(player, player_killer, stats["DATA"])
-                    if player_killer:
-                        minqlx.EVENT_DISPATCHERS["kill"].dispatch(player, player_killer, stats["DATA"])
-                elif stats["TYPE"] == "PLAYER_SWITCHTEAM":
-                    # No idea why they named it "KILLER" here, but whatever.
-                    player = minqlx.Plugin.player(int(stats["DATA"]["KILLER"]["STEAM_ID"]))
-                    old_team = stats["DATA"]["KILLER"]["OLD_TEAM"].lower()
-                    new_team = stats["DATA"]["KILLER"]["TEAM"].lower()
-                    if old_team != new_team:
-                        res = minqlx.EVENT_DISPATCHERS["team_switch"].dispatch(player, old_team, new_team)
-                        if res is False:
-                            player.put(old_team)
+                message = self.socket.recv(zmq.NOBLOCK).decode(errors="ignore")
+                if self.recorder:
+                    self.recorder.record(message)
+                self.dispatch(json.loads(message))
 
         except zmq.error.Again:
             pass
@@ -116,5 +116,67 @@ class StatsListener():
 
         self.keep_receiving()
 
+    def dispatch(self, stats):
+        """Dispatches a single decoded stats message to the stats event and the
+        events derived from it.
+
+        """
+        minqlx.EVENT_DISPATCHERS["stats"].dispatch(stats)
+
+        if stats["TYPE"] == "MATCH_STARTED":
+            self._in_progress = True
+            minqlx.EVENT_DISPATCHERS["game_start"].dispatch(stats["DATA"])
+        elif stats["TYPE"] == "ROUND_OVER":
+            minqlx.ROUND_STATS.end_round()
+            minqlx.ALIVE_PLAYERS.end_round()
+            minqlx.EVENT_DISPATCHERS["round_end"].dispatch(stats["DATA"])
+        elif stats["TYPE"] == "MATCH_REPORT":
+            # MATCH_REPORT event goes off with a map change and map_restart,
+            # but we really only want it for when the game actually ends.
+            # We use a variable instead of Game().state because by the
+            # time we get the event, the game is probably gone.
+            if self._in_progress:
+                minqlx.EVENT_DISPATCHERS["game_end"].dispatch(stats["DATA"])
+            self._in_progress = False
+        elif stats["TYPE"] == "PLAYER_DEATH":
+            # Dead player.
+            sid = int(stats["DATA"]["VICTIM"]["STEAM_ID"])
+            if sid:
+                player = minqlx.Plugin.player(sid)
+            else: # It's a bot. Forced to use name as an identifier.
+                player = minqlx.Plugin.player(stats["DATA"]["VICTIM"]["NAME"])
+
+            # Killer player.
+            if not stats["DATA"]["KILLER"]:
+                player_killer = None
+            else:
+                sid_killer = int(stats["DATA"]["KILLER"]["STEAM_ID"])
+                if sid_killer:
+                    player_killer = minqlx.Plugin.player(sid_killer)
+                else: # It's a bot. Forced to use name as an identifier.
+                    player_killer = minqlx.Plugin.player(stats["DATA"]["KILLER"]["NAME"])
+
+            if player:
+                minqlx.ALIVE_PLAYERS.remove(player)
+            minqlx.EVENT_DISPATCHERS["death"].dispatch(player, player_killer, stats["DATA"])
+            if player_killer:
+                minqlx.EVENT_DISPATCHERS["kill"].dispatch(player, player_killer, stats["DATA"])
+            minqlx.ALIVE_PLAYERS.announce_last_standing()
+        elif stats["TYPE"] == "PLAYER_SWITCHTEAM":
+            # No idea why they named it "KILLER" here, but whatever.
+            player = minqlx.Plugin.player(int(stats["DATA"]["KILLER"]["STEAM_ID"]))
+            old_team = stats["DATA"]["KILLER"]["OLD_TEAM"].lower()
+            new_team = stats["DATA"]["KILLER"]["TEAM"].lower()
+            if old_team != new_team:
+                if player:
+                    minqlx.ALIVE_PLAYERS.remove(player)
+                res = minqlx.EVENT_DISPATCHERS["team_switch"].dispatch(player, old_team, new_team)
+                if res is False:
+                    player.put(old_team)
+                minqlx.ALIVE_PLAYERS.announce_last_standing()
+
     def stop(self):
         self.done = True
+        if getattr(self, "recorder", None):
+            self.recorder.close()
+            self.recorder = None
@@ -16,12 +16,14 @@ from __future__ import annotations
 import re
 import asyncio
 import threading
+import time
+from collections import deque
 
 import logging
 import os
 from logging.handlers import RotatingFileHandler
 
-from typing import Optional, Union
+from typing import Optional, Union, Callable, Hashable, Any
 
 import minqlx
 from minqlx import Plugin
@@ -85,6 +87,12 @@ class mydiscordbot(minqlx.Plugin):
     * qlx_discordLogToSeparateLogfile (default: "0") enables extended logging for the discord library (logs to
     minqlx_discord.log in the homepath)
     * qlx_discord_extensions (default: "") discord extensions to load after initializing
+    * qlx_discordOutboundFlushWindow (default: "0.5") seconds messages towards a discord channel are collected before
+    they are merged into as few discord messages as possible and sent
+    * qlx_discordOutboundQueueSize (default: "200") maximum amount of messages waiting to be sent to a single discord
+    channel
+    * qlx_discordOutboundDropPolicy (default: "oldest") which messages to drop when the queue of a discord channel is
+    full, either the "oldest" waiting ones or the "newest" ones
     """
     def __init__(self, discord_client: SimpleAsyncDiscord = None):
         super().__init__()
@@ -106,9 +114,15 @@ class mydiscordbot(minqlx.Plugin):
         Plugin.set_cvar_once("qlx_discordReplaceMentionsForTriggeredMessages", "1")
         Plugin.set_cvar_once("qlx_discordLogToSeparateLogfile", "0")
         Plugin.set_cvar_once("qlx_discord_extensions", "")
+        Plugin.set_cvar_once("qlx_discordOutboundFlushWindow", "0.5")
+        Plugin.set_cvar_once("qlx_discordOutboundQueueSize", "200")
+        Plugin.set_cvar_once("qlx_discordOutboundDropPolicy", "oldest")
 
         # get the actual cvar values from the server
-        self.discord_message_filters: set[str] = Plugin.get_cvar("qlx_discordQuakeRelayMessageFilters", set)
+        self.discord_message_filters: set[str] = set()
+        self.discord_message_filters_cvar: Optional[str] = None
+        self.discord_message_filter_matchers: list[re.Pattern] = []
+        self.update_message_filters()
 
         # adding general plugin hooks
         self.add_hook("unload", self.handle_plugin_unload)
@@ -123,11 +137,15 @@ class mydiscordbot(minqlx.Plugin):
 
         self.add_command("discord", self.cmd_discord, usage="<message>")
         self.add_command("discordbot", self.cmd_discordbot, permission=1,
-                         usage="[status]|connect|disconnect|reconnect")
+                         usage="[status]|connect|disconnect|reconnect|queue|jobs")
+
+        self.game_status: GameStatus = GameStatus(self.logger)
+        self.game_status.hook_events(self)
 
         # initialize the discord bot and its interactions on the discord server
         if discord_client is None:
-            self.discord: SimpleAsyncDiscord = SimpleAsyncDiscord(self.version_information(), self.logger)
+            self.discord: SimpleAsyncDiscord = SimpleAsyncDiscord(self.version_information(), self.logger,
+                                                                  game_status=self.game_status)
         else:
             self.discord = discord_client
         self.logger.info("Connecting to Discord...")
@@ -166,7 +184,7 @@ class mydiscordbot(minqlx.Plugin):
         gametype = game.type_short.upper()
 
         # CAUTION: if you change anything on the next line, you may need to change the topic_ending logic in
-        #          :func:`mydiscordbot.update_topic_on_triggered_channels(self, topic)` to keep the right portion
+        #          :func:`TopicUpdater.update_topic_on_channels_and_keep_channel_suffix` to keep the right portion
         #          of the triggered relay channels' topics!
         return f"{ginfo} on **{Plugin.clean_text(maptitle)}** ({gametype}) " \
                f"with **{num_players}/{max_players}** players. "
@@ -230,6 +248,30 @@ class mydiscordbot(minqlx.Plugin):
 
         return team_data
 
+    def update_message_filters(self) -> None:
+        """
+        Compiles the message filters from qlx_discordQuakeRelayMessageFilters, if the cvar changed since they were last
+        compiled.
+
+        All filters are combined into a single alternation, so that messages are checked with one match no matter how
+        many filters are configured. Filters that cannot be combined, i.e. because they use global inline flags, are
+        compiled separately.
+        """
+        filters_cvar = Plugin.get_cvar("qlx_discordQuakeRelayMessageFilters")
+        if filters_cvar == self.discord_message_filters_cvar:
+            return
+
+        self.discord_message_filters_cvar = filters_cvar
+        self.discord_message_filters = Plugin.get_cvar("qlx_discordQuakeRelayMessageFilters", set)
+
+        try:
+            self.discord_message_filter_matchers = [
+                re.compile("|".join(f"(?:{message_filter})" for message_filter in sorted(self.discord_message_filters)))
+            ]
+        except re.error:
+            self.discord_message_filter_matchers = [re.compile(message_filter)
+                                                    for message_filter in self.discord_message_filters]
+
     def is_filtered_message(self, msg: str) -> bool:
         """
         Checks whether the given message should be filtered and not be sent to discord.
@@ -237,8 +279,9 @@ class mydiscordbot(minqlx.Plugin):
         :param: msg: the message to check whether it should be filtered
         :return: whether the message should not be relayed to discord
         """
-        for message_filter in self.discord_message_filters:
-            matcher = re.compile(message_filter)
+        self.update_message_filters()
+
+        for matcher in self.discord_message_filter_matchers:
             if matcher.match(msg):
                 return True
 
@@ -343,13 +386,11 @@ class mydiscordbot(minqlx.Plugin):
         Handler called when the game is in countdown, i.e. about to start. This function mainly updates the topics of
         the relay channels and the triggered channels (when configured), and sends a message to all relay channels.
         """
-        game = self.game
-        if game is None:
+        status = self.game_status.render(GameStatus.TEAMS)
+        if status is None:
             return
-        topic = mydiscordbot.game_status_information(game)
-        top5_players = mydiscordbot.player_data()
 
-        self.discord.relay_message(f"{topic}{top5_players}")
+        self.discord.relay_message(status)
 
     def cmd_discord(self, player: minqlx.Player, msg: list[str], _channel: minqlx.AbstractChannel) -> int:
         """
@@ -375,7 +416,8 @@ class mydiscordbot(minqlx.Plugin):
         :param: msg: the original message the player sent (includes the trigger)
         :param: channel: the channel the message came through, i.e. team chat, general chat, etc.
         """
-        if len(msg) > 2 or (len(msg) == 2 and msg[1] not in ["status", "connect", "disconnect", "reconnect"]):
+        if len(msg) > 2 or \
+                (len(msg) == 2 and msg[1] not in ["status", "connect", "disconnect", "reconnect", "queue", "jobs"]):
             return minqlx.RET_USAGE
 
         if len(msg) == 2 and msg[1] == "connect":
@@ -397,6 +439,16 @@ class mydiscordbot(minqlx.Plugin):
             self.connect_discord()
             return minqlx.RET_NONE
 
+        if len(msg) == 2 and msg[1] == "queue":
+            for line in self.discord.outbound_status():
+                channel.reply(line)
+            return minqlx.RET_NONE
+
+        if len(msg) == 2 and msg[1] == "jobs":
+            for line in self.discord.scheduled_jobs_status():
+                channel.reply(line)
+            return minqlx.RET_NONE
+
         channel.reply(self.discord.status())
         return minqlx.RET_NONE
 
@@ -431,18 +483,659 @@ class MinqlxHelpCommand(DefaultHelpCommand):
         pass
 
 
+class DiscordChannelOutbox:
+    """
+    Outbound message queue towards a single discord channel. Messages put into the outbox are collected for a short
+    flush window and merged into as few discord messages as possible, respecting discord's message length limit.
+
+    Messages are sent one after another. While discord.py waits for a rate limit bucket to free up, messages keep
+    piling up in the outbox and get merged into the next discord message. When the outbox is full, either the oldest
+    waiting messages or the newest ones are dropped.
+    """
+    MAX_MESSAGE_LENGTH = 2000
+
+    def __init__(self, channel: discord.TextChannel, loop: asyncio.AbstractEventLoop, logger: logging.Logger, *,
+                 flush_window: float = 0.5, max_size: int = 200, drop_oldest: bool = True):
+        """
+        Constructor for the outbox of a discord channel.
+
+        :param: channel: the discord channel messages will be sent to
+        :param: loop: the event loop of the discord bot the messages will be sent in
+        :param: logger: the logger used for logging failed sends
+        :param: flush_window: (default: 0.5) seconds messages are collected before they are sent
+        :param: max_size: (default: 200) maximum amount of messages waiting to be sent
+        :param: drop_oldest: (default: True) whether to drop the oldest messages when the outbox is full, or the
+        newest ones
+        """
+        self.channel: discord.TextChannel = channel
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.logger: logging.Logger = logger
+        self.flush_window: float = flush_window
+        self.max_size: int = max_size
+        self.drop_oldest: bool = drop_oldest
+
+        self.lock: threading.Lock = threading.Lock()
+        self.pending: deque[tuple[float, str]] = deque()
+        self.flushing: bool = False
+
+        self.sent_messages: int = 0
+        self.sent_lines: int = 0
+        self.dropped_lines: int = 0
+        self.latencies: deque[float] = deque(maxlen=100)
+
+    @property
+    def depth(self) -> int:
+        return len(self.pending)
+
+    def put(self, content: str) -> None:
+        """
+        Puts a message into the outbox. This may be called from any thread.
+
+        :param: content: the content of the message to send to the discord channel
+        """
+        with self.lock:
+            if len(self.pending) >= self.max_size:
+                self.dropped_lines += 1
+                if not self.drop_oldest:
+                    return
+                self.pending.popleft()
+            self.pending.append((time.monotonic(), content))
+
+            if self.flushing:
+                return
+            self.flushing = True
+
+        asyncio.run_coroutine_threadsafe(self.flush(), loop=self.loop)
+
+    async def flush(self) -> None:
+        """
+        Sends all waiting messages after the flush window passed.
+        """
+        flushed = False
+        try:
+            await asyncio.sleep(self.flush_window)
+            while True:
+                with self.lock:
+                    if len(self.pending) == 0:
+                        self.flushing = False
+                        flushed = True
+                        return
+                    batch = self.next_batch()
+
+                await self.send(batch)
+        finally:
+            # a cancelled flush or an error outside of send must not leave the outbox stuck for good
+            if not flushed:
+                with self.lock:
+                    self.flushing = False
+
+    def next_batch(self) -> list[tuple[float, str]]:
+        """
+        Takes the waiting messages that fit into a single discord message out of the outbox. A message exceeding
+        discord's length limit on its own is taken alone.
+        """
+        batch = [self.pending.popleft()]
+        length = len(batch[0][1])
+        while len(self.pending) > 0 and length + 1 + len(self.pending[0][1]) <= self.MAX_MESSAGE_LENGTH:
+            enqueued, content = self.pending.popleft()
+            batch.append((enqueued, content))
+            length += 1 + len(content)
+
+        return batch
+
+    async def send(self, batch: list[tuple[float, str]]) -> None:
+        content = "\n".join(line for _, line in batch)
+        try:
+            await self.channel.send(content, allowed_mentions=AllowedMentions(everyone=False, users=True, roles=True))
+        except Exception as e:  # pylint: disable=broad-except
+            # a failed send must never stall the outbox for the channel
+            self.logger.error(f"Sending {len(batch)} message(s) to discord channel {self.channel.id} failed: {e}")
+            return
+
+        sent = time.monotonic()
+        self.sent_messages += 1
+        self.sent_lines += len(batch)
+        self.latencies.extend(sent - enqueued for enqueued, _ in batch)
+
+    def status(self) -> str:
+        """
+        Formats the queue depth and latency metrics of this outbox.
+        """
+        if len(self.latencies) == 0:
+            latency = "n/a"
+        else:
+            latency = f"avg {sum(self.latencies) / len(self.latencies):.2f}s, max {max(self.latencies):.2f}s"
+        return f"#{self.channel.name}: {self.depth} queued, {self.sent_lines} lines sent in {self.sent_messages} " \
+               f"messages, {self.dropped_lines} dropped, latency {latency}"
+
+
+class MentionIndex:
+    """
+    Index of discord members or channels by their lowercase names used to resolve @user and #channel mentions.
+
+    Each indexed entry may have several names, i.e. a member's name and nick. Besides exact lookups per name, the
+    index keeps the trigrams of all names, so that candidates for substring matches are found without scanning all
+    entries. The index is updated from the discord bot's event loop and read from the server's main thread, hence all
+    accesses are guarded by a lock.
+    """
+    def __init__(self, names_of: Callable[[Any], tuple[Optional[str], ...]]):
+        """
+        Constructor for a mention index.
+
+        :param: names_of: function returning the names of an entry in the order they should be looked up. Names may
+        be None.
+        """
+        self.names_of: Callable[[Any], tuple[Optional[str], ...]] = names_of
+        self.lock: threading.Lock = threading.Lock()
+
+        self.entries: dict[Hashable, Any] = {}
+        self.lowercase_names: dict[Hashable, tuple[Optional[str], ...]] = {}
+        self.order: dict[Hashable, int] = {}
+        self.exact: dict[tuple[int, str], set[Hashable]] = {}
+        self.trigrams: dict[str, set[Hashable]] = {}
+        self.insertions: int = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def trigrams_of(name: str) -> set[str]:
+        return {name[i:i + 3] for i in range(len(name) - 2)}
+
+    def add(self, key: Hashable, entry: Any) -> None:
+        """
+        Adds an entry to the index, or updates it if an entry with the same key is already indexed.
+
+        :param: key: the key identifying the entry, i.e. the id of a channel
+        :param: entry: the member or channel to index
+        """
+        with self.lock:
+            self._remove(key)
+
+            lowercase_names = tuple(name.lower() if name is not None else None for name in self.names_of(entry))
+            self.entries[key] = entry
+            self.lowercase_names[key] = lowercase_names
+            if key not in self.order:
+                self.order[key] = self.insertions
+                self.insertions += 1
+
+            for position, name in enumerate(lowercase_names):
+                if name is None:
+                    continue
+                self.exact.setdefault((position, name), set()).add(key)
+                for trigram in self.trigrams_of(name):
+                    self.trigrams.setdefault(trigram, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Removes an entry from the index.
+
+        :param: key: the key identifying the entry
+        """
+        with self.lock:
+            self._remove(key)
+            self.order.pop(key, None)
+
+    def _remove(self, key: Hashable) -> None:
+        if key not in self.entries:
+            return
+
+        del self.entries[key]
+        for position, name in enumerate(self.lowercase_names.pop(key)):
+            if name is None:
+                continue
+            MentionIndex._discard(self.exact, (position, name), key)
+            for trigram in self.trigrams_of(name):
+                MentionIndex._discard(self.trigrams, trigram, key)
+
+    @staticmethod
+    def _discard(index: dict[Any, set[Hashable]], index_key: Any, key: Hashable) -> None:
+        keys = index.get(index_key)
+        if keys is None:
+            return
+        keys.discard(key)
+        if len(keys) == 0:
+            del index[index_key]
+
+    def _entries_for(self, keys: set[Hashable]) -> list[Any]:
+        return [self.entries[key] for key in sorted(keys, key=self.order.__getitem__)]
+
+    def exact_matches(self, match: str, position: int = 0) -> list[Any]:
+        """
+        Finds the entries whose name at the given position matches case-insensitively.
+
+        :param: match: the name to look for
+        :param: position: (default: 0) which of the entry's names to look at
+        :return: the matching entries in the order they were indexed
+        """
+        with self.lock:
+            return self._entries_for(self.exact.get((position, match.lower()), set()))
+
+    def substring_matches(self, match: str) -> list[Any]:
+        """
+        Finds the entries with any name containing the match case-insensitively.
+
+        :param: match: the portion of a name to look for
+        :return: the matching entries in the order they were indexed
+        """
+        lowercase_match = match.lower()
+        with self.lock:
+            trigrams = self.trigrams_of(lowercase_match)
+            if len(trigrams) == 0:
+                candidates = set(self.entries)
+            else:
+                candidates = set.intersection(*[self.trigrams.get(trigram, set()) for trigram in trigrams])
+
+            return self._entries_for({key for key in candidates
+                                      if any(name is not None and lowercase_match in name
+                                             for name in self.lowercase_names[key])})
+
+    @staticmethod
+    def of_members(members: list[discord.Member]) -> MentionIndex:
+        index = MentionIndex(lambda member: (member.name, member.nick))
+        for key, member in enumerate(members):
+            index.add(key, member)
+        return index
+
+    @staticmethod
+    def of_channels(channels: list[discord.TextChannel]) -> MentionIndex:
+        index = MentionIndex(lambda channel: (channel.name,))
+        for key, channel in enumerate(channels):
+            index.add(key, channel)
+        return index
+
+
+class ScheduledJob:
+    """
+    A job run periodically by the :class:`DiscordJobScheduler` that keeps track of its execution times.
+    """
+    def __init__(self, name: str, interval: float, callback: Callable[[], Any]):
+        """
+        Constructor for a periodically scheduled job.
+
+        :param: name: the name of the job
+        :param: interval: seconds between the runs of the job
+        :param: callback: the function or coroutine function run periodically
+        """
+        self.name: str = name
+        self.interval: float = interval
+        self.callback: Callable[[], Any] = callback
+        self.future: Optional[asyncio.Future] = None
+
+        self.runs: int = 0
+        self.failures: int = 0
+        self.total_time: float = 0.0
+        self.last_time: float = 0.0
+        self.max_time: float = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.future is None or self.future.cancelled()
+
+    def cancel(self) -> None:
+        if self.future is not None:
+            self.future.cancel()
+
+    async def run(self, logger: logging.Logger) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+
+            started = time.perf_counter()
+            try:
+                result = self.callback()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:  # pylint: disable=broad-except
+                # a failed run must not end the periodic job
+                self.failures += 1
+                logger.error(f"Scheduled job {self.name} failed: {e}")
+
+            self.last_time = time.perf_counter() - started
+            self.runs += 1
+            self.total_time += self.last_time
+            self.max_time = max(self.max_time, self.last_time)
+
+    def status(self) -> str:
+        average = self.total_time / self.runs if self.runs > 0 else 0.0
+        return f"{self.name}: every {self.interval:g}s, {self.runs} runs ({self.failures} failed), " \
+               f"last {self.last_time * 1000:.1f}ms, avg {average * 1000:.1f}ms, max {self.max_time * 1000:.1f}ms"
+
+
+class DiscordJobScheduler:
+    """
+    Scheduler for periodic jobs of the discord bot and its extensions. All jobs run on the bot's event loop, so no
+    extra threads are needed. Extensions find the scheduler as ``bot.scheduler``, and should cancel their jobs when
+    they are unloaded.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, logger: logging.Logger):
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.logger: logging.Logger = logger
+        self.jobs: dict[str, ScheduledJob] = {}
+
+    def every(self, interval: float, callback: Callable[[], Any], *, name: str = None) -> ScheduledJob:
+        """
+        Schedules a function or coroutine function to run periodically. A job already scheduled with the same name is
+        replaced. This may be called from any thread.
+
+        :param: interval: seconds between the runs of the job, the first run happens after one interval
+        :param: callback: the function or coroutine function to run
+        :param: name: (default: None) the name of the job, defaults to the callback's qualified name
+        :return: the scheduled job, which may be used for cancelling it
+        """
+        job_name = name if name is not None else getattr(callback, "__qualname__", repr(callback))
+        self.cancel(job_name)
+
+        job = ScheduledJob(job_name, interval, callback)
+        job.future = asyncio.run_coroutine_threadsafe(job.run(self.logger), loop=self.loop)
+        self.jobs[job_name] = job
+        return job
+
+    def cancel(self, job: Union[str, ScheduledJob]) -> None:
+        """
+        Cancels a scheduled job.
+
+        :param: job: the job or the name of the job to cancel
+        """
+        job_name = job if isinstance(job, str) else job.name
+        scheduled_job = self.jobs.get(job_name)
+        if scheduled_job is None or (isinstance(job, ScheduledJob) and scheduled_job is not job):
+            return
+
+        del self.jobs[job_name]
+        scheduled_job.cancel()
+
+    def cancel_all(self) -> None:
+        for job in list(self.jobs.values()):
+            self.cancel(job)
+
+    def status(self) -> list[str]:
+        """
+        Reports the execution times of the scheduled jobs.
+
+        :return: one line per scheduled job
+        """
+        if len(self.jobs) == 0:
+            return ["No jobs scheduled."]
+
+        return [job.status() for job in self.jobs.values()]
+
+
+class DiscordLoopBridge:
+    """
+    Bounded queue of coroutines submitted from the server's main thread to be run on the discord bot's event loop.
+    Extensions find the bridge as ``bot.bridge``. The opposite direction is covered by
+    :func:`minqlx.run_in_main_thread`.
+
+    Submissions are collected and started on the event loop with a single wake-up per burst, in the order they were
+    submitted. When the coroutines waiting and running reach the limit, either the oldest waiting coroutine or the
+    newly submitted one is dropped, so the main thread never blocks.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, logger: logging.Logger, *,
+                 max_size: int = 500, drop_oldest: bool = True):
+        """
+        Constructor for the bridge into the discord bot's event loop.
+
+        :param: loop: the event loop of the discord bot
+        :param: logger: the logger used for logging failed coroutines
+        :param: max_size: (default: 500) maximum amount of coroutines waiting and running
+        :param: drop_oldest: (default: True) whether to drop the oldest waiting coroutine when the bridge is full, or
+        the newly submitted one
+        """
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.logger: logging.Logger = logger
+        self.max_size: int = max_size
+        self.drop_oldest: bool = drop_oldest
+
+        self.lock: threading.Lock = threading.Lock()
+        self.pending: deque[tuple[float, Callable[..., Any], tuple, dict]] = deque()
+        self.running: set[asyncio.Task] = set()
+        self.wake_up_scheduled: bool = False
+
+        self.completed: int = 0
+        self.dropped: int = 0
+        self.latencies: deque[float] = deque(maxlen=100)
+
+    def submit(self, coroutine_function: Callable[..., Any], *args, **kwargs) -> bool:
+        """
+        Submits a coroutine function to be called on the discord bot's event loop. The coroutine is only created on
+        the event loop, so dropped submissions do not leave never-awaited coroutines behind. This may be called from
+        any thread.
+
+        :param: coroutine_function: the coroutine function to run
+        :return: whether the submission was accepted
+        """
+        with self.lock:
+            if len(self.pending) + len(self.running) >= self.max_size:
+                self.dropped += 1
+                if not self.drop_oldest or len(self.pending) == 0:
+                    return False
+                self.pending.popleft()
+            self.pending.append((time.monotonic(), coroutine_function, args, kwargs))
+
+            if self.wake_up_scheduled:
+                return True
+            self.wake_up_scheduled = True
+
+        self.loop.call_soon_threadsafe(self.start_pending)
+        return True
+
+    def start_pending(self) -> None:
+        with self.lock:
+            self.wake_up_scheduled = False
+            started = list(self.pending)
+            self.pending.clear()
+
+            now = time.monotonic()
+            for submitted, coroutine_function, args, kwargs in started:
+                self.latencies.append(now - submitted)
+                task = self.loop.create_task(coroutine_function(*args, **kwargs))
+                self.running.add(task)
+                task.add_done_callback(self.finished)
+
+    def finished(self, task: asyncio.Task) -> None:
+        with self.lock:
+            self.running.discard(task)
+            self.completed += 1
+
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error(f"{task.get_coro().__qualname__} failed: {task.exception()}")
+
+    def status(self) -> str:
+        if len(self.latencies) == 0:
+            latency = "n/a"
+        else:
+            latency = f"avg {sum(self.latencies) / len(self.latencies) * 1000:.1f}ms, " \
+                      f"max {max(self.latencies) * 1000:.1f}ms"
+        return f"discord loop: {len(self.pending)} queued, {len(self.running)} running, {self.completed} completed, " \
+               f"{self.dropped} dropped, latency {latency}"
+
+
+class GameStatus:
+    """
+    The game status shown in discord status replies and channel topics, shared by the plugin and its discord
+    extensions. Extensions find it as ``bot.game_status``.
+
+    Rendered status texts are memoized per format, and only invalidated by the game events that may change them, so
+    repeated status requests and topic refreshes do not query the game and sort the teams again. Rendering needs the
+    game and the players, and therefore has to happen on the server's main thread, while memoized renderings may be
+    read from any thread.
+
+    Formats:
+    * "topic": the game state, map, and amount of players, as used for channel topics.
+    * "teams": the topic information followed by the players of both teams and their scores.
+    """
+    TOPIC = "topic"
+    TEAMS = "teams"
+
+    # gametypes that only score at the end of rounds. All other gametypes score on frags or captures as well.
+    ROUND_BASED_GAMETYPES: tuple[str, ...] = ("ca", "ft", "ad", "rr")
+
+    # the formats each game event may change. In round-based gametypes, team switches and frags just change the lines
+    # listing the teams, in all others they may change the score in the topic as well.
+    INVALIDATIONS: dict[str, tuple[str, ...]] = {
+        "map": (TOPIC, TEAMS),
+        "new_game": (TOPIC, TEAMS),
+        "game_countdown": (TOPIC, TEAMS),
+        "game_start": (TOPIC, TEAMS),
+        "game_end": (TOPIC, TEAMS),
+        "round_end": (TOPIC, TEAMS),
+        "player_loaded": (TOPIC, TEAMS),
+        "player_disconnect": (TOPIC, TEAMS),
+        "team_switch": (TEAMS,),
+        "death": (TEAMS,),
+    }
+
+    def __init__(self, logger: logging.Logger):
+        """
+        Constructor for the shared game status.
+
+        :param: logger: the logger used for logging failing listeners
+        """
+        self.logger: logging.Logger = logger
+        self.lock: threading.Lock = threading.Lock()
+        self.rendered: dict[str, Optional[str]] = {}
+        self.listeners: list[Callable[[tuple[str, ...]], None]] = []
+        # without zmq stats, score changes go unnoticed, and nothing may be memoized.
+        self.memoize: bool = False
+
+        self.renderings: int = 0
+
+    def hook_events(self, plugin: minqlx.Plugin) -> None:
+        """
+        Hooks the game events invalidating the memoized renderings through the given plugin, so that they are unhooked
+        together with the plugin.
+
+        :param: plugin: the plugin hooking the game events
+        """
+        zmq_stats_enabled = Plugin.get_cvar("zmq_stats_enable", bool)
+        for event, formats in self.INVALIDATIONS.items():
+            if minqlx.EVENT_DISPATCHERS[event].need_zmq_stats_enabled and not zmq_stats_enabled:
+                continue
+            if event == "player_disconnect":
+                plugin.add_hook(event, self.handle_player_disconnect, priority=minqlx.PRI_LOWEST)
+                continue
+            if event in ("team_switch", "death"):
+                plugin.add_hook(event, self.handle_score_change, priority=minqlx.PRI_LOWEST)
+                continue
+            plugin.add_hook(event, self.invalidation_handler(formats), priority=minqlx.PRI_LOWEST)
+
+        self.memoize = zmq_stats_enabled
+
+    def invalidation_handler(self, formats: tuple[str, ...]) -> Callable[..., None]:
+        def invalidate(*_args, **_kwargs) -> None:
+            self.invalidate(formats)
+
+        return invalidate
+
+    def handle_player_disconnect(self, *_args, **_kwargs) -> None:
+        self.invalidate(self.INVALIDATIONS["player_disconnect"])
+        # the disconnecting player is still counted while the event is dispatched
+        minqlx.next_frame(self.invalidate)(self.INVALIDATIONS["player_disconnect"])
+
+    def handle_score_change(self, *_args, **_kwargs) -> None:
+        if self.is_round_based():
+            self.invalidate((self.TEAMS,))
+        else:
+            self.invalidate((self.TOPIC, self.TEAMS))
+
+    def is_round_based(self) -> bool:
+        try:
+            game = minqlx.Game()
+        except minqlx.NonexistentGameError:
+            return False
+        return game.type_short in self.ROUND_BASED_GAMETYPES
+
+    def add_listener(self, listener: Callable[[tuple[str, ...]], None]) -> None:
+        """
+        Adds a listener called with the invalidated formats whenever game events invalidate renderings. Listeners are
+        called on the main thread, and should return quickly.
+
+        :param: listener: the listener to call
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[tuple[str, ...]], None]) -> None:
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def invalidate(self, formats: tuple[str, ...] = (TOPIC, TEAMS)) -> None:
+        """
+        Drops the memoized renderings of the given formats, and notifies the listeners.
+
+        :param: formats: (default: all formats) the formats to invalidate
+        """
+        with self.lock:
+            for status_format in formats:
+                self.rendered.pop(status_format, None)
+
+        for listener in list(self.listeners):
+            try:
+                listener(formats)
+            except Exception as e:  # pylint: disable=broad-except
+                self.logger.error(f"Game status listener {listener} failed: {e}")
+
+    def cached(self, status_format: str) -> tuple[bool, Optional[str]]:
+        with self.lock:
+            if status_format not in self.rendered:
+                return False, None
+            return True, self.rendered[status_format]
+
+    def render(self, status_format: str) -> Optional[str]:
+        """
+        Renders the game status in the given format, or returns the memoized rendering. This needs to be called on the
+        main thread.
+
+        :param: status_format: the format to render, either "topic" or "teams"
+        :return: the rendered game status, or None if no game is running
+        """
+        found, rendered = self.cached(status_format)
+        if found:
+            return rendered
+
+        try:
+            game = minqlx.Game()
+        except minqlx.NonexistentGameError:
+            rendered = None
+        else:
+            rendered = mydiscordbot.game_status_information(game)
+            if status_format == self.TEAMS:
+                rendered += mydiscordbot.player_data()
+
+        with self.lock:
+            self.renderings += 1
+            if self.memoize:
+                self.rendered[status_format] = rendered
+        return rendered
+
+    async def current(self, status_format: str) -> Optional[str]:
+        """
+        Provides the game status in the given format on the discord bot's event loop. Memoized renderings are returned
+        right away, everything else is rendered on the main thread.
+
+        :param: status_format: the format to render, either "topic" or "teams"
+        :return: the rendered game status, or None if no game is running
+        """
+        found, rendered = self.cached(status_format)
+        if found:
+            return rendered
+
+        return await asyncio.wrap_future(minqlx.run_in_main_thread(self.render, status_format))
+
+
 class SimpleAsyncDiscord(threading.Thread):
     """
     SimpleAsyncDiscord client which is used to communicate to discord, and provides certain commands in the relay and
     triggered channels as well as private authentication to the bot to admin the server.
     """
 
-    def __init__(self, version_information: str, logger: logging.Logger):
+    def __init__(self, version_information: str, logger: logging.Logger, *, game_status: GameStatus = None):
         """
         Constructor for the SimpleAsyncDiscord client the discord bot runs in.
 
         :param: version_information: the plugin's version_information string
         :param: logger: the logger used for logging, usually passed through from the minqlx plugin.
+        :param: game_status: (default: None) the game status shared with the discord extensions, usually passed through
+        from the minqlx plugin.
         """
         super().__init__()
         self.version_information: str = version_information
@@ -467,6 +1160,15 @@ class SimpleAsyncDiscord(threading.Thread):
             Plugin.get_cvar("qlx_discordReplaceMentionsForRelayedMessages", bool)
         self.discord_replace_triggered_mentions: bool = \
             Plugin.get_cvar("qlx_discordReplaceMentionsForTriggeredMessages", bool)
+        self.outbound_flush_window: float = Plugin.get_cvar("qlx_discordOutboundFlushWindow", float)
+        self.outbound_queue_size: int = Plugin.get_cvar("qlx_discordOutboundQueueSize", int)
+        self.outbound_drop_oldest: bool = Plugin.get_cvar("qlx_discordOutboundDropPolicy") != "newest"
+        self.outboxes: dict[int, DiscordChannelOutbox] = {}
+        self.member_index: Optional[MentionIndex] = None
+        self.channel_index: Optional[MentionIndex] = None
+        self.scheduler: Optional[DiscordJobScheduler] = None
+        self.bridge: Optional[DiscordLoopBridge] = None
+        self.game_status: GameStatus = game_status if game_status is not None else GameStatus(logger)
 
         extended_logging_enabled: bool = Plugin.get_cvar("qlx_discordLogToSeparateLogfile", bool)
         if extended_logging_enabled:
@@ -523,6 +1225,7 @@ class SimpleAsyncDiscord(threading.Thread):
         """
         loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
+        self.outboxes = {}
 
         members_intent: bool = self.discord_replace_relayed_mentions or self.discord_replace_triggered_mentions
         intents: discord.Intents = \
@@ -555,9 +1258,26 @@ class SimpleAsyncDiscord(threading.Thread):
 
         :param: discord_bot: the discord_bot to initialize
         """
+        self.scheduler = DiscordJobScheduler(discord_bot.loop, self.logger)
+        discord_bot.scheduler = self.scheduler
+        self.bridge = DiscordLoopBridge(discord_bot.loop, self.logger)
+        discord_bot.bridge = self.bridge
+        discord_bot.game_status = self.game_status
+
         discord_bot.add_listener(self.on_ready)
         discord_bot.add_listener(self.on_message)
 
+        if self.discord_replace_relayed_mentions or self.discord_replace_triggered_mentions:
+            discord_bot.add_listener(self.on_member_join)
+            discord_bot.add_listener(self.on_member_remove)
+            discord_bot.add_listener(self.on_member_update)
+            discord_bot.add_listener(self.on_user_update)
+            discord_bot.add_listener(self.on_guild_channel_create)
+            discord_bot.add_listener(self.on_guild_channel_delete)
+            discord_bot.add_listener(self.on_guild_channel_update)
+            discord_bot.add_listener(self.on_guild_join)
+            discord_bot.add_listener(self.on_guild_remove)
+
         if self.discord_version_enabled:
             discord_bot.add_command(Command(self.version, name="version",
                                             pass_context=True,
@@ -596,6 +1316,10 @@ class SimpleAsyncDiscord(threading.Thread):
         Function called once the bot connected. Mainly displays status update from the bot in the game console
         and server logfile, and sets the bot to playing Quake Live on discord.
         """
+        # the guilds' members and channels are rebuilt on (re-)connect, rebuild the mention indexes on next use
+        self.member_index = None
+        self.channel_index = None
+
         extensions = Plugin.get_cvar("qlx_discord_extensions", list)
         ready_actions = []
         for extension in extensions:
@@ -632,6 +1356,85 @@ class SimpleAsyncDiscord(threading.Thread):
                 minqlx.CHAT_CHANNEL.reply(
                     self._format_message_to_quake(message.channel, message.author, content))
 
+    @staticmethod
+    def member_key(member: discord.Member) -> tuple[int, int]:
+        return member.guild.id, member.id
+
+    @staticmethod
+    def is_mentionable_channel(channel: discord.abc.GuildChannel) -> bool:
+        return channel.type in [ChannelType.text, ChannelType.voice, ChannelType.group]
+
+    def members_mention_index(self) -> MentionIndex:
+        """
+        Gets the index of discord members for resolving @user mentions, building it on first use. Afterwards, the index
+        is kept current through the discord member events.
+        """
+        if self.member_index is None:
+            member_index = MentionIndex(lambda member: (member.name, member.nick))
+            for member in self.discord.get_all_members():
+                member_index.add(SimpleAsyncDiscord.member_key(member), member)
+            self.member_index = member_index
+        return self.member_index
+
+    def channels_mention_index(self) -> MentionIndex:
+        """
+        Gets the index of discord channels for resolving #channel mentions, building it on first use. Afterwards, the
+        index is kept current through the discord channel events.
+        """
+        if self.channel_index is None:
+            channel_index = MentionIndex(lambda channel: (channel.name,))
+            for channel in self.discord.get_all_channels():
+                if SimpleAsyncDiscord.is_mentionable_channel(channel):
+                    channel_index.add(channel.id, channel)
+            self.channel_index = channel_index
+        return self.channel_index
+
+    async def on_member_join(self, member: discord.Member) -> None:
+        if self.member_index is not None:
+            self.member_index.add(SimpleAsyncDiscord.member_key(member), member)
+
+    async def on_member_remove(self, member: discord.Member) -> None:
+        if self.member_index is not None:
+            self.member_index.remove(SimpleAsyncDiscord.member_key(member))
+
+    async def on_member_update(self, _before: discord.Member, after: discord.Member) -> None:
+        if self.member_index is not None:
+            self.member_index.add(SimpleAsyncDiscord.member_key(after), after)
+
+    async def on_user_update(self, _before: discord.User, after: discord.User) -> None:
+        """
+        Username changes are reported for the user, not for the members of the guilds, so re-index all members of
+        that user.
+        """
+        if self.member_index is None:
+            return
+
+        for guild in self.discord.guilds:
+            member = guild.get_member(after.id)
+            if member is not None:
+                self.member_index.add(SimpleAsyncDiscord.member_key(member), member)
+
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
+        if self.channel_index is not None and SimpleAsyncDiscord.is_mentionable_channel(channel):
+            self.channel_index.add(channel.id, channel)
+
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        if self.channel_index is not None:
+            self.channel_index.remove(channel.id)
+
+    async def on_guild_channel_update(self, _before: discord.abc.GuildChannel,
+                                      after: discord.abc.GuildChannel) -> None:
+        if self.channel_index is not None and SimpleAsyncDiscord.is_mentionable_channel(after):
+            self.channel_index.add(after.id, after)
+
+    async def on_guild_join(self, _guild: discord.Guild) -> None:
+        self.member_index = None
+        self.channel_index = None
+
+    async def on_guild_remove(self, _guild: discord.Guild) -> None:
+        self.member_index = None
+        self.channel_index = None
+
     async def on_command_error(self, exception: Exception, ctx: Context) -> None:
         """
         overrides the default command error handler so that no exception is produced for command errors
@@ -652,6 +1455,9 @@ class SimpleAsyncDiscord(threading.Thread):
         if self.discord is None:
             return
 
+        if self.scheduler is not None:
+            self.scheduler.cancel_all()
+
         asyncio.run_coroutine_threadsafe(self.discord.change_presence(
             status=discord.Status.offline), loop=self.discord.loop)
         asyncio.run_coroutine_threadsafe(self.discord.close(), loop=self.discord.loop)
@@ -677,17 +1483,56 @@ class SimpleAsyncDiscord(threading.Thread):
         if not channel_ids or len(channel_ids) == 0:
             return
 
-        # send the message in its own thread to avoid blocking of the server
+        # the outboxes send the messages in the discord bot's event loop to avoid blocking of the server
         for channel_id in channel_ids:
             channel = self.discord.get_channel(channel_id)
 
             if channel is None:
                 continue
 
-            asyncio.run_coroutine_threadsafe(
-                channel.send(content,
-                             allowed_mentions=AllowedMentions(everyone=False, users=True, roles=True)),
-                loop=self.discord.loop)
+            self.outbox_for(channel).put(content)
+
+    def outbox_for(self, channel: discord.TextChannel) -> DiscordChannelOutbox:
+        """
+        Gets the outbox for the given channel, creating it on first use.
+
+        :param: channel: the discord channel to get the outbox for
+        :return: the outbox messages to the given channel are put into
+        """
+        if channel.id not in self.outboxes:
+            self.outboxes[channel.id] = DiscordChannelOutbox(channel, self.discord.loop, self.logger,
+                                                             flush_window=self.outbound_flush_window,
+                                                             max_size=self.outbound_queue_size,
+                                                             drop_oldest=self.outbound_drop_oldest)
+        return self.outboxes[channel.id]
+
+    def scheduled_jobs_status(self) -> list[str]:
+        """
+        Reports the execution times of the jobs scheduled on the discord bot.
+
+        :return: one line per scheduled job
+        """
+        if self.scheduler is None:
+            return ["No discord connection set up."]
+
+        return self.scheduler.status()
+
+    def outbound_status(self) -> list[str]:
+        """
+        Reports queue depth and latency of the outbound messages towards each discord channel, and of the queues
+        between the server's main thread and the discord bot's event loop.
+
+        :return: one line per discord channel messages were sent to, and one per direction between main thread and
+        event loop
+        """
+        bridge_status = [minqlx.main_thread_jobs.status()]
+        if self.bridge is not None:
+            bridge_status.append(self.bridge.status())
+
+        if len(self.outboxes) == 0:
+            return ["No messages sent to discord, yet."] + bridge_status
+
+        return [outbox.status() for outbox in self.outboxes.values()] + bridge_status
 
     def relay_chat_message(self, player: minqlx.Player, channel: str, message: str) -> None:
         """
@@ -741,13 +1586,15 @@ class SimpleAsyncDiscord(threading.Thread):
         # prefixed by a space or at the beginning of the string
         matcher = re.compile("(?:^| )@([^ ]{3,})")
 
-        member_list = list(self.discord.get_all_members())
         matches: list[re.Match] = matcher.findall(returned_message)
+        if len(matches) == 0:
+            return returned_message
 
+        member_index = self.members_mention_index()
         for match in sorted(matches, key=lambda _match: len(str(_match)), reverse=True):
             if match in ["all", "everyone", "here"]:
                 continue
-            member = SimpleAsyncDiscord.find_user_that_matches(str(match), member_list, player)
+            member = SimpleAsyncDiscord.find_user_in_index(str(match), member_index, player)
             if member is not None:
                 returned_message = returned_message.replace(f"@{match}", member.mention)
 
@@ -764,24 +1611,37 @@ class SimpleAsyncDiscord(threading.Thread):
         :param: player: (default: None) when several alternatives are found for the mentions used, this player is told
         what the alternatives are. None is returned in that case.
 
+        :return: the matching member, or None if none or more than one are found
+        """
+        return SimpleAsyncDiscord.find_user_in_index(match, MentionIndex.of_members(member_list), player)
+
+    @staticmethod
+    def find_user_in_index(match: str, member_index: MentionIndex, player: minqlx.Player = None) \
+            -> Optional[discord.Member]:
+        """
+        find a user that matches the given match in the index of discord members
+
+        :param: match: the match to look for in the username and nick
+        :param: member_index: the index of the members connected to the discord server
+        :param: player: (default: None) when several alternatives are found for the mentions used, this player is told
+        what the alternatives are. None is returned in that case.
+
         :return: the matching member, or None if none or more than one are found
         """
         # try a direct match for the whole name first
-        member = [user for user in member_list if user.name.lower() == match.lower()]
+        member = member_index.exact_matches(match, position=0)
         if len(member) == 1:
             return member[0]
 
         # then try a direct match at the user's nickname
-        member = [user for user in member_list if user.nick is not None and user.nick.lower() == match.lower()]
+        member = member_index.exact_matches(match, position=1)
         if len(member) == 1:
             return member[0]
 
         # if direct searches for the match fail, we try to match portions of the name or portions of the nick, if set
-        member = [user for user in member_list
-                  if user.name.lower().find(match.lower()) != -1 or
-                  (user.nick is not None and user.nick.lower().find(match.lower()) != -1)]
+        member = member_index.substring_matches(match)
         if len(member) == 1:
-            return list(member)[0]
+            return member[0]
 
         # we found more than one matching member, let's tell the player about this.
         if len(member) > 1 and player is not None:
@@ -811,12 +1671,13 @@ class SimpleAsyncDiscord(threading.Thread):
         # prefixed by a space or at the beginning of the string
         matcher = re.compile("(?:^| )#([^ ]{3,})")
 
-        channel_list = [ch for ch in self.discord.get_all_channels()
-                        if ch.type in [ChannelType.text, ChannelType.voice, ChannelType.group]]
         matches: list[re.Match] = matcher.findall(returned_message)
+        if len(matches) == 0:
+            return returned_message
 
+        channel_index = self.channels_mention_index()
         for match in sorted(matches, key=lambda _match: len(str(_match)), reverse=True):
-            channel = SimpleAsyncDiscord.find_channel_that_matches(str(match), channel_list, player)
+            channel = SimpleAsyncDiscord.find_channel_in_index(str(match), channel_index, player)
             if channel is not None:
                 returned_message = returned_message.replace(f"#{match}", channel.mention)
 
@@ -835,18 +1696,35 @@ class SimpleAsyncDiscord(threading.Thread):
 
         :return: the matching channel, or None if none or more than one are found
         """
+        return SimpleAsyncDiscord.find_channel_in_index(match, MentionIndex.of_channels(channel_list), player)
+
+    @staticmethod
+    def find_channel_in_index(match: str, channel_index: MentionIndex, player: minqlx.Player = None) \
+            -> Optional[discord.TextChannel]:
+        """
+        find a channel that matches the given match in the index of discord channels
+
+        :param: match: the match to look for in the channel name
+        :param: channel_index: the index of the channels connected to the discord server
+        :param: player: (default: None) when several alternatives are found for the mentions used, this player is told
+        what the alternatives are. None is returned in that case.
+
+        :return: the matching channel, or None if none or more than one are found
+        """
+        case_insensitive_matches = channel_index.exact_matches(match)
+
         # try a direct channel name match case-sensitive first
-        channel = [ch for ch in channel_list if ch.name == match]
+        channel = [ch for ch in case_insensitive_matches if ch.name == match]
         if len(channel) == 1:
             return channel[0]
 
         # then try a case-insensitive direct match with the channel name
-        channel = [ch for ch in channel_list if ch.name.lower() == match.lower()]
+        channel = case_insensitive_matches
         if len(channel) == 1:
             return channel[0]
 
         # then we try a match with portions of the channel name
-        channel = [ch for ch in channel_list if ch.name.lower().find(match.lower()) != -1]
+        channel = channel_index.substring_matches(match)
         if len(channel) == 1:
             return channel[0]
 
@@ -1,6 +1,10 @@
 from minqlx_plugin_test import *
 
+import json
 import unittest
+
+from redis import StrictRedis
+
 from mockito import *
 from mockito.matchers import *
 from hamcrest import *
@@ -115,7 +119,7 @@ class DuelArenaTests(unittest.TestCase):
 
     def queue_up_players(self, *players):
         for player in players:
-            self.plugin.duelarena_game.queue.insert(0, player.steam_id)
+            self.plugin.duelarena_game.queue.appendleft(player.steam_id)
 
     def test_when_fourth_player_was_loaded_while_duelarena_activated(self):
         red_player = fake_player(1, "Red Player", "red")
@@ -909,7 +913,8 @@ class DuelArenaGameTests(unittest.TestCase):
         setup_plugin()
         setup_cvars({
             "qlx_duelarenaDuelToNormalThreshold": "6",
-            "qlx_duelarenaNormalToDuelThreshold": "11"
+            "qlx_duelarenaNormalToDuelThreshold": "11",
+            "net_port": "27960"
         })
         setup_game_in_progress("ca")
         connected_players()
@@ -1619,3 +1624,101 @@ class DuelArenaGameTests(unittest.TestCase):
         assert_that(self.duelarena_game.player_spec, has_item(extra_player.steam_id))
         assert_player_was_put_on(red_player, any(str), times=0)
         assert_player_was_put_on(blue_player, any(str), times=0)
+
+    def test_persist_without_database_does_nothing(self):
+        self.duelarena_game.queue = [1, 2]
+
+        self.duelarena_game.persist()
+
+    def test_persist_stores_queue_and_scores(self):
+        db = mock(StrictRedis)
+        when(db).set(any, any, ex=any).thenReturn(True)
+        self.duelarena_game.db = db
+        self.duelarena_game.duelmode = True
+        self.duelarena_game.playerset = [1, 2, 3]
+        self.duelarena_game.queue = [3]
+        self.duelarena_game.scores = {1: 4, 2: 2, 3: 0}
+
+        self.duelarena_game.persist()
+
+        verify(db).set("minqlx:duelarena:27960:state",
+                       json.dumps({"duelmode": True, "playerset": [1, 2, 3], "queue": [3],
+                                   "scores": {"1": 4, "2": 2, "3": 0}}),
+                       ex=DUELARENA_STATE_TTL)
+
+    def test_restore_reads_persisted_state_of_connected_players(self):
+        red_player = fake_player(1, "Red Player", "red")
+        blue_player = fake_player(2, "Blue Player", "blue")
+        spec_player = fake_player(3, "Spec Player", "spectator")
+        connected_players(red_player, blue_player, spec_player)
+        db = mock(StrictRedis)
+        when(db).get("minqlx:duelarena:27960:state").thenReturn(json.dumps({
+            "duelmode": True, "playerset": [1, 2, 3, 42], "queue": [42, 3], "scores": {"1": 4, "2": 2, "3": 5}}))
+        self.duelarena_game.db = db
+
+        self.duelarena_game.restore()
+
+        assert_that(self.duelarena_game.duelmode, is_(True))
+        assert_that(self.duelarena_game.playerset, is_([1, 2, 3]))
+        assert_that(self.duelarena_game.queue, is_([3]))
+        assert_that(self.duelarena_game.scores, is_({1: 4, 2: 2, 3: 5}))
+
+    def test_restore_when_game_not_in_progress(self):
+        setup_game_in_warmup()
+        db = mock(StrictRedis)
+        self.duelarena_game.db = db
+
+        self.duelarena_game.restore()
+
+        verify(db, times=0).get(any)
+        assert_that(self.duelarena_game.duelmode, is_(False))
+
+
+class UniqueDequeTests(unittest.TestCase):
+
+    def test_append_keeps_steam_ids_unique(self):
+        steam_ids = UniqueDeque([1, 2])
+
+        steam_ids.append(1)
+        steam_ids.append(3)
+
+        assert_that(steam_ids, is_([1, 2, 3]))
+
+    def test_appendleft_and_pop_rotate_like_a_queue(self):
+        steam_ids = UniqueDeque()
+
+        steam_ids.appendleft(1)
+        steam_ids.appendleft(2)
+        steam_ids.appendleft(3)
+
+        assert_that(steam_ids.pop(), is_(1))
+        assert_that(steam_ids.popleft(), is_(3))
+        assert_that(steam_ids, is_([2]))
+
+    def test_appendleft_moves_existing_steam_id_to_the_left(self):
+        steam_ids = UniqueDeque([1, 2, 3])
+
+        steam_ids.appendleft(3)
+
+        assert_that(steam_ids, is_([3, 1, 2]))
+
+    def test_pop_from_empty_deque(self):
+        assert_that(calling(UniqueDeque().pop), raises(IndexError))
+
+    def test_remove_from_the_middle(self):
+        steam_ids = UniqueDeque([1, 2, 3])
+
+        steam_ids.remove(2)
+
+        assert_that(2 in steam_ids, is_(False))
+        assert_that(steam_ids, is_([1, 3]))
+
+    def test_remove_missing_steam_id(self):
+        assert_that(calling(UniqueDeque([1]).remove).with_args(2), raises(ValueError))
+
+    def test_discard_missing_steam_id(self):
+        steam_ids = UniqueDeque([1])
+
+        steam_ids.discard(2)
+
+        assert_that(len(steam_ids), is_(1))
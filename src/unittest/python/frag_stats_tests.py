@@ -42,14 +42,19 @@ class FragStatsTests(unittest.TestCase):
         verify(self.db).set("minqlx:players:{}:last_used_name".format(player.steam_id),
                             player.name)
 
-    def test_handle_game_countdown_clears_frag_log(self):
-        self.plugin.frag_log = [(123, 456)]
+    def record_frags(self, frag_log):
+        for killer, victim in frag_log:
+            self.plugin.record_frag(killer, victim)
+
+    def test_handle_game_countdown_clears_frag_matrix(self):
+        self.plugin.record_frag(123, 456)
 
         self.plugin.handle_game_countdown()
 
-        assert_that(self.plugin.frag_log, is_([]))
+        assert_that(self.plugin.frag_matrix, is_({}))
+        assert_that(self.plugin.nemeses, is_({}))
 
-    def test_handle_death_records_frag_log_entry(self):
+    def test_handle_death_records_frag_matrix_entry(self):
         victim = fake_player(123, "Fragged Player", team="red")
         killer = fake_player(456, "Fragging Player", team="blue")
 
@@ -57,7 +62,7 @@ class FragStatsTests(unittest.TestCase):
 
         self.plugin.handle_death(victim, killer, {"MOD": "ROCKET"})
 
-        assert_that(self.plugin.frag_log, contains_inanyorder((killer.steam_id, victim.steam_id)))
+        assert_that(self.plugin.frag_matrix[killer.steam_id][victim.steam_id], is_(1))
 
     def test_handle_death_records_soulz_in_db(self):
         victim = fake_player(123, "Fragged Player", team="red")
@@ -86,9 +91,9 @@ class FragStatsTests(unittest.TestCase):
 
         self.plugin.handle_death(victim, victim, {"MOD": "ROCKET"})
 
-        assert_that(self.plugin.frag_log, not_(contains(victim.steam_id)))
+        assert_that(self.plugin.frag_matrix, not_(has_key(victim.steam_id)))
 
-    def test_handle_death_in_warmup_does_not_record_frag_log_entry(self):
+    def test_handle_death_in_warmup_does_not_record_frag_matrix_entry(self):
         setup_game_in_warmup()
 
         victim = fake_player(123, "Fragged Player", team="red")
@@ -98,9 +103,9 @@ class FragStatsTests(unittest.TestCase):
 
         self.plugin.handle_death(victim, killer, {"MOD": "ROCKET"})
 
-        assert_that(self.plugin.frag_log, not_(contains_inanyorder((killer.steam_id, victim.steam_id))))
+        assert_that(self.plugin.frag_matrix, not_(has_key(killer.steam_id)))
 
-    def test_handle_death_by_lava_records_frag_log_entry(self):
+    def test_handle_death_by_lava_records_frag_matrix_entry(self):
         victim = fake_player(123, "Fragged Player", team="red")
         killer = fake_player(456, "Fragging Player", team="blue")
 
@@ -108,11 +113,11 @@ class FragStatsTests(unittest.TestCase):
 
         self.plugin.handle_death(victim, None, {"MOD": "LAVA"})
 
-        assert_that(self.plugin.frag_log, contains_inanyorder(("lava", victim.steam_id)))
+        assert_that(self.plugin.frag_matrix["lava"][victim.steam_id], is_(1))
         verify(self.db).zincrby("minqlx:players:lava:soulz", 1, victim.steam_id)
         verify(self.db).zincrby("minqlx:players:{}:reaperz".format(victim.steam_id), 1, "lava")
 
-    def test_handle_death_by_hurt_records_frag_log_entry(self):
+    def test_handle_death_by_hurt_records_frag_matrix_entry(self):
         victim = fake_player(123, "Fragged Player", team="red")
         killer = fake_player(456, "Fragging Player", team="blue")
 
@@ -120,11 +125,11 @@ class FragStatsTests(unittest.TestCase):
 
         self.plugin.handle_death(victim, None, {"MOD": "HURT"})
 
-        assert_that(self.plugin.frag_log, contains_inanyorder(("void", victim.steam_id)))
+        assert_that(self.plugin.frag_matrix["void"][victim.steam_id], is_(1))
         verify(self.db).zincrby("minqlx:players:void:soulz", 1, victim.steam_id)
         verify(self.db).zincrby("minqlx:players:{}:reaperz".format(victim.steam_id), 1, "void")
 
-    def test_handle_death_by_slime_records_frag_log_entry(self):
+    def test_handle_death_by_slime_records_frag_matrix_entry(self):
         victim = fake_player(123, "Fragged Player", team="red")
         killer = fake_player(456, "Fragging Player", team="blue")
 
@@ -132,11 +137,11 @@ class FragStatsTests(unittest.TestCase):
 
         self.plugin.handle_death(victim, None, {"MOD": "SLIME"})
 
-        assert_that(self.plugin.frag_log, contains_inanyorder(("acid", victim.steam_id)))
+        assert_that(self.plugin.frag_matrix["acid"][victim.steam_id], is_(1))
         verify(self.db).zincrby("minqlx:players:acid:soulz", 1, victim.steam_id)
         verify(self.db).zincrby("minqlx:players:{}:reaperz".format(victim.steam_id), 1, "acid")
 
-    def test_handle_death_by_water_records_frag_log_entry(self):
+    def test_handle_death_by_water_records_frag_matrix_entry(self):
         victim = fake_player(123, "Fragged Player", team="red")
         killer = fake_player(456, "Fragging Player", team="blue")
 
@@ -144,11 +149,11 @@ class FragStatsTests(unittest.TestCase):
 
         self.plugin.handle_death(victim, None, {"MOD": "WATER"})
 
-        assert_that(self.plugin.frag_log, contains_inanyorder(("drowning", victim.steam_id)))
+        assert_that(self.plugin.frag_matrix["drowning"][victim.steam_id], is_(1))
         verify(self.db).zincrby("minqlx:players:drowning:soulz", 1, victim.steam_id)
         verify(self.db).zincrby("minqlx:players:{}:reaperz".format(victim.steam_id), 1, "drowning")
 
-    def test_handle_death_by_crush_records_frag_log_entry(self):
+    def test_handle_death_by_crush_records_frag_matrix_entry(self):
         victim = fake_player(123, "Fragged Player", team="red")
         killer = fake_player(456, "Fragging Player", team="blue")
 
@@ -156,11 +161,11 @@ class FragStatsTests(unittest.TestCase):
 
         self.plugin.handle_death(victim, None, {"MOD": "CRUSH"})
 
-        assert_that(self.plugin.frag_log, contains_inanyorder(("squished", victim.steam_id)))
+        assert_that(self.plugin.frag_matrix["squished"][victim.steam_id], is_(1))
         verify(self.db).zincrby("minqlx:players:squished:soulz", 1, victim.steam_id)
         verify(self.db).zincrby("minqlx:players:{}:reaperz".format(victim.steam_id), 1, "squished")
 
-    def test_handle_death_by_unknown_records_frag_log_entry(self):
+    def test_handle_death_by_unknown_records_frag_matrix_entry(self):
         victim = fake_player(123, "Fragged Player", team="red")
         killer = fake_player(456, "Fragging Player", team="blue")
 
@@ -168,7 +173,7 @@ class FragStatsTests(unittest.TestCase):
 
         self.plugin.handle_death(victim, None, {"MOD": "UNKNOWN"})
 
-        assert_that(self.plugin.frag_log, contains_inanyorder(("unknown", victim.steam_id)))
+        assert_that(self.plugin.frag_matrix["unknown"][victim.steam_id], is_(1))
         verify(self.db).zincrby("minqlx:players:unknown:soulz", 1, victim.steam_id)
         verify(self.db).zincrby("minqlx:players:{}:reaperz".format(victim.steam_id), 1, "unknown")
 
@@ -180,7 +185,7 @@ class FragStatsTests(unittest.TestCase):
 
         self.plugin.handle_death(victim, victim, {"MOD": "SWITCHTEAM"})
 
-        assert_that(self.plugin.frag_log, not_(contains_inanyorder((victim.steam_id, victim.steam_id))))
+        assert_that(self.plugin.frag_matrix, not_(has_key(victim.steam_id)))
 
     def test_cmd_mapsoulz_with_no_frags(self):
         player = fake_player(123, "Issuing Player", team="red")
@@ -198,11 +203,11 @@ class FragStatsTests(unittest.TestCase):
         disconnected_killed2 = fake_player(5, "Disconnected Killed2", team="blue")
         connected_players(player, killed1)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (player.steam_id, killed1.steam_id),
             (player.steam_id, disconnected_killed2.steam_id),
             (player.steam_id, disconnected_killed2.steam_id)
-        ]
+        ])
         when(self.db).exists("minqlx:players:{}:last_used_name".format(disconnected_killed2.steam_id)).thenReturn(True)
         when(self.db).get("minqlx:players:{}:last_used_name".format(disconnected_killed2.steam_id)) \
             .thenReturn(disconnected_killed2.name)
@@ -221,7 +226,7 @@ class FragStatsTests(unittest.TestCase):
         killed4 = fake_player(7, "Killed4", team="blue")
         connected_players(player, killed1, killed2, killed3, killed4)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (player.steam_id, killed1.steam_id),
             (player.steam_id, killed2.steam_id),
             (player.steam_id, killed3.steam_id),
@@ -240,7 +245,7 @@ class FragStatsTests(unittest.TestCase):
             (player.steam_id, killed4.steam_id),
             (player.steam_id, killed4.steam_id),
             (player.steam_id, killed3.steam_id)
-        ]
+        ])
 
         self.plugin.cmd_mapsoulz(player, ["!mapsoulz"], self.reply_channel)
 
@@ -258,12 +263,12 @@ class FragStatsTests(unittest.TestCase):
         killed4 = fake_player(7, "Killed4", team="blue")
         connected_players(player, fragging_player, killed1, killed2, killed3, killed4)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (player.steam_id, killed1.steam_id),
             (fragging_player.steam_id, killed2.steam_id),
             (fragging_player.steam_id, killed2.steam_id),
             (fragging_player.steam_id, killed3.steam_id)
-        ]
+        ])
 
         self.plugin.cmd_mapsoulz(player, ["!mapsoulz", "Fragging"], self.reply_channel)
 
@@ -280,12 +285,12 @@ class FragStatsTests(unittest.TestCase):
         killed4 = fake_player(7, "Killed4", team="blue")
         connected_players(player, killed1, killed2, killed3, killed4)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (player.steam_id, killed1.steam_id),
             (fragging_player.steam_id, killed2.steam_id),
             (fragging_player.steam_id, killed2.steam_id),
             (fragging_player.steam_id, killed3.steam_id)
-        ]
+        ])
 
         when(self.db).exists("minqlx:players:{}:last_used_name".format(fragging_player.steam_id)).thenReturn(True)
         when(self.db).get("minqlx:players:{}:last_used_name".format(fragging_player.steam_id)) \
@@ -306,12 +311,12 @@ class FragStatsTests(unittest.TestCase):
         killed4 = fake_player(7, "Killed4", team="blue")
         connected_players(player, killed1, killed2, killed3, killed4)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (player.steam_id, killed1.steam_id),
             (fragging_player.steam_id, killed2.steam_id),
             (fragging_player.steam_id, killed2.steam_id),
             (fragging_player.steam_id, killed3.steam_id)
-        ]
+        ])
 
         when(self.db).exists("minqlx:players:{}:last_used_name".format(fragging_player.steam_id)).thenReturn(False)
 
@@ -358,12 +363,12 @@ class FragStatsTests(unittest.TestCase):
         killer1 = fake_player(4, "Killer1", team="blue")
         connected_players(player, fragged_player, killer1)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (killer1.steam_id, player.steam_id),
             ("lava", fragged_player.steam_id),
             ("lava", fragged_player.steam_id),
             ("void", player.steam_id)
-        ]
+        ])
 
         self.plugin.cmd_mapsoulz(player, ["!mapsoulz", "!lava"], self.reply_channel)
 
@@ -378,7 +383,7 @@ class FragStatsTests(unittest.TestCase):
         killer1 = fake_player(4, "Killer1", team="blue")
         connected_players(player, fragged_player, killer1)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (killer1.steam_id, player.steam_id),
             ("lava", fragged_player.steam_id),
             ("squished", player.steam_id),
@@ -387,7 +392,7 @@ class FragStatsTests(unittest.TestCase):
             ("drowning", player.steam_id),
             ("unknown", fragged_player.steam_id),
             ("void", player.steam_id)
-        ]
+        ])
 
         self.plugin.cmd_mapsoulz(player, ["!mapsoulz", "!void"], self.reply_channel)
 
@@ -402,7 +407,7 @@ class FragStatsTests(unittest.TestCase):
         killer1 = fake_player(4, "Killer1", team="blue")
         connected_players(player, fragged_player, killer1)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (killer1.steam_id, player.steam_id),
             ("lava", fragged_player.steam_id),
             ("squished", player.steam_id),
@@ -411,7 +416,7 @@ class FragStatsTests(unittest.TestCase):
             ("drowning", player.steam_id),
             ("unknown", fragged_player.steam_id),
             ("void", player.steam_id)
-        ]
+        ])
 
         self.plugin.cmd_mapsoulz(player, ["!mapsoulz", "!drowning"], self.reply_channel)
 
@@ -426,7 +431,7 @@ class FragStatsTests(unittest.TestCase):
         killer1 = fake_player(4, "Killer1", team="blue")
         connected_players(player, fragged_player, killer1)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (killer1.steam_id, player.steam_id),
             ("lava", fragged_player.steam_id),
             ("squished", player.steam_id),
@@ -435,7 +440,7 @@ class FragStatsTests(unittest.TestCase):
             ("drowning", player.steam_id),
             ("unknown", fragged_player.steam_id),
             ("void", player.steam_id)
-        ]
+        ])
 
         self.plugin.cmd_mapsoulz(player, ["!mapsoulz", "!acid"], self.reply_channel)
 
@@ -450,7 +455,7 @@ class FragStatsTests(unittest.TestCase):
         killer1 = fake_player(4, "Killer1", team="blue")
         connected_players(player, fragged_player, killer1)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (killer1.steam_id, player.steam_id),
             ("lava", fragged_player.steam_id),
             ("squished", player.steam_id),
@@ -459,7 +464,7 @@ class FragStatsTests(unittest.TestCase):
             ("drowning", player.steam_id),
             ("unknown", fragged_player.steam_id),
             ("void", player.steam_id)
-        ]
+        ])
 
         self.plugin.cmd_mapsoulz(player, ["!mapsoulz", "!unknown"], self.reply_channel)
 
@@ -486,7 +491,7 @@ class FragStatsTests(unittest.TestCase):
         killer4 = fake_player(7, "Killer4", team="blue")
         connected_players(player, killer1, killer2, killer3, killer4)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (killer1.steam_id, player.steam_id),
             (killer2.steam_id, player.steam_id),
             (killer3.steam_id, player.steam_id),
@@ -504,7 +509,7 @@ class FragStatsTests(unittest.TestCase):
             (killer3.steam_id, player.steam_id),
             (killer4.steam_id, player.steam_id),
             (killer3.steam_id, player.steam_id)
-        ]
+        ])
 
         self.plugin.cmd_mapreaperz(player, ["!mapreaperz"], self.reply_channel)
 
@@ -522,12 +527,12 @@ class FragStatsTests(unittest.TestCase):
         killer4 = fake_player(7, "Killer4", team="blue")
         connected_players(player, fragged_player, killer1, killer2, killer3, killer4)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (killer1.steam_id, player.steam_id),
             (killer2.steam_id, fragged_player.steam_id),
             (killer2.steam_id, fragged_player.steam_id),
             (killer3.steam_id, fragged_player.steam_id)
-        ]
+        ])
 
         self.plugin.cmd_mapreaperz(player, ["!mapreaperz", "Fragged"], self.reply_channel)
 
@@ -564,12 +569,12 @@ class FragStatsTests(unittest.TestCase):
         killer1 = fake_player(4, "Killer1", team="blue")
         connected_players(player, fragged_player, killer1)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (killer1.steam_id, player.steam_id),
             ("lava", fragged_player.steam_id),
             ("lava", fragged_player.steam_id),
             ("void", fragged_player.steam_id)
-        ]
+        ])
 
         self.plugin.cmd_mapreaperz(player, ["!mapreaperz", "Fragged"], self.reply_channel)
 
@@ -584,11 +589,11 @@ class FragStatsTests(unittest.TestCase):
         disconnected_killed2 = fake_player(5, "Disconnected Killed2", team="blue")
         connected_players(player, killed1)
 
-        self.plugin.frag_log = [
+        self.record_frags([
             (killed1.steam_id, player.steam_id),
             (disconnected_killed2.steam_id, player.steam_id),
             (disconnected_killed2.steam_id, player.steam_id)
-        ]
+        ])
         when(self.db).exists("minqlx:players:{}:last_used_name".format(disconnected_killed2.steam_id)).thenReturn(True)
         when(self.db).get("minqlx:players:{}:last_used_name".format(disconnected_killed2.steam_id)) \
             .thenReturn(disconnected_killed2.name)
@@ -599,6 +604,77 @@ class FragStatsTests(unittest.TestCase):
                                    matches("Top 10 reaperz of Issuing Player.*'s soul: "
                                            "Disconnected Killed2.* \(2\), Killed1.* \(1\)"))
 
+    def test_record_frag_keeps_track_of_nemesis_and_favourite_victim(self):
+        self.record_frags([
+            (1, 2),
+            (3, 2),
+            (3, 2),
+            (1, 4),
+            (1, 4),
+            (1, 4)
+        ])
+
+        assert_that(self.plugin.nemeses[2], is_((3, 2)))
+        assert_that(self.plugin.nemeses[4], is_((1, 3)))
+        assert_that(self.plugin.favourite_victims[1], is_((4, 3)))
+        assert_that(self.plugin.favourite_victims[3], is_((2, 2)))
+
+    def test_cmd_nemesis_with_no_fragger(self):
+        player = fake_player(123, "Issuing Player", team="red")
+
+        connected_players(player)
+
+        self.plugin.cmd_nemesis(player, ["!nemesis"], self.reply_channel)
+
+        assert_channel_was_replied(self.reply_channel,
+                                   matches("Issuing Player.*'s soul was not reaped by anyone, yet."))
+
+    def test_cmd_nemesis_returns_most_frequent_fragger(self):
+        player = fake_player(123, "Issuing Player", team="red")
+
+        killer1 = fake_player(4, "Killer1", team="blue")
+        killer2 = fake_player(5, "Killer2", team="blue")
+        connected_players(player, killer1, killer2)
+
+        self.record_frags([
+            (killer1.steam_id, player.steam_id),
+            (killer2.steam_id, player.steam_id),
+            (killer2.steam_id, player.steam_id)
+        ])
+
+        self.plugin.cmd_nemesis(player, ["!nemesis"], self.reply_channel)
+
+        assert_channel_was_replied(self.reply_channel,
+                                   matches("Issuing Player.*'s nemesis this map: Killer2.* \\(2\\)"))
+
+    def test_cmd_favvictim_with_no_frags(self):
+        player = fake_player(123, "Issuing Player", team="red")
+
+        connected_players(player)
+
+        self.plugin.cmd_favvictim(player, ["!favvictim"], self.reply_channel)
+
+        assert_channel_was_replied(self.reply_channel, matches("Issuing Player.* didn't reap any soulz, yet."))
+
+    def test_cmd_favvictim_for_another_player(self):
+        player = fake_player(123, "Issuing Player", team="red")
+        fragging_player = fake_player(456, "Fragging Player", team="red")
+
+        killed1 = fake_player(4, "Killed1", team="blue")
+        killed2 = fake_player(5, "Killed2", team="blue")
+        connected_players(player, fragging_player, killed1, killed2)
+
+        self.record_frags([
+            (fragging_player.steam_id, killed1.steam_id),
+            (fragging_player.steam_id, killed2.steam_id),
+            (fragging_player.steam_id, killed2.steam_id)
+        ])
+
+        self.plugin.cmd_favvictim(player, ["!favvictim", "Fragging"], self.reply_channel)
+
+        assert_channel_was_replied(self.reply_channel,
+                                   matches("Fragging Player.*'s favourite victim this map: Killed2.* \\(2\\)"))
+
     def test_cmd_soulz_with_no_frags(self):
         player = fake_player(123, "Issuing Player", team="red")
 
@@ -0,0 +1,217 @@
+"""Functions for microbenchmarking hot paths of minqlx and :class:`minqlx.Plugin`s with the fakes of this package.
+
+Benchmarks are registered with the :func:`.benchmark` decorator. The decorated function sets up everything needed,
+and returns the callable that should be timed. After timing, :func:`mockito.unstub()` is called to clean up any
+fakes used during the setup.
+
+Results are appended to a JSON lines file together with the git commit they were measured on, so that regressions
+can be detected by comparing against the previous run.
+
+Example usage::
+
+    @benchmark("frag_stats.record_frag")
+    def bench_record_frag():
+        setup_replay()
+        plugin = frag_stats()
+        ...
+        return lambda: plugin.record_frag(123, 456)
+
+    if __name__ == "__main__":
+        run_benchmarks_from_command_line()
+"""
+
+import argparse
+import datetime
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import timeit
+
+from mockito import unstub
+
+
+BENCHMARKS = []
+
+
+class Benchmark:
+    """A registered benchmark.
+
+    :param name: the name of the benchmark
+    :param setup: the function setting up the benchmark, returning the callable to time
+    :param param: the parameter passed to the setup function, or None if the benchmark is not parameterized
+    """
+    def __init__(self, name, setup, param=None):
+        self.name = name
+        self.setup = setup
+        self.param = param
+
+    @property
+    def full_name(self):
+        if self.param is None:
+            return self.name
+        return "{}[{}]".format(self.name, self.param)
+
+    def run(self, repeat=5):
+        """Times the benchmark.
+
+        :param repeat: the amount of timing runs. The amount of calls per run is determined automatically.
+        :return: a dictionary with the minimum and median time of a single call in seconds
+        """
+        try:
+            timed = self.setup() if self.param is None else self.setup(self.param)
+            timer = timeit.Timer(timed)
+            number, _ = timer.autorange()
+            timings = [timing / number for timing in timer.repeat(repeat=repeat, number=number)]
+        finally:
+            unstub()
+
+        return {"min": min(timings), "median": statistics.median(timings), "number": number}
+
+
+def benchmark(name, params=None):
+    """Decorator registering a benchmark.
+
+    :param name: the name of the benchmark
+    :param params: an iterable of parameters. The benchmark is registered once per parameter, and the decorated
+    function receives it as its only argument. (default: None)
+    """
+    def register(setup):
+        if params is None:
+            BENCHMARKS.append(Benchmark(name, setup))
+        else:
+            for param in params:
+                BENCHMARKS.append(Benchmark(name, setup, param))
+        return setup
+
+    return register
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(pattern="*", repeat=5):
+    """Runs all registered benchmarks with names matching the pattern.
+
+    :param pattern: a :mod:`fnmatch` pattern the full benchmark names need to match (default: "*")
+    :param repeat: the amount of timing runs per benchmark (default: 5)
+    :return: a dictionary of the full benchmark names and their results
+    """
+    results = {}
+    for registered in BENCHMARKS:
+        if not fnmatch.fnmatch(registered.full_name, pattern):
+            continue
+        results[registered.full_name] = registered.run(repeat=repeat)
+
+    return results
+
+
+class BenchmarkHistory:
+    """The results of previous benchmark runs, stored as JSON lines.
+
+    :param path: the path of the history file
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def entries(self):
+        if not os.path.exists(self.path):
+            return []
+
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def previous(self):
+        entries = self.entries()
+        if len(entries) == 0:
+            return None
+        return entries[-1]
+
+    def append(self, results, commit=None):
+        entry = {
+            "commit": commit if commit is not None else current_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "results": results
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        return entry
+
+
+def regressions(previous_results, results, threshold=0.2):
+    """Finds benchmarks that got slower by more than the given threshold.
+
+    Minimum timings are compared, since they are the least affected by noise on the machine.
+
+    :param previous_results: the results of the previous run
+    :param results: the results of the current run
+    :param threshold: the relative slow-down tolerated (default: 0.2)
+    :return: a dictionary of benchmark names and their relative slow-down
+    """
+    returned = {}
+    for name, result in results.items():
+        if name not in previous_results or previous_results[name]["min"] == 0:
+            continue
+
+        slow_down = result["min"] / previous_results[name]["min"] - 1.0
+        if slow_down > threshold:
+            returned[name] = slow_down
+
+    return returned
+
+
+def format_results(results, previous_results=None):
+    lines = []
+    for name, result in results.items():
+        line = "{:<60} min {:>10.3f}us  median {:>10.3f}us".format(name, result["min"] * 10**6,
+                                                                   result["median"] * 10**6)
+        if previous_results is not None and name in previous_results and previous_results[name]["min"] != 0:
+            line += "  ({:+.1%})".format(result["min"] / previous_results[name]["min"] - 1.0)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def run_benchmarks_from_command_line(args=None):
+    """Runs the registered benchmarks, prints and records the results, and compares them with the previous run.
+
+    :param args: the command line arguments (default: None, i.e. sys.argv)
+    :return: the exit code, 1 if regressions were found and --fail-on-regression was given, 0 otherwise
+    """
+    parser = argparse.ArgumentParser(description="Run minqlx plugin benchmarks.")
+    parser.add_argument("-k", "--filter", default="*", help="only run benchmarks matching this pattern")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="timing runs per benchmark")
+    parser.add_argument("--results", default="benchmark_results.jsonl",
+                        help="JSON lines file the results are recorded to")
+    parser.add_argument("--no-record", action="store_true", help="do not record the results")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slow-down reported as regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with 1 when regressions were found")
+    options = parser.parse_args(args)
+
+    history = BenchmarkHistory(options.results)
+    previous = history.previous()
+    previous_results = previous["results"] if previous is not None else None
+
+    results = run_benchmarks(options.filter, repeat=options.repeat)
+    print(format_results(results, previous_results))
+
+    if not options.no_record:
+        history.append(results)
+
+    if previous_results is None:
+        return 0
+
+    found_regressions = regressions(previous_results, results, options.threshold)
+    for name, slow_down in found_regressions.items():
+        print("REGRESSION {}: {:+.1%} compared to {}".format(name, slow_down, previous["commit"]))
+
+    if found_regressions and options.fail_on_regression:
+        return 1
+    return 0
@@ -36,6 +36,8 @@ def setup_plugin():
     when2(Plugin.kick, any, any(str)).thenReturn(None)
     spy2(minqlx.get_cvar)
     when2(minqlx.get_cvar, "zmq_stats_enable").thenReturn("1")
+    # Values cached by previous tests are stale with the fresh stubs.
+    minqlx.CVARS.clear()
 
 
 def setup_cvar(cvar_name, cvar_value):
@@ -48,6 +50,7 @@ def setup_cvar(cvar_name, cvar_value):
     :param cvar_value: the value the plugin should return for the cvar
     """
     when2(minqlx.get_cvar, cvar_name).thenReturn(cvar_value)
+    minqlx.CVARS.invalidate(cvar_name)
 
 
 def setup_cvars(cvars):
@@ -60,6 +63,7 @@ def setup_cvars(cvars):
     """
     for cvar in cvars:
         when2(minqlx.get_cvar, cvar).thenReturn(cvars[cvar])
+        minqlx.CVARS.invalidate(cvar)
 
 
 def assert_plugin_sent_to_console(matcher, times=1, atleast=None):
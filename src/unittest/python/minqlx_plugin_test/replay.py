@@ -0,0 +1,221 @@
+"""Functions for replaying stats recordings made by :class:`minqlx.StatsRecorder` through the event dispatchers of
+minqlx with the minqlx C layer replaced by the fakes of this package. This makes it possible to benchmark the plugins
+handling stats events without a running Quake Live server.
+
+Example usage::
+
+    setup_replay({"qlx_fragstats_toplimit": "10"})
+    plugin = frag_stats()
+    statistics = StatsReplay("stats.json.gz").run()
+    print(statistics)
+    unstub()
+"""
+
+import json
+import math
+import time
+
+import minqlx
+from minqlx import Plugin
+
+from mockito import *
+from mockito.matchers import *
+
+from .plugin import setup_plugin
+from .game import setup_game_in_warmup, setup_game_in_progress
+from .player import fake_player
+
+
+def setup_replay(cvars=None):
+    """Setup the fake minqlx layer for replaying a stats recording.
+
+    Cvars are kept in a dictionary, so that plugins may set and read their cvars while being loaded and during the
+    replay.
+
+    **Make sure to use :func:`mockito.unstub()` after the replay to avoid side effects spilling into the next
+    replay.**
+
+    :param cvars: a dictionary containing the cvar names as keys, and their values (default: None)
+    :return: the dictionary holding the cvars of the fake server
+    """
+    setup_plugin()
+    fake_cvars = {"zmq_stats_enable": "1"}
+    if cvars is not None:
+        fake_cvars.update(cvars)
+
+    def set_cvar(name, value, _flags=0):
+        created = name not in fake_cvars
+        fake_cvars[name] = str(value)
+        return created
+
+    when2(minqlx.get_cvar, any).thenAnswer(fake_cvars.get)
+    when2(minqlx.set_cvar, any, any).thenAnswer(set_cvar)
+    when2(minqlx.set_cvar, any, any, any).thenAnswer(set_cvar)
+    setup_game_in_warmup()
+
+    return fake_cvars
+
+
+def percentile(values, percent):
+    """Calculates the percentile of the given values by the nearest-rank method.
+
+    :param values: the values, not necessarily sorted
+    :param percent: the percentile to calculate, between 0 and 100
+    """
+    if len(values) == 0:
+        return 0.0
+
+    sorted_values = sorted(values)
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class ReplayStatistics:
+    """The timings collected while replaying a stats recording.
+
+    All times are given in seconds.
+    """
+    def __init__(self):
+        self.handler_times = {}
+        self.wall_time = 0.0
+
+    def add(self, message_type, handler_time):
+        self.handler_times.setdefault(message_type, []).append(handler_time)
+
+    @property
+    def events(self):
+        return sum(len(times) for times in self.handler_times.values())
+
+    @property
+    def handler_time(self):
+        return sum(sum(times) for times in self.handler_times.values())
+
+    @property
+    def events_per_second(self):
+        if self.handler_time == 0.0:
+            return 0.0
+        return self.events / self.handler_time
+
+    def percentile(self, percent, message_type=None):
+        if message_type is not None:
+            return percentile(self.handler_times.get(message_type, []), percent)
+
+        return percentile([handler_time for times in self.handler_times.values() for handler_time in times], percent)
+
+    def __str__(self):
+        lines = ["{} events in {:.3f}s handler time ({:.3f}s wall time): {:.0f} events/s, p50 {:.3f}ms, "
+                 "p99 {:.3f}ms".format(self.events, self.handler_time, self.wall_time, self.events_per_second,
+                                       self.percentile(50) * 1000, self.percentile(99) * 1000)]
+        for message_type in sorted(self.handler_times):
+            lines.append("  {}: {} events, p50 {:.3f}ms, p99 {:.3f}ms".format(
+                message_type, len(self.handler_times[message_type]),
+                self.percentile(50, message_type) * 1000, self.percentile(99, message_type) * 1000))
+        return "\n".join(lines)
+
+
+class StatsReplay:
+    """Replays a stats recording through :class:`minqlx.StatsListener`'s dispatching. Players showing up in the
+    recording are faked with :func:`.fake_player`, and the game is set up in warmup or in progress following the match
+    start and end messages.
+
+    **The fake minqlx layer needs to be set up via :func:`.setup_replay()` before replaying.**
+
+    :param path: the path to the recording
+    :param realtime: whether to keep the timings between the messages as recorded (default: False)
+    :param speed: speed factor applied to the recorded timings when replaying in realtime (default: 1.0)
+    """
+    def __init__(self, path, realtime=False, speed=1.0):
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+        self.players = {}
+
+        self.listener = minqlx.StatsListener.__new__(minqlx.StatsListener)
+        self.listener._in_progress = False
+        self.listener.done = True
+
+    def run(self):
+        """Replays the recording.
+
+        :return: the :class:`.ReplayStatistics` collected
+        """
+        when2(Plugin.players).thenAnswer(lambda: list(self.players.values()))
+        when2(Plugin.player, any).thenAnswer(self.find_player)
+
+        statistics = ReplayStatistics()
+        replay_start = time.perf_counter()
+        previous_offset = None
+        session_start = replay_start
+        for offset, message in minqlx.read_stats_recording(self.path):
+            # Offsets start over when the server was restarted during the recording.
+            if previous_offset is None or offset < previous_offset:
+                session_start = time.perf_counter() - offset / self.speed
+            previous_offset = offset
+
+            if self.realtime:
+                remaining = session_start + offset / self.speed - time.perf_counter()
+                if remaining > 0:
+                    time.sleep(remaining)
+
+            stats = json.loads(message)
+            self.update_fakes(stats)
+
+            handler_start = time.perf_counter()
+            self.listener.dispatch(stats)
+            minqlx.handle_frame()
+            statistics.add(stats["TYPE"], time.perf_counter() - handler_start)
+
+        statistics.wall_time = time.perf_counter() - replay_start
+        return statistics
+
+    def update_fakes(self, stats):
+        data = stats["DATA"]
+        if stats["TYPE"] == "MATCH_STARTED":
+            setup_game_in_progress(game_type=data.get("GAME_TYPE", "ca").lower(), mapname=data.get("MAP"))
+        elif stats["TYPE"] == "MATCH_REPORT":
+            setup_game_in_warmup(game_type=data.get("GAME_TYPE", "ca").lower(), mapname=data.get("MAP"))
+        elif stats["TYPE"] == "PLAYER_CONNECT":
+            self.fake_player_from(data)
+        elif stats["TYPE"] == "PLAYER_DISCONNECT":
+            self.remove_player(data)
+        elif stats["TYPE"] == "PLAYER_SWITCHTEAM":
+            self.fake_player_from(data["KILLER"]).team = self.team_of(data["KILLER"])
+        elif stats["TYPE"] == "PLAYER_DEATH":
+            self.fake_player_from(data["VICTIM"])
+            if data["KILLER"]:
+                self.fake_player_from(data["KILLER"])
+
+    def find_player(self, name):
+        if name in self.players:
+            return self.players[name]
+
+        for player in self.players.values():
+            if player is name:
+                return player
+
+        return None
+
+    @staticmethod
+    def team_of(data):
+        # Depending on the message type, teams are either given by name or by number.
+        team = data.get("TEAM", "spectator")
+        if isinstance(team, int):
+            return minqlx.TEAMS[team]
+        return team.lower()
+
+    @staticmethod
+    def identifier_for(data):
+        steam_id = int(data["STEAM_ID"])
+        # Bots are identified by their name.
+        return steam_id if steam_id else data["NAME"]
+
+    def fake_player_from(self, data):
+        identifier = self.identifier_for(data)
+        if identifier not in self.players:
+            steam_id = int(data["STEAM_ID"])
+            self.players[identifier] = fake_player(steam_id, data.get("NAME", str(steam_id)),
+                                                   team=self.team_of(data), id=len(self.players))
+        return self.players[identifier]
+
+    def remove_player(self, data):
+        self.players.pop(self.identifier_for(data), None)
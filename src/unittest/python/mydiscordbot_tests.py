@@ -6,22 +6,23 @@ from unittest.mock import AsyncMock
 
 from mockito import mock, unstub, verify, when, when2, patch  # type: ignore
 from mockito.matchers import matches, arg_that  # type: ignore
-from hamcrest import assert_that, is_
+from hamcrest import assert_that, is_, matches_regexp
 
 from undecorated import undecorated  # type: ignore
 
 # noinspection PyPackageRequirements
 import discord
 # noinspection PyPackageRequirements
-from discord import ChannelType, User, Message, TextChannel, Status  # type: ignore
+from discord import ChannelType, User, Message, TextChannel, Status, Guild  # type: ignore
 # noinspection PyPackageRequirements
 from discord.ext.commands import Bot  # type: ignore
 
 import minqlx
-from mydiscordbot import mydiscordbot, MinqlxHelpCommand, SimpleAsyncDiscord
+from mydiscordbot import mydiscordbot, MinqlxHelpCommand, SimpleAsyncDiscord, DiscordChannelOutbox, \
+    MentionIndex, DiscordJobScheduler, DiscordLoopBridge, GameStatus
 
 from minqlx_plugin_test import setup_plugin, setup_game_in_warmup, connected_players, setup_cvars, \
-    assert_plugin_sent_to_console, fake_player, player_that_matches, setup_no_game, setup_cvar
+    assert_plugin_sent_to_console, fake_player, player_that_matches, setup_no_game, setup_cvar, setup_game_in_progress
 
 
 class MyDiscordBotTests(unittest.TestCase):
@@ -76,6 +77,37 @@ class MyDiscordBotTests(unittest.TestCase):
 
         verify(self.discord, times=0).relay_chat_message(any, any, any)
 
+    def test_is_filtered_message_matches_any_filter(self):
+        setup_cvars({"qlx_discordQuakeRelayMessageFilters": r"^\!s$, ^\!p$, secret"})
+
+        assert_that(self.plugin.is_filtered_message("!p"), is_(True))
+        assert_that(self.plugin.is_filtered_message("secret message"), is_(True))
+        assert_that(self.plugin.is_filtered_message("not so secret"), is_(False))
+        assert_that(self.plugin.is_filtered_message("!pp"), is_(False))
+
+    def test_is_filtered_message_compiles_filters_once(self):
+        self.plugin.is_filtered_message("!s")
+        matchers = self.plugin.discord_message_filter_matchers
+
+        self.plugin.is_filtered_message("!p")
+
+        assert_that(self.plugin.discord_message_filter_matchers is matchers, is_(True))
+
+    def test_is_filtered_message_after_filter_cvar_changed(self):
+        self.plugin.is_filtered_message("!s")
+
+        setup_cvars({"qlx_discordQuakeRelayMessageFilters": r"^\!q$"})
+
+        assert_that(self.plugin.is_filtered_message("!s"), is_(False))
+        assert_that(self.plugin.is_filtered_message("!q"), is_(True))
+
+    def test_is_filtered_message_with_filter_using_global_flags(self):
+        setup_cvars({"qlx_discordQuakeRelayMessageFilters": r"^\!s$, (?i)^secret"})
+
+        assert_that(self.plugin.is_filtered_message("SECRET message"), is_(True))
+        assert_that(self.plugin.is_filtered_message("!s"), is_(True))
+        assert_that(self.plugin.is_filtered_message("!p"), is_(False))
+
     def test_handle_player_connects(self):
         undecorated(self.plugin.handle_player_connect)(self.plugin, fake_player(1, "Connecting Player"))
 
@@ -406,6 +438,8 @@ def mocked_user(_id=777, name="Some-Discord-User", nick=None):
     user.name = name
     user.nick = nick
     user.mention = f"<@{user.id}"
+    user.guild = mock(spec=Guild)
+    user.guild.id = 1
 
     return user
 
@@ -467,6 +501,427 @@ class MinqlxHelpCommandTests(unittest.TestCase):
         assert_that(ending_note, is_("Type !help command for more info on a command."))
 
 
+class DiscordChannelOutboxTests(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.logger = mock(spec=logging.Logger)
+        self.channel = mocked_channel(_id=1234, name="relay-channel")
+
+    def tearDown(self):
+        unstub()
+
+    def outbox(self, flush_window=0.01, max_size=200, drop_oldest=True):
+        return DiscordChannelOutbox(self.channel, asyncio.get_running_loop(), self.logger,
+                                    flush_window=flush_window, max_size=max_size, drop_oldest=drop_oldest)
+
+    async def flushed(self, outbox):
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if not outbox.flushing:
+                return
+
+    async def test_put_sends_message_after_flush_window(self):
+        outbox = self.outbox()
+
+        outbox.put("awesome relayed message")
+
+        self.channel.send.assert_not_called()
+        await self.flushed(outbox)
+        assert_text_was_sent_to_discord_channel(self.channel, "awesome relayed message")
+
+    async def test_messages_within_flush_window_are_merged(self):
+        outbox = self.outbox()
+
+        outbox.put("first message")
+        outbox.put("second message")
+        await self.flushed(outbox)
+
+        assert_text_was_sent_to_discord_channel(self.channel, "first message\nsecond message")
+        assert_that(outbox.sent_lines, is_(2))
+        assert_that(outbox.sent_messages, is_(1))
+
+    async def test_merged_messages_respect_discord_message_length(self):
+        outbox = self.outbox()
+
+        outbox.put("a" * 1500)
+        outbox.put("b" * 1000)
+        await self.flushed(outbox)
+
+        assert_that(self.channel.send.call_count, is_(2))
+        assert_that(self.channel.send.call_args_list[0].args[0], is_("a" * 1500))
+        assert_that(self.channel.send.call_args_list[1].args[0], is_("b" * 1000))
+
+    async def test_full_outbox_drops_oldest_messages(self):
+        outbox = self.outbox(max_size=2)
+
+        outbox.put("first message")
+        outbox.put("second message")
+        outbox.put("third message")
+        await self.flushed(outbox)
+
+        assert_text_was_sent_to_discord_channel(self.channel, "second message\nthird message")
+        assert_that(outbox.dropped_lines, is_(1))
+
+    async def test_full_outbox_drops_newest_messages(self):
+        outbox = self.outbox(max_size=2, drop_oldest=False)
+
+        outbox.put("first message")
+        outbox.put("second message")
+        outbox.put("third message")
+        await self.flushed(outbox)
+
+        assert_text_was_sent_to_discord_channel(self.channel, "first message\nsecond message")
+        assert_that(outbox.dropped_lines, is_(1))
+
+    async def test_failed_send_does_not_stall_outbox(self):
+        self.channel.send.side_effect = [Exception("rate limited"), None]
+        when(self.logger).error(any)
+        outbox = self.outbox()
+
+        outbox.put("lost message")
+        await self.flushed(outbox)
+        outbox.put("next message")
+        await self.flushed(outbox)
+
+        assert_that(self.channel.send.call_args.args[0], is_("next message"))
+        assert_that(outbox.sent_messages, is_(1))
+        verify(self.logger).error(matches("Sending 1 message\\(s\\) to discord channel 1234 failed: rate limited"))
+
+    async def test_cancelled_flush_does_not_stall_outbox(self):
+        outbox = self.outbox(flush_window=10)
+
+        outbox.put("first message")
+        await asyncio.sleep(0.01)
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task():
+                task.cancel()
+        await asyncio.sleep(0)
+        outbox.flush_window = 0.01
+        outbox.put("second message")
+        await self.flushed(outbox)
+
+        assert_text_was_sent_to_discord_channel(self.channel, "first message\nsecond message")
+
+    async def test_status_reports_queue_metrics(self):
+        outbox = self.outbox()
+
+        outbox.put("first message")
+        await self.flushed(outbox)
+
+        assert_that(outbox.status(),
+                    matches_regexp(r"#relay-channel: 0 queued, 1 lines sent in 1 messages, 0 dropped, "
+                                   r"latency avg \d+\.\d\ds, max \d+\.\d\ds"))
+
+
+class MentionIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = MentionIndex(lambda member: (member.name, member.nick))
+
+    def tearDown(self):
+        unstub()
+
+    def test_exact_matches_are_case_insensitive(self):
+        member = mocked_user(_id=1, name="UsEr")
+        self.index.add(member.id, member)
+
+        assert_that(self.index.exact_matches("user"), is_([member]))
+
+    def test_exact_matches_by_position(self):
+        member = mocked_user(_id=1, name="user", nick="nickname")
+        self.index.add(member.id, member)
+
+        assert_that(self.index.exact_matches("nickname", position=0), is_([]))
+        assert_that(self.index.exact_matches("nickname", position=1), is_([member]))
+
+    def test_substring_matches_on_any_name(self):
+        member = mocked_user(_id=1, name="some-user")
+        nicked_member = mocked_user(_id=2, name="other", nick="UsEr-nick")
+        unmatched_member = mocked_user(_id=3, name="unmatched")
+        self.index.add(member.id, member)
+        self.index.add(nicked_member.id, nicked_member)
+        self.index.add(unmatched_member.id, unmatched_member)
+
+        assert_that(self.index.substring_matches("user"), is_([member, nicked_member]))
+
+    def test_substring_matches_need_all_characters_in_order(self):
+        member = mocked_user(_id=1, name="resu-user")
+        self.index.add(member.id, member)
+
+        assert_that(self.index.substring_matches("users"), is_([]))
+
+    def test_short_substring_matches(self):
+        member = mocked_user(_id=1, name="ab-user")
+        self.index.add(member.id, member)
+
+        assert_that(self.index.substring_matches("ab"), is_([member]))
+
+    def test_updated_entry_is_reindexed_and_keeps_order(self):
+        member = mocked_user(_id=1, name="old-name")
+        other_member = mocked_user(_id=2, name="other-name")
+        self.index.add(member.id, member)
+        self.index.add(other_member.id, other_member)
+
+        renamed_member = mocked_user(_id=1, name="new-name")
+        self.index.add(renamed_member.id, renamed_member)
+
+        assert_that(self.index.substring_matches("old"), is_([]))
+        assert_that(self.index.substring_matches("name"), is_([renamed_member, other_member]))
+        assert_that(len(self.index), is_(2))
+
+    def test_removed_entry_is_not_found(self):
+        member = mocked_user(_id=1, name="user")
+        self.index.add(member.id, member)
+
+        self.index.remove(member.id)
+
+        assert_that(self.index.exact_matches("user"), is_([]))
+        assert_that(self.index.substring_matches("use"), is_([]))
+        assert_that(self.index.trigrams, is_({}))
+
+
+class DiscordJobSchedulerTests(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.logger = mock(spec=logging.Logger)
+        self.scheduler = DiscordJobScheduler(asyncio.get_running_loop(), self.logger)
+        self.runs = 0
+
+    async def asyncTearDown(self):
+        self.scheduler.cancel_all()
+        await asyncio.sleep(0)
+        unstub()
+
+    def count_run(self):
+        self.runs += 1
+
+    async def count_run_async(self):
+        self.runs += 1
+
+    async def test_job_runs_periodically(self):
+        job = self.scheduler.every(0.01, self.count_run)
+
+        await asyncio.sleep(0.1)
+
+        assert_that(self.runs > 1, is_(True))
+        assert_that(job.runs, is_(self.runs))
+
+    async def test_coroutine_job_is_awaited(self):
+        self.scheduler.every(0.01, self.count_run_async)
+
+        await asyncio.sleep(0.1)
+
+        assert_that(self.runs > 1, is_(True))
+
+    async def test_cancelled_job_does_not_run_anymore(self):
+        job = self.scheduler.every(0.01, self.count_run, name="counter")
+        await asyncio.sleep(0.05)
+
+        self.scheduler.cancel("counter")
+        await asyncio.sleep(0)
+        runs = self.runs
+        await asyncio.sleep(0.05)
+
+        assert_that(self.runs, is_(runs))
+        assert_that(job.cancelled, is_(True))
+        assert_that(self.scheduler.status(), is_(["No jobs scheduled."]))
+
+    async def test_job_with_same_name_is_replaced(self):
+        first_job = self.scheduler.every(0.01, self.count_run, name="counter")
+        second_job = self.scheduler.every(0.01, self.count_run_async, name="counter")
+        await asyncio.sleep(0)
+
+        assert_that(first_job.cancelled, is_(True))
+        assert_that(self.scheduler.jobs, is_({"counter": second_job}))
+
+    async def test_failing_job_keeps_running(self):
+        when(self.logger).error(any)
+
+        def failing_job():
+            self.runs += 1
+            raise ValueError("job failed")
+
+        job = self.scheduler.every(0.01, failing_job, name="failing")
+        await asyncio.sleep(0.1)
+
+        assert_that(self.runs > 1, is_(True))
+        assert_that(job.failures, is_(job.runs))
+        verify(self.logger, atleast=1).error("Scheduled job failing failed: job failed")
+
+    async def test_status_reports_execution_times(self):
+        self.scheduler.every(0.01, self.count_run, name="counter")
+        await asyncio.sleep(0.05)
+
+        assert_that(self.scheduler.status()[0],
+                    matches_regexp(r"counter: every 0.01s, \d+ runs \(0 failed\), last \d+\.\dms, avg \d+\.\dms, "
+                                   r"max \d+\.\dms"))
+
+
+class DiscordLoopBridgeTests(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.logger = mock(spec=logging.Logger)
+        self.received = []
+
+    async def asyncTearDown(self):
+        unstub()
+
+    def bridge(self, max_size=500, drop_oldest=True):
+        return DiscordLoopBridge(asyncio.get_running_loop(), self.logger, max_size=max_size, drop_oldest=drop_oldest)
+
+    async def receive(self, value):
+        self.received.append(value)
+
+    async def test_submitted_coroutines_run_in_order(self):
+        bridge = self.bridge()
+
+        bridge.submit(self.receive, 1)
+        bridge.submit(self.receive, value=2)
+        await asyncio.sleep(0.01)
+
+        assert_that(self.received, is_([1, 2]))
+        assert_that(bridge.completed, is_(2))
+
+    async def test_full_bridge_drops_oldest_waiting_coroutine(self):
+        bridge = self.bridge(max_size=2)
+
+        bridge.submit(self.receive, 1)
+        bridge.submit(self.receive, 2)
+        accepted = bridge.submit(self.receive, 3)
+        await asyncio.sleep(0.01)
+
+        assert_that(accepted, is_(True))
+        assert_that(self.received, is_([2, 3]))
+        assert_that(bridge.dropped, is_(1))
+
+    async def test_full_bridge_drops_newest_coroutine(self):
+        bridge = self.bridge(max_size=2, drop_oldest=False)
+
+        bridge.submit(self.receive, 1)
+        bridge.submit(self.receive, 2)
+        accepted = bridge.submit(self.receive, 3)
+        await asyncio.sleep(0.01)
+
+        assert_that(accepted, is_(False))
+        assert_that(self.received, is_([1, 2]))
+
+    async def test_failing_coroutine_is_logged(self):
+        when(self.logger).error(any)
+        bridge = self.bridge()
+
+        async def failing():
+            raise ValueError("coroutine failed")
+
+        bridge.submit(failing)
+        bridge.submit(self.receive, 1)
+        await asyncio.sleep(0.01)
+
+        assert_that(self.received, is_([1]))
+        verify(self.logger).error(matches(r".*failing failed: coroutine failed"))
+
+    async def test_status_reports_latency(self):
+        bridge = self.bridge()
+
+        bridge.submit(self.receive, 1)
+        await asyncio.sleep(0.01)
+
+        assert_that(bridge.status(), matches_regexp(r"discord loop: 0 queued, 0 running, 1 completed, 0 dropped, "
+                                                    r"latency avg \d+\.\dms, max \d+\.\dms"))
+
+
+class GameStatusTests(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        setup_plugin()
+        setup_game_in_warmup("ca", mapname="campgrounds", map_title="Campgrounds")
+        connected_players(fake_player(1, "Player1", team="red", score=3),
+                          fake_player(2, "Player2", team="blue", score=1))
+        self.logger = mock(spec=logging.Logger)
+        self.game_status = GameStatus(self.logger)
+        self.game_status.memoize = True
+        self.invalidations = []
+
+    async def asyncTearDown(self):
+        unstub()
+
+    async def test_render_topic(self):
+        topic = self.game_status.render(GameStatus.TOPIC)
+
+        assert_that(topic, is_("Warmup on **Campgrounds** (CA) with **2/16** players. "))
+
+    async def test_render_teams(self):
+        status = self.game_status.render(GameStatus.TEAMS)
+
+        assert_that(status, is_("Warmup on **Campgrounds** (CA) with **2/16** players. "
+                                "\n**R:** **Player1**(3) \n**B:** **Player2**(1) "))
+
+    async def test_render_with_no_game(self):
+        setup_no_game()
+
+        status = self.game_status.render(GameStatus.TEAMS)
+
+        assert_that(status, is_(None))
+
+    async def test_repeated_renderings_are_memoized(self):
+        self.game_status.render(GameStatus.TEAMS)
+        self.game_status.render(GameStatus.TEAMS)
+        status = await self.game_status.current(GameStatus.TEAMS)
+
+        assert_that(status, matches_regexp(r"Warmup on \*\*Campgrounds\*\*.*"))
+        assert_that(self.game_status.renderings, is_(1))
+
+    async def test_invalidation_just_renders_invalidated_formats_again(self):
+        self.game_status.render(GameStatus.TOPIC)
+        self.game_status.render(GameStatus.TEAMS)
+        setup_game_in_progress("ca", mapname="campgrounds", map_title="Campgrounds", red_score=2, blue_score=1)
+
+        self.game_status.invalidate((GameStatus.TOPIC,))
+
+        assert_that(self.game_status.render(GameStatus.TOPIC),
+                    is_("Match in progress: **2** - **1** on **Campgrounds** (CA) with **2/16** players. "))
+        assert_that(self.game_status.render(GameStatus.TEAMS), matches_regexp(r"Warmup on .*"))
+        assert_that(self.game_status.renderings, is_(3))
+
+    async def test_nothing_is_memoized_without_zmq_stats(self):
+        setup_cvar("zmq_stats_enable", "0")
+        plugin = mock(spec=minqlx.Plugin)
+        when(plugin).add_hook(any, any, priority=any).thenReturn(None)
+
+        self.game_status.hook_events(plugin)
+        self.game_status.render(GameStatus.TOPIC)
+        self.game_status.render(GameStatus.TOPIC)
+
+        verify(plugin).add_hook("map", any, priority=minqlx.PRI_LOWEST)
+        verify(plugin, times=0).add_hook("death", any, priority=any)
+        assert_that(self.game_status.renderings, is_(2))
+
+    async def test_frags_in_round_based_gametypes_just_invalidate_teams(self):
+        self.game_status.add_listener(self.invalidations.append)
+
+        self.game_status.handle_score_change()
+
+        assert_that(self.invalidations, is_([(GameStatus.TEAMS,)]))
+
+    async def test_frags_in_other_gametypes_invalidate_the_score_in_the_topic(self):
+        setup_game_in_progress("tdm", mapname="campgrounds", map_title="Campgrounds", red_score=2, blue_score=1)
+        self.game_status.render(GameStatus.TOPIC)
+        setup_game_in_progress("tdm", mapname="campgrounds", map_title="Campgrounds", red_score=3, blue_score=1)
+
+        self.game_status.handle_score_change()
+
+        assert_that(self.game_status.render(GameStatus.TOPIC),
+                    is_("Match in progress: **3** - **1** on **Campgrounds** (TDM) with **2/16** players. "))
+
+    async def test_listeners_are_notified_about_invalidated_formats(self):
+        self.game_status.add_listener(self.invalidations.append)
+
+        self.game_status.invalidate((GameStatus.TEAMS,))
+        self.game_status.remove_listener(self.invalidations.append)
+        self.game_status.invalidate()
+
+        assert_that(self.invalidations, is_([(GameStatus.TEAMS,)]))
+
+
 def assert_matching_string_send_to_discord_context(context, matcher):
     context.send.assert_called_once()
     assert_that(context.send.call_args.args[0], matcher)
@@ -484,6 +939,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         setup_cvars({
             "qlx_owner": "1234567890",
+            "qlx_discordApplicationId": "13579",
             "qlx_discordBotToken": "bottoken",
             "qlx_discordRelayChannelIds": "1234",
             "qlx_discordTriggeredChannelIds": "456, 789",
@@ -506,7 +962,10 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
             "qlx_discordLogToSeparateLogfile": "0",
             "qlx_discordTriggeredChatMessagePrefix": "",
             "qlx_discordRelayTeamchatChannelIds": "242",
-            "qlx_discord_extensions": ""
+            "qlx_discord_extensions": "",
+            "qlx_discordOutboundFlushWindow": "0",
+            "qlx_discordOutboundQueueSize": "200",
+            "qlx_discordOutboundDropPolicy": "oldest"
         })
 
         self.logger = mock(spec=logging.Logger)
@@ -550,6 +1009,11 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         return context
 
+    def flush_outboxes(self):
+        """Runs the discord client's event loop until the outboxes sent their messages."""
+        while any(outbox.flushing for outbox in self.discord.outboxes.values()):
+            self.discord_client.loop.run_until_complete(asyncio.sleep(0))
+
     def relay_channel(self):
         channel = mocked_channel(_id=1234, name="relay-channel")
 
@@ -726,6 +1190,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_message("awesome relayed message")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(relay_channel, "awesome relayed message")
 
     def test_relay_message_with_not_connected_client(self):
@@ -735,6 +1200,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_message("awesome relayed message")
 
+        self.flush_outboxes()
         verify(relay_channel, times=0).send(any)
 
     def test_send_to_discord_channels_with_no_channel_ids(self):
@@ -755,6 +1221,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_chat_message(player, minqlx_channel, "QL is great!")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(relay_channel, "**Chatting player**: QL is great!")
 
     def test_relay_chat_message_with_asterisks_in_playername(self):
@@ -765,6 +1232,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_chat_message(player, minqlx_channel, "QL is great!")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(relay_channel, r"**\*Chatting\* player**: QL is great!")
 
     def test_relay_chat_message_replace_user_mention(self):
@@ -783,6 +1251,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_chat_message(player, minqlx_channel, "QL is great, @chatter !")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(
             relay_channel,
             f"**Chatting player**: QL is great, {mentioned_user.mention} !")
@@ -802,6 +1271,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_chat_message(player, minqlx_channel, "QL is great, @chatter !")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(relay_channel, "**Chatting player**: QL is great, @chatter !")
 
     def test_relay_chat_message_does_not_replace_all_everyone_and_here(self):
@@ -820,6 +1290,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_chat_message(player, minqlx_channel, "QL is great, @all @everyone @here !")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(
             relay_channel,
             "**Chatting player**: QL is great, @all @everyone @here !")
@@ -840,6 +1311,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_chat_message(player, minqlx_channel, "QL is great, #mention !")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(
             relay_channel,
             f"**Chatting player**: QL is great, {mentioned_channel.mention} !")
@@ -859,6 +1331,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_chat_message(player, minqlx_channel, "QL is great, #mention !")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(relay_channel, "**Chatting player**: QL is great, #mention !")
 
     def test_relay_chat_message_discord_not_logged_in(self):
@@ -875,6 +1348,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_chat_message(player, minqlx_channel, "QL is great, @member #mention !")
 
+        self.flush_outboxes()
         verify(relay_channel, times=0).send(any)
 
     def test_relay_team_chat_message_simple_message(self):
@@ -885,6 +1359,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_team_chat_message(player, minqlx_channel, "QL is great!")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(relay_channel, "**Chatting player**: QL is great!")
 
     def test_relay_team_chat_message_with_asterisks_in_playername(self):
@@ -895,6 +1370,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_team_chat_message(player, minqlx_channel, "QL is great!")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(relay_channel, r"**\*Chatting\* player**: QL is great!")
 
     def test_relay_team_chat_message_replace_user_mention(self):
@@ -913,6 +1389,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_team_chat_message(player, minqlx_channel, "QL is great, @chatter !")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(
             relay_channel,
             f"**Chatting player**: QL is great, {mentioned_user.mention} !")
@@ -932,6 +1409,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_team_chat_message(player, minqlx_channel, "QL is great, @chatter !")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(relay_channel, "**Chatting player**: QL is great, @chatter !")
 
     def test_relay_team_chat_message_replace_channel_mention(self):
@@ -950,6 +1428,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_team_chat_message(player, minqlx_channel, "QL is great, #mention !")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(
             relay_channel,
             f"**Chatting player**: QL is great, {mentioned_channel.mention} !")
@@ -969,6 +1448,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_team_chat_message(player, minqlx_channel, "QL is great, #mention !")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(relay_channel, "**Chatting player**: QL is great, #mention !")
 
     def test_relay_team_chat_message_discord_not_logged_in(self):
@@ -985,6 +1465,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.relay_team_chat_message(player, minqlx_channel, "QL is great, @member #mention !")
 
+        self.flush_outboxes()
         verify(relay_channel, times=0).send(any)
 
     @staticmethod
@@ -1141,6 +1622,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.triggered_message(player, "QL is great!")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(trigger_channel1, "**Chatting player**: QL is great!")
         assert_text_was_sent_to_discord_channel(trigger_channel2, "**Chatting player**: QL is great!")
 
@@ -1157,6 +1639,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.triggered_message(player, "QL is great!")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(trigger_channel1, r"**\*Chatting\_player\***: QL is great!")
         assert_text_was_sent_to_discord_channel(trigger_channel2, r"**\*Chatting\_player\***: QL is great!")
 
@@ -1172,6 +1655,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.triggered_message(player, "QL is great, @chatter #mention !")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(
             trigger_channel1,
             f"**Chatting player**: QL is great, {mentioned_user.mention} {mentioned_channel.mention} !")
@@ -1185,6 +1669,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.triggered_message(player, "QL is great, @member #mention !")
 
+        self.flush_outboxes()
         verify(self.triggered_channel(), times=0).send(any)
 
     def test_triggered_message_no_replacement_configured(self):
@@ -1202,6 +1687,7 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.triggered_message(player, "QL is great, @member #mention !")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(
             trigger_channel1,
             "**Chatting player**: QL is great, @member #mention !")
@@ -1220,5 +1706,6 @@ class SimpleAsyncDiscordTests(unittest.IsolatedAsyncioTestCase):
 
         self.discord.triggered_message(player, "QL is great!")
 
+        self.flush_outboxes()
         assert_text_was_sent_to_discord_channel(trigger_channel1, "Server Prefix **Chatting player**: QL is great!")
         assert_text_was_sent_to_discord_channel(trigger_channel2, "Server Prefix **Chatting player**: QL is great!")
@@ -0,0 +1,157 @@
+"""Microbenchmarks of minqlx and plugin hot paths.
+
+Run with ``python plugin_benchmarks.py`` from this directory, with src/main/python on the PYTHONPATH. Results are
+recorded to benchmark_results.jsonl and compared against the previous run, see ``--help`` for options.
+"""
+import itertools
+import os
+import sys
+
+from redis import Redis, StrictRedis
+
+from mockito import *
+from mockito.matchers import *
+
+import minqlx
+
+from minqlx_plugin_test import *
+from minqlx_plugin_test.benchmark import benchmark, run_benchmarks_from_command_line
+from minqlx_plugin_test.replay import setup_replay
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "experimental", "python"))
+
+from frag_stats import frag_stats  # noqa: E402
+from mydiscordbot import mydiscordbot, SimpleAsyncDiscord  # noqa: E402
+import balancetwo  # noqa: E402
+
+
+class BenchmarkDispatcher(minqlx.EventDispatcher):
+    name = "benchmark"
+
+
+# noinspection PyPep8Naming
+class benchmarked_plugin(minqlx.Plugin):
+    pass
+
+
+def noop(*_args, **_kwargs):
+    return None
+
+
+@benchmark("EventDispatcher.dispatch", params=[1, 10, 50])
+def bench_event_dispatch(amount_plugins):
+    setup_replay()
+    dispatcher = BenchmarkDispatcher()
+    for i in range(amount_plugins):
+        dispatcher.add_hook("plugin{}".format(i), noop)
+
+    stats = {"TYPE": "PLAYER_DEATH", "DATA": {}}
+    return lambda: dispatcher.dispatch(stats)
+
+
+@benchmark("CommandInvoker.handle_input", params=[10, 100, 500])
+def bench_handle_input(amount_commands):
+    setup_replay({"qlx_commandPrefix": "!", "qlx_owner": "1234"})
+    plugin = benchmarked_plugin()
+    invoker = minqlx.CommandInvoker()
+    for i in range(amount_commands):
+        invoker.add_command(minqlx.Command(plugin, "cmd{}".format(i), noop, 0, None, None, False, 0, True, ""),
+                            minqlx.PRI_NORMAL)
+
+    player = fake_player(123, "Issuing Player", team="red")
+    channel = mocked_channel()
+    msg = "!cmd{}".format(amount_commands - 1)
+    return lambda: invoker.handle_input(player, msg, channel)
+
+
+@benchmark("handle_client_command", params=["say", "score", "userinfo"])
+def bench_handle_client_command(command):
+    setup_replay()
+    player = fake_player(123, "Issuing Player", team="red")
+    player.cvars = {"name": "Issuing Player", "rate": "25000", "snaps": "40", "model": "sarge", "handicap": "100"}
+    when2(minqlx.Player, any).thenReturn(player)
+
+    client_commands = {
+        "say": "say \"hello, everyone\"",
+        "score": "score",
+        "userinfo": "userinfo \"\\name\\Issuing Player\\rate\\25000\\snaps\\40\\model\\doom\\handicap\\100\""
+    }
+    client_command = client_commands[command]
+    return lambda: minqlx.handle_client_command(0, client_command)
+
+
+@benchmark("frag_stats.record_frag")
+def bench_record_frag():
+    setup_replay({"qlx_fragstats_toplimit": "10"})
+    setup_game_in_progress()
+    plugin = frag_stats()
+    plugin.database = Redis
+    db = mock(StrictRedis)
+    plugin._db_instance = db
+    when(db).zincrby(any, any, any).thenReturn(None)
+
+    frags = itertools.cycle(itertools.permutations(range(76561198000000000, 76561198000000016), 2))
+    return lambda: plugin.record_frag(*next(frags))
+
+
+@benchmark("mydiscordbot.is_filtered_message", params=[2, 20, 200])
+def bench_is_filtered_message(amount_filters):
+    message_filters = ", ".join(r"^\!cmd{}$".format(i) for i in range(amount_filters))
+    setup_replay({"qlx_discordQuakeRelayMessageFilters": message_filters})
+    plugin = mydiscordbot(discord_client=mock(spec=SimpleAsyncDiscord, strict=False))
+
+    return lambda: plugin.is_filtered_message("a chat message that is not filtered")
+
+
+def rating_provider_json(steam_ids):
+    return {"playerinfo": {str(steam_id): {"ratings": {"ca": {"elo": 1200 + (steam_id * 37) % 800,
+                                                              "games": 100}},
+                                           "privacy": "public"} for steam_id in steam_ids},
+            "deactivated": []}
+
+
+def setup_balancetwo(amount_players):
+    setup_replay({"qlx_balancetwo_ratingSystem": "a-elo", "qlx_balancetwo_autoRebalance": "0"})
+    setup_game_in_progress(game_type="ca")
+
+    steam_ids = list(range(76561198000000000, 76561198000000000 + amount_players))
+    players = [fake_player(steam_id, "Player{}".format(i), team="red" if i % 2 == 0 else "blue")
+               for i, steam_id in enumerate(steam_ids)]
+    connected_players(*players)
+
+    # Keep the plugin from fetching ratings from the rating providers while loading.
+    when(balancetwo.balancetwo).fetch_elos_from_all_players().thenReturn(None)
+    plugin = balancetwo.balancetwo()
+    # Every connecting player's ratings are fetched separately.
+    plugin.ratings[balancetwo.A_ELO.name] = balancetwo.RatingProvider.from_json(rating_provider_json([]))
+    for steam_id in steam_ids:
+        plugin.ratings[balancetwo.A_ELO.name].append_ratings(rating_provider_json([steam_id]))
+
+    return plugin, steam_ids
+
+
+@benchmark("balancetwo.find_non_recent_small_balanced_teams", params=[4, 6])
+def bench_small_balanced_teams(amount_players):
+    plugin, steam_ids = setup_balancetwo(amount_players)
+    return lambda: plugin.find_non_recent_small_balanced_teams(steam_ids)
+
+
+@benchmark("balancetwo.find_large_balanced_teams", params=[8, 16])
+def bench_large_balanced_teams(amount_players):
+    plugin, steam_ids = setup_balancetwo(amount_players)
+    return lambda: plugin.find_large_balanced_teams(steam_ids)
+
+
+@benchmark("RatingProvider.rating_for", params=[1, 16, 64])
+def bench_rating_provider_lookup(amount_fetches):
+    steam_ids = list(range(76561198000000000, 76561198000000000 + amount_fetches))
+    rating_provider = balancetwo.RatingProvider.from_json(rating_provider_json(steam_ids[:1]))
+    for steam_id in steam_ids[1:]:
+        rating_provider.append_ratings(rating_provider_json([steam_id]))
+
+    looked_up = steam_ids[0]
+    return lambda: rating_provider.rating_for(looked_up, "ca")
+
+
+if __name__ == "__main__":
+    sys.exit(run_benchmarks_from_command_line())
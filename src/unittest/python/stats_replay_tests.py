@@ -0,0 +1,81 @@
+from minqlx_plugin_test import *
+from minqlx_plugin_test.replay import *
+
+import json
+import os
+import tempfile
+import unittest
+
+from redis import Redis, StrictRedis
+
+from mockito import *
+from mockito.matchers import *
+from hamcrest import *
+
+import minqlx
+
+from frag_stats import *
+
+
+class StatsReplayTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cvars = setup_replay({"qlx_fragstats_toplimit": "10"})
+
+        self.plugin = frag_stats()
+        self.plugin.database = Redis
+        self.db = mock(StrictRedis)
+        self.plugin._db_instance = self.db
+        when(self.db).zincrby(any, any, any).thenReturn(None)
+
+        self.recording_dir = tempfile.TemporaryDirectory()
+        self.recording = os.path.join(self.recording_dir.name, "stats.json.gz")
+
+    def tearDown(self):
+        self.recording_dir.cleanup()
+        for hook in self.plugin.hooks:
+            self.plugin.remove_hook(*hook)
+        for command in self.plugin.commands:
+            self.plugin.remove_command(command.name, command.handler)
+        unstub()
+
+    def record(self, *messages):
+        recorder = minqlx.StatsRecorder(self.recording)
+        for message in messages:
+            recorder.record(json.dumps(message))
+        recorder.close()
+
+    @staticmethod
+    def player_data(steam_id, name, team):
+        return {"STEAM_ID": str(steam_id), "NAME": name, "TEAM": team}
+
+    def test_read_stats_recording_returns_recorded_messages(self):
+        self.record({"TYPE": "PLAYER_CONNECT", "DATA": self.player_data(123, "Player", "SPECTATOR")})
+
+        recorded = list(minqlx.read_stats_recording(self.recording))
+
+        assert_that(len(recorded), is_(1))
+        assert_that(json.loads(recorded[0][1]), is_({"TYPE": "PLAYER_CONNECT",
+                                                     "DATA": self.player_data(123, "Player", "SPECTATOR")}))
+
+    def test_replay_dispatches_recorded_deaths_to_plugins(self):
+        self.record(
+            {"TYPE": "PLAYER_CONNECT", "DATA": self.player_data(123, "Victim", "SPECTATOR")},
+            {"TYPE": "PLAYER_CONNECT", "DATA": self.player_data(456, "Killer", "SPECTATOR")},
+            {"TYPE": "MATCH_STARTED", "DATA": {"GAME_TYPE": "CA", "MAP": "campgrounds"}},
+            {"TYPE": "PLAYER_DEATH", "DATA": {"VICTIM": self.player_data(123, "Victim", 1),
+                                              "KILLER": self.player_data(456, "Killer", 2), "MOD": "ROCKET"}},
+            {"TYPE": "PLAYER_DEATH", "DATA": {"VICTIM": self.player_data(123, "Victim", 1),
+                                              "KILLER": self.player_data(456, "Killer", 2), "MOD": "RAILGUN"}})
+
+        statistics = StatsReplay(self.recording).run()
+
+        assert_that(self.plugin.frag_matrix[456][123], is_(2))
+        assert_that(statistics.events, is_(5))
+        assert_that(len(statistics.handler_times["PLAYER_DEATH"]), is_(2))
+
+    def test_percentile_of_handler_times(self):
+        assert_that(percentile([0.5, 0.1, 0.4, 0.2, 0.3], 50), is_(0.3))
+        assert_that(percentile([0.5, 0.1, 0.4, 0.2, 0.3], 99), is_(0.5))
+        assert_that(percentile([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0], 50), is_(0.5))
+        assert_that(percentile([], 99), is_(0.0))